@@ -1,7 +1,83 @@
-from swarm import Swarm
+import importlib
+import sys
+import types
 
-swarm_client = Swarm()
+__all__ = [
+    "AsyncSwarm",
+    "swarm_client",
+    "async_swarm_client",
+    "chat_agent",
+    "food_analysis_agent",
+    "summary_agent",
+]
 
-from ai_agents.chat_agent import chat_agent
-from ai_agents.food_analysis_agent import food_analysis_agent
-from ai_agents.summary_agent import summary_agent
+
+def _async_swarm_class():
+    from ai_agents.async_swarm import AsyncSwarm
+
+    return AsyncSwarm
+
+
+def _swarm_client():
+    from swarm import Swarm
+
+    from ai_agents.clients import openai_client
+
+    return Swarm(client=openai_client())
+
+
+def _async_swarm_client():
+    from ai_agents.async_swarm import AsyncSwarm
+    from ai_agents.clients import async_openai_client
+
+    return AsyncSwarm(client=async_openai_client())
+
+
+class _AgentAttribute:
+    """`ai_agents.<name>` is the Agent, even after the same-named submodule is imported.
+
+    Importing `ai_agents.chat_agent` binds the submodule onto the package,
+    which would shadow a plain lazy attribute; this descriptor wins over
+    the module dict and resolves to the Agent inside the submodule.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, package, owner=None):
+        if package is None:
+            return self
+        value = package.__dict__.get(self.name)
+        if value is None or isinstance(value, types.ModuleType):
+            value = getattr(importlib.import_module(f"{__name__}.{self.name}"), self.name)
+        return value
+
+    def __set__(self, package, value):
+        package.__dict__[self.name] = value
+
+
+class _Package(types.ModuleType):
+    chat_agent = _AgentAttribute("chat_agent")
+    food_analysis_agent = _AgentAttribute("food_analysis_agent")
+    summary_agent = _AgentAttribute("summary_agent")
+
+
+_LAZY = {
+    "AsyncSwarm": _async_swarm_class,
+    "swarm_client": _swarm_client,
+    "async_swarm_client": _async_swarm_client,
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = _LAZY[name]()
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+sys.modules[__name__].__class__ = _Package
@@ -0,0 +1,293 @@
+import math
+import re
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+
+from ai_agents.intent_router import normalize_message
+
+FEATURE_BUCKETS = 1 << 20
+CHAR_GRAM = 4
+CHAR_GRAM_WEIGHT = 0.5
+RESCORE_CANDIDATES = 16
+
+QUESTION_START = re.compile(
+    r"(?:what|whats|what's|how|is|are|can|could|should|does|do|why|which|when|will|would)\b",
+    re.IGNORECASE,
+)
+# Answers to these depend on earlier turns or on the user's own numbers.
+CONTEXTUAL = re.compile(
+    r"\b(?:it|that|this|those|these|them|same|again|above|today|yesterday|tonight|my|mine|i'?ve"
+    r"|i'?m|i'?d|i ate|i had|i just)\b",
+    re.IGNORECASE,
+)
+STOPWORDS = frozenset(
+    "a an the is are was were be been am do does did can could should would will of to in on for"
+    " with at by about from as and or if so it its this that what whats how why which when who"
+    " i me you your we our there their any some much many more most very really".split()
+)
+# Content words that never change the answer; ignored when comparing questions' words.
+FILLER = frozenset("per day daily one please tell know generally usually actually okay ok".split())
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    if len(word) > 5 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def content_words(text: str) -> list:
+    """Stemmed non-stopwords, in order."""
+    return [_stem(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def vectorize(text: str) -> dict:
+    """L2-normalized hashed features: content words, word bigrams and character n-grams."""
+    words = content_words(text)
+    counts = Counter()
+    for word in words:
+        counts[f"w:{word}"] += 1.0
+        padded = f" {word} "
+        grams = [padded[i:i + CHAR_GRAM] for i in range(max(1, len(padded) - CHAR_GRAM + 1))]
+        for gram in grams:
+            counts[f"c:{gram}"] += CHAR_GRAM_WEIGHT / len(grams)
+    for pair in zip(words, words[1:]):
+        counts[f"b:{pair[0]} {pair[1]}"] += 1.0
+
+    vector = Counter()
+    for feature, count in counts.items():
+        vector[zlib.crc32(feature.encode()) % FEATURE_BUCKETS] += count
+    norm = sum(value * value for value in vector.values()) ** 0.5
+    return {feature: value / norm for feature, value in vector.items()} if norm else {}
+
+
+def cacheable_question(message: str) -> bool:
+    """A self-contained general question: no reference to earlier turns or the user's own data."""
+    text = normalize_message(message or "")
+    if len(text.split()) < 3 or CONTEXTUAL.search(text):
+        return False
+    return message.strip().endswith("?") or bool(QUESTION_START.match(text))
+
+
+def answer_variant(context_variables: dict) -> str:
+    """Profile fields that change a general answer: dietary preferences."""
+    profile = (context_variables or {}).get("user_profile") or {}
+    return (profile.get("dietary_preferences") or "").strip().lower()
+
+
+class _Entry:
+    __slots__ = ("question", "terms", "vector", "answer", "variant", "stored_at", "cost", "hits")
+
+    def __init__(self, question, terms, vector, answer, variant, stored_at, cost):
+        self.question = question
+        self.terms = terms
+        self.vector = vector
+        self.answer = answer
+        self.variant = variant
+        self.stored_at = stored_at
+        self.cost = cost
+        self.hits = 0
+
+
+class AnswerCache:
+    """Similarity cache for general health answers the chat agent gave without tools.
+
+    Check it before running the agent, and offer it the turn's result after:
+
+        reply = cache.lookup(text, context_variables)
+        if reply is None:
+            start = time.perf_counter()
+            response = swarm_client.run(chat_agent, history, context_variables)
+            reply = response.messages[-1]["content"]
+            cache.store(text, reply, response.messages, context_variables,
+                        cost=time.perf_counter() - start)
+
+    A question matches a stored one when both use the same content words
+    (stopwords, FILLER words, plurals and "-ing" aside) and the cosine similarity of their
+    hashed n-gram vectors is at least `threshold`. Requiring the same words
+    keeps near-identical questions with a different subject or polarity
+    ("...for a woman" / "...for a man", "good" / "bad") apart. Candidates
+    come from an inverted index over the features, so a lookup touches only
+    entries that share a feature with the question. `store()` skips questions that refer
+    to earlier turns or the user's own data, turns that made any tool call
+    (their answers used user-specific output) and replies that mention the
+    user's name. Answers are kept per dietary-preferences variant, expire
+    after `ttl_seconds` and are evicted least-recently-used past
+    `max_entries`. As with IntentRouter, append the question and the cached
+    reply to the history so later turns keep the context.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl_seconds: float = 7 * 24 * 3600,
+        threshold: float = 0.6,
+        clock=time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.clock = clock
+        self.counters = Counter()
+        self.lookup_seconds = 0.0
+        self.saved_seconds = 0.0
+        self._entries = OrderedDict()
+        self._postings = {}
+        self._by_question = {}
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def lookup(self, message: str, context_variables: dict = None):
+        """Return the cached answer for a similar general question, or None."""
+        start = time.perf_counter()
+        with self._lock:
+            self.counters["lookups"] += 1
+            entry, kind = None, None
+            if cacheable_question(message):
+                entry, kind = self._find(normalize_message(message), answer_variant(context_variables))
+            elapsed = time.perf_counter() - start
+            self.lookup_seconds += elapsed
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            entry.hits += 1
+            self.counters[f"hits_{kind}"] += 1
+            self.saved_seconds += max(0.0, entry.cost - elapsed)
+            return entry.answer
+
+    def store(
+        self,
+        message: str,
+        reply: str,
+        turn_messages: list = (),
+        context_variables: dict = None,
+        cost: float = 0.0,
+    ) -> bool:
+        """Cache `reply` if it is a general answer; `turn_messages` are the turn's new messages."""
+        reason = self._skip_reason(message, reply, turn_messages, context_variables)
+        if reason:
+            self.counters[f"skipped_{reason}"] += 1
+            return False
+        question = normalize_message(message)
+        variant = answer_variant(context_variables)
+        vector = vectorize(question)
+        with self._lock:
+            if (question, variant) in self._by_question:
+                self._drop(self._by_question[(question, variant)])
+            self._ids += 1
+            key = self._ids
+            terms = frozenset(content_words(question)) - FILLER
+            self._entries[key] = _Entry(question, terms, vector, reply, variant, self.clock(), cost)
+            self._by_question[(question, variant)] = key
+            for feature in vector:
+                self._postings.setdefault(feature, set()).add(key)
+            self.counters["stored"] += 1
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.counters["evictions"] += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+            self._by_question.clear()
+
+    def stats(self) -> dict:
+        lookups = self.counters["lookups"]
+        hits = lookups - self.counters["misses"]
+        return {
+            "size": len(self._entries),
+            "lookups": lookups,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "hits_exact": self.counters["hits_exact"],
+            "hits_similar": self.counters["hits_similar"],
+            "avg_lookup_ms": round(self.lookup_seconds / lookups * 1000, 3) if lookups else 0.0,
+            "saved_s": round(self.saved_seconds, 3),
+            "stored": self.counters["stored"],
+            "skipped": {
+                name.removeprefix("skipped_"): count
+                for name, count in sorted(self.counters.items())
+                if name.startswith("skipped_")
+            },
+            "evictions": self.counters["evictions"],
+            "expirations": self.counters["expirations"],
+        }
+
+    def _skip_reason(self, message, reply, turn_messages, context_variables):
+        if not reply or not cacheable_question(message):
+            return "not_general"
+        if any(m.get("tool_calls") or m.get("role") == "tool" for m in turn_messages):
+            return "used_tools"
+        profile = (context_variables or {}).get("user_profile") or {}
+        name = (profile.get("first_name") or "").strip()
+        if name and re.search(rf"\b{re.escape(name)}\b", reply, re.IGNORECASE):
+            return "personal"
+        return None
+
+    def _find(self, question: str, variant: str):
+        key = self._by_question.get((question, variant))
+        if key is not None and self._fresh(key):
+            self._entries.move_to_end(key)
+            return self._entries[key], "exact"
+
+        vector = vectorize(question)
+        terms = frozenset(content_words(question)) - FILLER
+        overlap = Counter()
+        for feature, weight in vector.items():
+            for key in self._postings.get(feature, ()):
+                overlap[key] += weight * self._entries[key].vector[feature]
+
+        # Rescore the closest candidates with IDF weights from the stored questions,
+        # so words shared by many questions ("healthy", "calories") count for less.
+        best, best_score = None, self.threshold
+        for key, _ in overlap.most_common(RESCORE_CANDIDATES):
+            entry = self._entries[key]
+            if entry.variant != variant or entry.terms != terms:
+                continue
+            score = self._idf_cosine(vector, entry.vector)
+            if score >= best_score and self._fresh(key):
+                best, best_score = key, score
+        if best is None:
+            return None, None
+        self._entries.move_to_end(best)
+        entry = self._entries[best]
+        return entry, "exact" if entry.question == question else "similar"
+
+    def _idf_cosine(self, query: dict, stored: dict) -> float:
+        documents = len(self._entries) + 1
+        idf = {
+            feature: math.log(documents / (1 + len(self._postings.get(feature, ())))) + 1
+            for feature in query.keys() | stored.keys()
+        }
+        dot = sum(weight * stored.get(feature, 0.0) * idf[feature] ** 2 for feature, weight in query.items())
+        query_norm = sum((weight * idf[feature]) ** 2 for feature, weight in query.items()) ** 0.5
+        stored_norm = sum((weight * idf[feature]) ** 2 for feature, weight in stored.items()) ** 0.5
+        return dot / (query_norm * stored_norm) if query_norm and stored_norm else 0.0
+
+    def _fresh(self, key) -> bool:
+        if self.clock() - self._entries[key].stored_at <= self.ttl_seconds:
+            return True
+        self._drop(key)
+        self.counters["expirations"] += 1
+        return False
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._by_question.pop((entry.question, entry.variant), None)
+        for feature in entry.vector:
+            postings = self._postings.get(feature)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._postings[feature]
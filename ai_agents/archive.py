@@ -0,0 +1,392 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import date, timedelta
+
+from ai_agents.weight_trends import require_numpy
+
+logger = logging.getLogger(__name__)
+
+BUCKET_FIELDS = ("calories", "protein", "carbs", "sugar", "health_sum", "health_count", "meal_count")
+COLUMN_DTYPES = {
+    "user_id": "int64",
+    "day": "int32",
+    "calories": "int32",
+    "protein": "float32",
+    "carbs": "float32",
+    "sugar": "float32",
+    "health_sum": "int32",
+    "health_count": "int32",
+    "meal_count": "int32",
+}
+SYNC_LOOKBACK_DAYS = 7
+KEEP_GENERATIONS = 2
+
+CURRENT_FILE = "CURRENT"
+DELTA_FILE = "delta.jsonl"
+META_FILE = "meta.json"
+
+
+def _bucket_row(bucket: dict) -> tuple:
+    return (
+        int(bucket["calories"] or 0),
+        round(bucket["protein"] or 0, 1),
+        round(bucket["carbs"] or 0, 1),
+        round(bucket["sugar"] or 0, 1),
+        int(bucket["health_sum"] or 0),
+        int(bucket["health_count"] or 0),
+        int(bucket["meal_count"] or 0),
+    )
+
+
+def _averages(calories: int, days_logged: int, health_sum: int, health_count: int) -> dict:
+    return {
+        "days_logged": days_logged,
+        "avg_daily_calories": round(calories / days_logged) if days_logged else 0,
+        "avg_health_rating": round(health_sum / health_count, 1) if health_count else 0,
+    }
+
+
+def _replace_file(path: str, text: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class NutritionArchive:
+    """Append-only columnar archive of per-user daily nutrition buckets.
+
+    Layout under `path`:
+
+        gen-NNNNNN/<column>.npy   compacted buckets sorted by (user_id, day), memory-mapped
+        gen-NNNNNN/index_*.npy    archived user ids and their row offsets
+        delta.jsonl               buckets appended since the last compaction; a later
+                                  line for the same user and day replaces earlier ones
+        CURRENT, meta.json        live generation and the last synced day
+
+    Run `sync(data_layer)` and `compact()` once a day, e.g. after the
+    summary batch. `sync()` archives closed days (up to yesterday) and
+    re-checks the last `lookback` days so late meal edits are picked up;
+    `compact()` folds the delta into a new generation. Reports read one
+    user's slice of the base plus their delta lines, so a quarter or a
+    year costs O(days) and no database access. Any number of processes can
+    read; they pick up new lines and generations on their next query. Only
+    one process should sync and compact.
+    """
+
+    def __init__(self, path: str, today=date.today):
+        self.path = path
+        self.today = today
+        self.synced_through = None
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._generation = None
+        self._base = {}
+        self._delta = {}
+        self._delta_inode = None
+        self._delta_offset = 0
+        self.refresh()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    # Reading
+
+    def refresh(self):
+        """Pick up a new generation or delta lines written by another process."""
+        with self._lock:
+            while True:
+                generation = self._read_file(CURRENT_FILE)
+                if generation != self._generation:
+                    self._load_base(generation)
+                self._read_delta()
+                if self._read_file(CURRENT_FILE) == generation:
+                    break
+            meta = self._read_file(META_FILE)
+            synced = json.loads(meta)["synced_through"] if meta else None
+            self.synced_through = date.fromisoformat(synced) if synced else None
+
+    def series(self, user_id: int, start: date, end: date) -> dict:
+        """Per-day bucket columns for start <= day <= end; days without meals are zero."""
+        np = require_numpy()
+        self.refresh()
+        days = (end - start).days + 1
+        origin = start.toordinal()
+        columns = {name: np.zeros(days, dtype=COLUMN_DTYPES[name]) for name in BUCKET_FIELDS}
+        with self._lock:
+            lo, hi = self._user_rows(user_id)
+            if hi > lo:
+                archived = self._base["day"][lo:hi]
+                first, last = np.searchsorted(archived, [origin, origin + days])
+                offsets = archived[first:last] - origin
+                for name in BUCKET_FIELDS:
+                    columns[name][offsets] = self._base[name][lo + first:lo + last]
+            for ordinal, row in self._delta.get(user_id, {}).items():
+                if 0 <= ordinal - origin < days:
+                    for name, value in zip(BUCKET_FIELDS, row):
+                        columns[name][ordinal - origin] = value
+        return columns
+
+    def report(self, user_id: int, start: date, end: date, daily_limit: int = None) -> dict:
+        """Totals, daily-calorie percentiles over logged days and a per-month breakdown."""
+        np = require_numpy()
+        columns = self.series(user_id, start, end)
+        logged = columns["meal_count"] > 0
+        calories = columns["calories"][logged]
+        percentiles = np.percentile(calories, [10, 50, 90]).round().astype(int).tolist() if calories.size else None
+
+        boundaries, labels = [], []
+        month_start = start
+        while month_start <= end:
+            boundaries.append((month_start - start).days)
+            labels.append(f"{month_start:%Y-%m}")
+            month_start = (month_start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        per_month = [
+            np.add.reduceat(column, boundaries).tolist()
+            for column in (columns["calories"], logged.astype(np.int32), columns["health_sum"], columns["health_count"])
+        ]
+        months = [{"month": label, **_averages(*sums)} for label, *sums in zip(labels, *per_month)]
+
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "archived_through": self.synced_through.isoformat() if self.synced_through else None,
+            "days": len(logged),
+            "total_calories": int(columns["calories"].sum()),
+            "total_protein": round(float(columns["protein"].sum()), 1),
+            "total_carbs": round(float(columns["carbs"].sum()), 1),
+            "total_sugar": round(float(columns["sugar"].sum()), 1),
+            "meal_count": int(columns["meal_count"].sum()),
+            **_averages(
+                int(calories.sum()), int(calories.size),
+                int(columns["health_sum"].sum()), int(columns["health_count"].sum()),
+            ),
+            "p10_daily_calories": percentiles[0] if percentiles else None,
+            "median_daily_calories": percentiles[1] if percentiles else None,
+            "p90_daily_calories": percentiles[2] if percentiles else None,
+            "days_over_limit": int((calories > daily_limit).sum()) if daily_limit else None,
+            "months": months,
+        }
+
+    def stats(self) -> dict:
+        self.refresh()
+        with self._lock:
+            return {
+                "generation": self._generation,
+                "base_rows": len(self._base["day"]) if self._base else 0,
+                "base_users": len(self._base["index_users"]) if self._base else 0,
+                "delta_rows": sum(len(days) for days in self._delta.values()),
+                "synced_through": self.synced_through.isoformat() if self.synced_through else None,
+            }
+
+    # Writing
+
+    def append(self, buckets) -> int:
+        """Append buckets (dicts with user_id, day and BUCKET_FIELDS) to the delta log."""
+        lines = [
+            json.dumps([bucket["user_id"], bucket["day"].toordinal(), *_bucket_row(bucket)])
+            for bucket in buckets
+        ]
+        if not lines:
+            return 0
+        with self._lock:
+            with open(os.path.join(self.path, DELTA_FILE), "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._read_delta()
+        return len(lines)
+
+    def sync(self, source, through: date = None, lookback: int = SYNC_LOOKBACK_DAYS) -> int:
+        """Archive days up to `through` (default yesterday) from `source.daily_buckets()`.
+
+        The first sync backfills all history. Later syncs fetch only days
+        after the last sync plus the last `lookback` days, and append just
+        the buckets that changed, including days whose meals were all deleted.
+        """
+        through = through or self.today() - timedelta(days=1)
+        with self._lock:
+            self.refresh()
+            start = None
+            if self.synced_through is not None:
+                start = min(self.synced_through + timedelta(days=1), through - timedelta(days=lookback - 1))
+            fresh = {
+                (bucket["user_id"], bucket["day"].toordinal()): bucket
+                for bucket in source.daily_buckets(start, through + timedelta(days=1))
+            }
+            changed = [
+                bucket for key, bucket in fresh.items()
+                if start is None or self._bucket(*key) != _bucket_row(bucket)
+            ]
+            if start is not None:
+                zero = dict.fromkeys(BUCKET_FIELDS, 0)
+                changed.extend(
+                    {"user_id": user_id, "day": date.fromordinal(ordinal), **zero}
+                    for user_id, ordinal in self._archived_keys(start.toordinal(), through.toordinal())
+                    if (user_id, ordinal) not in fresh
+                )
+            appended = self.append(changed)
+            _replace_file(os.path.join(self.path, META_FILE), json.dumps({"synced_through": through.isoformat()}))
+            self.synced_through = through
+        logger.info(f"Archive sync through {through}: {appended} buckets appended")
+        return appended
+
+    def compact(self) -> dict:
+        """Fold the delta log into a new generation; empty buckets are dropped."""
+        np = require_numpy()
+        with self._lock:
+            self.refresh()
+            delta = [
+                (user_id, ordinal, *row)
+                for user_id, days in self._delta.items()
+                for ordinal, row in days.items()
+            ]
+            names = ("user_id", "day", *BUCKET_FIELDS)
+            merged = {}
+            for position, name in enumerate(names):
+                base = np.asarray(self._base[name]) if self._base else np.empty(0, COLUMN_DTYPES[name])
+                appended = np.array([row[position] for row in delta], dtype=COLUMN_DTYPES[name])
+                merged[name] = np.concatenate([base, appended])
+
+            # Sort by (user, day) with delta rows after base rows, then keep the last of each pair.
+            source = np.concatenate([np.zeros(len(merged["day"]) - len(delta), np.int8), np.ones(len(delta), np.int8)])
+            order = np.lexsort((source, merged["day"], merged["user_id"]))
+            users, days = merged["user_id"][order], merged["day"][order]
+            last = np.ones(len(order), dtype=bool)
+            last[:-1] = (users[1:] != users[:-1]) | (days[1:] != days[:-1])
+            keep = order[last]
+            keep = keep[merged["meal_count"][keep] > 0]
+
+            number = int(self._generation.split("-")[1]) + 1 if self._generation else 1
+            generation = f"gen-{number:06d}"
+            directory = os.path.join(self.path, generation)
+            tmp = f"{directory}.tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            for name in names:
+                np.save(os.path.join(tmp, f"{name}.npy"), merged[name][keep])
+            index_users, index_starts = np.unique(merged["user_id"][keep], return_index=True)
+            np.save(os.path.join(tmp, "index_users.npy"), index_users)
+            np.save(os.path.join(tmp, "index_bounds.npy"), np.append(index_starts, len(keep)).astype(np.int64))
+            os.replace(tmp, directory)
+
+            _replace_file(os.path.join(self.path, CURRENT_FILE), generation)
+            _replace_file(os.path.join(self.path, DELTA_FILE), "")
+            self.refresh()
+            self._remove_old_generations(number)
+
+        report = {"generation": generation, "rows": int(len(keep)), "users": int(len(index_users)),
+                  "delta_merged": len(delta)}
+        logger.info(f"Archive compacted: {report}")
+        return report
+
+    # Internals
+
+    def _read_file(self, name: str):
+        try:
+            with open(os.path.join(self.path, name), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _load_base(self, generation: str):
+        np = require_numpy()
+        self._generation = generation
+        self._base = {}
+        if generation is None:
+            return
+        directory = os.path.join(self.path, generation)
+        for name in (*COLUMN_DTYPES, "index_users", "index_bounds"):
+            self._base[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+    def _read_delta(self):
+        path = os.path.join(self.path, DELTA_FILE)
+        try:
+            status = os.stat(path)
+        except FileNotFoundError:
+            self._delta, self._delta_inode, self._delta_offset = {}, None, 0
+            return
+        if status.st_ino != self._delta_inode or status.st_size < self._delta_offset:
+            self._delta, self._delta_inode, self._delta_offset = {}, status.st_ino, 0
+        if status.st_size == self._delta_offset:
+            return
+        with open(path, "rb") as f:
+            f.seek(self._delta_offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].splitlines():
+            user_id, ordinal, *row = json.loads(line)
+            self._delta.setdefault(user_id, {})[ordinal] = tuple(row)
+        self._delta_offset += complete
+
+    def _user_rows(self, user_id: int) -> tuple:
+        if not self._base:
+            return 0, 0
+        users = self._base["index_users"]
+        position = int(users.searchsorted(user_id))
+        if position == len(users) or users[position] != user_id:
+            return 0, 0
+        bounds = self._base["index_bounds"]
+        return int(bounds[position]), int(bounds[position + 1])
+
+    def _bucket(self, user_id: int, ordinal: int) -> tuple:
+        row = self._delta.get(user_id, {}).get(ordinal)
+        if row is not None:
+            return row
+        lo, hi = self._user_rows(user_id)
+        position = lo + int(self._base["day"][lo:hi].searchsorted(ordinal)) if hi > lo else hi
+        if position == hi or self._base["day"][position] != ordinal:
+            return None
+        return _bucket_row({name: self._base[name][position].item() for name in BUCKET_FIELDS})
+
+    def _archived_keys(self, first: int, last: int) -> set:
+        keys = {
+            (user_id, ordinal)
+            for user_id, days in self._delta.items()
+            for ordinal, row in days.items()
+            if first <= ordinal <= last and row[-1]
+        }
+        if self._base:
+            days = self._base["day"]
+            rows = ((days >= first) & (days <= last)).nonzero()[0]
+            keys.update(zip(self._base["user_id"][rows].tolist(), days[rows].tolist()))
+        return keys
+
+    def _remove_old_generations(self, current: int):
+        for name in os.listdir(self.path):
+            if name.startswith("gen-") and not name.endswith(".tmp"):
+                if int(name.split("-")[1]) <= current - KEEP_GENERATIONS:
+                    shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+
+def format_range_report(report: dict, daily_limit: int = None) -> str:
+    """Plain-text range report for a tool result."""
+    header = f"Nutrition report {report['start']} to {report['end']} ({report['days']} days, "
+    if not report["days_logged"]:
+        return header + "no meals logged)."
+    lines = [
+        header + f"{report['days_logged']} logged):",
+        f"Total: {report['total_calories']} cal | Protein: {report['total_protein']}g | "
+        f"Carbs: {report['total_carbs']}g | Sugar: {report['total_sugar']}g | Meals: {report['meal_count']}",
+        f"Calories per logged day: avg {report['avg_daily_calories']}, "
+        f"median {report['median_daily_calories']}, "
+        f"p10 {report['p10_daily_calories']}, p90 {report['p90_daily_calories']}",
+        f"Avg health rating: {report['avg_health_rating']}/10",
+    ]
+    if daily_limit and report["days_over_limit"] is not None:
+        lines.append(
+            f"Days over the current {daily_limit} cal limit: {report['days_over_limit']}/{report['days_logged']}"
+        )
+    if len(report["months"]) > 1:
+        lines.append("By month:")
+        lines.extend(
+            f"- {month['month']}: avg {month['avg_daily_calories']} cal/day over "
+            f"{month['days_logged']} logged days, health {month['avg_health_rating']}/10"
+            for month in report["months"]
+        )
+    return "\n".join(lines)
@@ -0,0 +1,338 @@
+import asyncio
+import copy
+import inspect
+import json
+from collections import defaultdict
+
+from swarm.types import (
+    Agent,
+    ChatCompletionMessageToolCall,
+    Function,
+    Response,
+    Result,
+)
+from swarm.util import debug_print, function_to_json, merge_chunk
+
+from ai_agents.parallel_tools import merge_responses, tool_call_phases
+
+__CTX_VARS_NAME__ = "context_variables"
+
+
+async def maybe_await(value):
+    """Resolve a data-layer return value that may or may not be awaitable."""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+def bridge_context(context_variables: dict, loop: asyncio.AbstractEventLoop) -> dict:
+    """Make async data-layer callables usable from a sync tool running in a worker thread.
+
+    Each coroutine function is replaced by a blocking shim that schedules the
+    coroutine on `loop` and waits for its result, so the I/O itself still runs
+    on the event loop.
+    """
+    bridged = dict(context_variables)
+    for key, value in context_variables.items():
+        if inspect.iscoroutinefunction(value):
+            bridged[key] = _blocking_shim(value, loop)
+    return bridged
+
+
+def _blocking_shim(fn, loop):
+    def call(*args, **kwargs):
+        return asyncio.run_coroutine_threadsafe(fn(*args, **kwargs), loop).result()
+
+    call.__name__ = getattr(fn, "__name__", "call")
+    return call
+
+
+class AsyncSwarm:
+    """Asyncio counterpart of `swarm.Swarm` for serving many chats per process.
+
+    Works with the existing agents unchanged. Tool functions may be plain
+    functions (run on a worker thread) or coroutine functions (awaited on the
+    loop); data-layer callables in context_variables may likewise be sync or
+    async. Async tools should resolve data-layer results with `maybe_await`.
+
+    Read-only tool calls (see `parallel_tools.read_only`) from one assistant
+    message run concurrently; mutating calls keep their order. Pass
+    `concurrent_reads=False` to run every call sequentially.
+    """
+
+    def __init__(self, client=None, concurrent_reads: bool = True):
+        if not client:
+            from ai_agents.clients import async_openai_client
+
+            client = async_openai_client()
+        self.client = client
+        self.concurrent_reads = concurrent_reads
+
+    async def get_chat_completion(
+        self,
+        agent: Agent,
+        history: list,
+        context_variables: dict,
+        model_override: str,
+        debug: bool,
+        stream: bool = False,
+    ):
+        context_variables = defaultdict(str, context_variables)
+        instructions = (
+            agent.instructions(context_variables)
+            if callable(agent.instructions)
+            else agent.instructions
+        )
+        messages = [{"role": "system", "content": instructions}] + history
+        debug_print(debug, "Getting chat completion for...:", messages)
+
+        tools = [function_to_json(f) for f in agent.functions]
+        # hide context_variables from model
+        for tool in tools:
+            params = tool["function"]["parameters"]
+            params["properties"].pop(__CTX_VARS_NAME__, None)
+            if __CTX_VARS_NAME__ in params["required"]:
+                params["required"].remove(__CTX_VARS_NAME__)
+
+        create_params = {
+            "model": model_override or agent.model,
+            "messages": messages,
+            "tools": tools or None,
+            "tool_choice": agent.tool_choice,
+            "stream": stream,
+        }
+        if tools:
+            create_params["parallel_tool_calls"] = agent.parallel_tool_calls
+        if stream:
+            create_params["stream_options"] = {"include_usage": True}
+
+        return await self.client.chat.completions.create(**create_params)
+
+    def handle_function_result(self, result, debug: bool) -> Result:
+        match result:
+            case Result() as result:
+                return result
+            case Agent() as agent:
+                return Result(value=json.dumps({"assistant": agent.name}), agent=agent)
+            case _:
+                try:
+                    return Result(value=str(result))
+                except Exception as e:
+                    error_message = (
+                        f"Failed to cast response to string: {result}. Make sure agent "
+                        f"functions return a string or Result object. Error: {str(e)}"
+                    )
+                    debug_print(debug, error_message)
+                    raise TypeError(error_message)
+
+    async def call_function(self, func, args: dict):
+        if inspect.iscoroutinefunction(func):
+            return await func(**args)
+
+        if __CTX_VARS_NAME__ in args:
+            args[__CTX_VARS_NAME__] = bridge_context(
+                args[__CTX_VARS_NAME__], asyncio.get_running_loop()
+            )
+        return await maybe_await(await asyncio.to_thread(func, **args))
+
+    async def handle_tool_calls(
+        self,
+        tool_calls: list,
+        functions: list,
+        context_variables: dict,
+        debug: bool,
+    ) -> Response:
+        function_map = {f.__name__: f for f in functions}
+        if self.concurrent_reads:
+            phases = tool_call_phases(tool_calls, function_map)
+        else:
+            phases = [[index] for index in range(len(tool_calls))]
+
+        responses = []
+        for phase in phases:
+            calls = [
+                self.handle_tool_call(tool_calls[index], function_map, context_variables, debug)
+                for index in phase
+            ]
+            if len(calls) == 1:
+                responses.append(await calls[0])
+            else:
+                responses.extend(await asyncio.gather(*calls))
+        return merge_responses(responses)
+
+    async def handle_tool_call(
+        self,
+        tool_call,
+        function_map: dict,
+        context_variables: dict,
+        debug: bool,
+    ) -> Response:
+        name = tool_call.function.name
+        partial_response = Response(messages=[], agent=None, context_variables={})
+        # handle missing tool case
+        if name not in function_map:
+            debug_print(debug, f"Tool {name} not found in function map.")
+            partial_response.messages.append(
+                {
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "tool_name": name,
+                    "content": f"Error: Tool {name} not found.",
+                }
+            )
+            return partial_response
+        args = json.loads(tool_call.function.arguments)
+        debug_print(debug, f"Processing tool call: {name} with arguments {args}")
+
+        func = function_map[name]
+        # pass context_variables to agent functions
+        if __CTX_VARS_NAME__ in func.__code__.co_varnames:
+            args[__CTX_VARS_NAME__] = context_variables
+        raw_result = await self.call_function(func, args)
+
+        result: Result = self.handle_function_result(raw_result, debug)
+        partial_response.messages.append(
+            {
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "tool_name": name,
+                "content": result.value,
+            }
+        )
+        partial_response.context_variables.update(result.context_variables)
+        if result.agent:
+            partial_response.agent = result.agent
+        return partial_response
+
+    async def run_and_stream(
+        self,
+        agent: Agent,
+        messages: list,
+        context_variables: dict = {},
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+    ):
+        """Async generator with the same chunk protocol as `Swarm.run(stream=True)`."""
+        active_agent = agent
+        context_variables = copy.deepcopy(context_variables)
+        history = copy.deepcopy(messages)
+        init_len = len(messages)
+
+        while len(history) - init_len < max_turns:
+            message = {
+                "content": "",
+                "sender": active_agent.name,
+                "role": "assistant",
+                "function_call": None,
+                "tool_calls": defaultdict(
+                    lambda: {"function": {"arguments": "", "name": ""}, "id": "", "type": ""}
+                ),
+            }
+
+            completion = await self.get_chat_completion(
+                agent=active_agent,
+                history=history,
+                context_variables=context_variables,
+                model_override=model_override,
+                debug=debug,
+                stream=True,
+            )
+
+            yield {"delim": "start"}
+            async for chunk in completion:
+                if not chunk.choices:
+                    continue
+                delta = json.loads(chunk.choices[0].delta.model_dump_json())
+                if delta["role"] == "assistant":
+                    delta["sender"] = active_agent.name
+                yield delta
+                delta.pop("role", None)
+                delta.pop("sender", None)
+                merge_chunk(message, delta)
+            yield {"delim": "end"}
+
+            message["tool_calls"] = list(message.get("tool_calls", {}).values())
+            if not message["tool_calls"]:
+                message["tool_calls"] = None
+            debug_print(debug, "Received completion:", message)
+            history.append(message)
+
+            if not message["tool_calls"] or not execute_tools:
+                debug_print(debug, "Ending turn.")
+                break
+
+            tool_calls = [
+                ChatCompletionMessageToolCall(
+                    id=tool_call["id"],
+                    function=Function(
+                        arguments=tool_call["function"]["arguments"],
+                        name=tool_call["function"]["name"],
+                    ),
+                    type=tool_call["type"],
+                )
+                for tool_call in message["tool_calls"]
+            ]
+
+            partial_response = await self.handle_tool_calls(
+                tool_calls, active_agent.functions, context_variables, debug
+            )
+            history.extend(partial_response.messages)
+            context_variables.update(partial_response.context_variables)
+            if partial_response.agent:
+                active_agent = partial_response.agent
+
+        yield {
+            "response": Response(
+                messages=history[init_len:],
+                agent=active_agent,
+                context_variables=context_variables,
+            )
+        }
+
+    async def run(
+        self,
+        agent: Agent,
+        messages: list,
+        context_variables: dict = {},
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+    ) -> Response:
+        active_agent = agent
+        context_variables = copy.deepcopy(context_variables)
+        history = copy.deepcopy(messages)
+        init_len = len(messages)
+
+        while len(history) - init_len < max_turns and active_agent:
+            completion = await self.get_chat_completion(
+                agent=active_agent,
+                history=history,
+                context_variables=context_variables,
+                model_override=model_override,
+                debug=debug,
+            )
+            message = completion.choices[0].message
+            debug_print(debug, "Received completion:", message)
+            message.sender = active_agent.name
+            history.append(json.loads(message.model_dump_json()))
+
+            if not message.tool_calls or not execute_tools:
+                debug_print(debug, "Ending turn.")
+                break
+
+            partial_response = await self.handle_tool_calls(
+                message.tool_calls, active_agent.functions, context_variables, debug
+            )
+            history.extend(partial_response.messages)
+            context_variables.update(partial_response.context_variables)
+            if partial_response.agent:
+                active_agent = partial_response.agent
+
+        return Response(
+            messages=history[init_len:],
+            agent=active_agent,
+            context_variables=context_variables,
+        )
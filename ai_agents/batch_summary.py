@@ -0,0 +1,273 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from ai_agents.summary_agent import format_daily_data, summary_agent
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_REQUEST = "Generate my end-of-day summary."
+PREFETCHED_NOTE = """
+
+The output of get_daily_data has already been retrieved and is included in the user's
+message; do not call any tools."""
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+CUSTOM_ID_PREFIX = "user-"
+
+
+def prefetch_daily_data(data_layer, users: list, day: date = None) -> dict:
+    """Fetch everything get_daily_data needs for `users` (dicts with at least "id").
+
+    Uses `data_layer.bulk_daily_data()` when available (e.g. SQLiteDataLayer);
+    otherwise falls back to the per-user callables of a context_variables dict.
+    Returns {user_id: {"user", "meals", "daily", "limit_data", "weekly", "monthly", "trend"}}.
+    """
+    user_ids = [user["id"] for user in users]
+    if hasattr(data_layer, "bulk_daily_data"):
+        return data_layer.bulk_daily_data(user_ids, day)
+
+    get_weight_trend = data_layer.get("get_weight_trend")
+    data = {}
+    for user in users:
+        user_id = user["id"]
+        data[user_id] = {
+            "user": user,
+            "meals": data_layer["get_user_meals_today"](user_id),
+            "daily": data_layer["get_user_today_macros"](user_id),
+            "limit_data": data_layer["compute_daily_calorie_limit"](user_id),
+            "weekly": data_layer["get_weekly_consumption"](user_id),
+            "monthly": data_layer["get_monthly_consumption"](user_id),
+            "trend": get_weight_trend(user_id) if get_weight_trend is not None else None,
+        }
+    return data
+
+
+def summary_messages(user_data: dict, day: date = None) -> list:
+    """Chat messages for one user's summary, with get_daily_data inlined."""
+    daily_data = format_daily_data(
+        user_data["meals"], user_data["daily"], user_data["limit_data"],
+        user_data["weekly"], user_data["monthly"], today=day, trend=user_data.get("trend"),
+    )
+    first_name = user_data["user"].get("first_name")
+    profile = f"User's first name: {first_name}\n\n" if first_name else ""
+    return [
+        {"role": "system", "content": summary_agent.instructions + PREFETCHED_NOTE},
+        {
+            "role": "user",
+            "content": f"{profile}{SUMMARY_REQUEST}\n\nget_daily_data result:\n{daily_data}",
+        },
+    ]
+
+
+def batch_request_line(user_id, messages: list, model: str, max_tokens: int) -> str:
+    return json.dumps({
+        "custom_id": f"{CUSTOM_ID_PREFIX}{user_id}",
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {"model": model, "messages": messages, "max_tokens": max_tokens},
+    })
+
+
+def parse_batch_results(lines) -> tuple:
+    """Read a Batch API output file; returns ({user_id: summary}, {user_id: error})."""
+    summaries = {}
+    errors = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        user_id = record["custom_id"][len(CUSTOM_ID_PREFIX):]
+        user_id = int(user_id) if user_id.isdigit() else user_id
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            errors[user_id] = record.get("error") or response.get("body")
+            continue
+        summaries[user_id] = response["body"]["choices"][0]["message"]["content"]
+    return summaries, errors
+
+
+def _chunks(items: list, size: int):
+    for offset in range(0, len(items), size):
+        yield items[offset:offset + size]
+
+
+class BatchSummaryEngine:
+    """Generates end-of-day summaries for many users at once.
+
+    Data is prefetched in chunks of `chunk_size` users (grouped queries when
+    the data layer supports `bulk_daily_data`), and the get_daily_data output
+    is inlined into a single tool-free completion per user, so each summary
+    costs one request instead of two. Completions run with at most
+    `max_concurrency` in flight. `write_batch_file()` / `submit_batch()` /
+    `ingest_batch()` do the same work through the OpenAI Batch API instead.
+    """
+
+    def __init__(
+        self,
+        data_layer,
+        client=None,
+        model: str = summary_agent.model,
+        max_concurrency: int = 16,
+        chunk_size: int = 500,
+        max_tokens: int = 600,
+    ):
+        if client is None:
+            from ai_agents.clients import async_openai_client
+
+            client = async_openai_client()
+        self.data_layer = data_layer
+        self.client = client
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.chunk_size = chunk_size
+        self.max_tokens = max_tokens
+        self.failures = {}
+        self.last_report = {}
+
+    async def run(self, users: list, day: date = None, on_summary=None) -> dict:
+        """Summarize `users` and return {user_id: summary text}.
+
+        `on_summary(user, text)` (sync or async) is called as each summary
+        completes, e.g. to send it to the user. Failed users are logged and
+        collected in `self.failures` instead of aborting the run.
+        """
+        started = time.monotonic()
+        self.failures = {}
+        summaries = {}
+        pending = asyncio.Queue(maxsize=self.max_concurrency * 2)
+
+        async def produce():
+            try:
+                for chunk in _chunks(users, self.chunk_size):
+                    data = await asyncio.to_thread(prefetch_daily_data, self.data_layer, chunk, day)
+                    for user in chunk:
+                        if user["id"] in data:
+                            await pending.put((user, data[user["id"]]))
+            finally:
+                # Release the consumers even if prefetching fails; run() re-raises once they finish.
+                for _ in range(self.max_concurrency):
+                    await pending.put(None)
+
+        async def consume():
+            while (item := await pending.get()) is not None:
+                user, user_data = item
+                try:
+                    text = await self._complete(summary_messages(user_data, day))
+                    summaries[user["id"]] = text
+                    if on_summary is not None:
+                        result = on_summary(user, text)
+                        if asyncio.iscoroutine(result):
+                            await result
+                except Exception as e:
+                    logger.error(f"Summary failed for user {user['id']}: {e}")
+                    self.failures[user["id"]] = e
+
+        results = await asyncio.gather(
+            produce(), *(consume() for _ in range(self.max_concurrency)), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        elapsed = time.monotonic() - started
+        self.last_report = {
+            "users": len(users),
+            "summaries": len(summaries),
+            "failures": len(self.failures),
+            "elapsed_s": round(elapsed, 3),
+            "users_per_s": round(len(summaries) / elapsed, 1) if elapsed else 0,
+        }
+        logger.info(f"Batch summary run: {self.last_report}")
+        return summaries
+
+    async def _complete(self, messages: list) -> str:
+        completion = await self.client.chat.completions.create(
+            model=self.model, messages=messages, max_tokens=self.max_tokens
+        )
+        return completion.choices[0].message.content
+
+    def write_batch_file(self, path: str, users: list, day: date = None) -> int:
+        """Write a Batch API input JSONL file for `users`; returns the number of requests."""
+        count = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for chunk in _chunks(users, self.chunk_size):
+                data = prefetch_daily_data(self.data_layer, chunk, day)
+                for user in chunk:
+                    if user["id"] not in data:
+                        continue
+                    messages = summary_messages(data[user["id"]], day)
+                    f.write(batch_request_line(user["id"], messages, self.model, self.max_tokens) + "\n")
+                    count += 1
+        return count
+
+    async def submit_batch(self, path: str, metadata: dict = None):
+        """Upload a file from `write_batch_file()` and start a 24h batch job."""
+        with open(path, "rb") as f:
+            batch_file = await self.client.files.create(file=f, purpose="batch")
+        return await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+            metadata=metadata,
+        )
+
+    async def ingest_batch(self, batch_id: str):
+        """Fetch a batch job; returns (summaries, errors), or None while it is still running."""
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status != "completed":
+            logger.info(f"Batch {batch_id} is {batch.status}")
+            return None
+        content = await self.client.files.content(batch.output_file_id)
+        summaries, errors = parse_batch_results(content.text.splitlines())
+        if batch.error_file_id:
+            error_content = await self.client.files.content(batch.error_file_id)
+            errors.update(parse_batch_results(error_content.text.splitlines())[1])
+        return summaries, errors
+
+
+class SummaryScheduler:
+    """Decides which users are due for their summary, by each user's local time.
+
+    A user becomes due once their local clock passes `report_hour` and stays
+    due until marked sent for that local date, so a missed tick is picked
+    up by the next one.
+    """
+
+    def __init__(self, report_hour: int = 21, default_timezone: str = "UTC"):
+        self.report_hour = report_hour
+        self.default_timezone = default_timezone
+        self._sent = set()
+        self._zones = {}
+
+    def local_now(self, user: dict, now: datetime = None) -> datetime:
+        now = now or datetime.now(timezone.utc)
+        return now.astimezone(self._zone(user.get("timezone") or self.default_timezone))
+
+    def due(self, users: list, now: datetime = None) -> dict:
+        """Group due users by their local date: {date: [user, ...]}."""
+        groups = {}
+        for user in users:
+            local = self.local_now(user, now)
+            if local.hour < self.report_hour or (user["id"], local.date()) in self._sent:
+                continue
+            groups.setdefault(local.date(), []).append(user)
+        return groups
+
+    def mark_sent(self, user_id, day: date):
+        self._sent.add((user_id, day))
+
+    def prune(self, before: date):
+        self._sent = {key for key in self._sent if key[1] >= before}
+
+    def _zone(self, name: str):
+        if name not in self._zones:
+            try:
+                self._zones[name] = ZoneInfo(name)
+            except (ZoneInfoNotFoundError, ValueError):
+                logger.warning(f"Unknown timezone {name!r}; using {self.default_timezone}")
+                self._zones[name] = ZoneInfo(self.default_timezone)
+        return self._zones[name]
@@ -1,7 +1,16 @@
 import json
+from datetime import date, timedelta
+
 from swarm import Agent
+from swarm.types import Result
+
+from ai_agents.archive import format_range_report
+from ai_agents.models import Meal, parse_food_items
+from ai_agents.parallel_tools import read_only
+from ai_agents.weight_trends import format_weight_trend
 
 
+@read_only
 def get_calorie_status(context_variables: dict) -> str:
     """Get the user's calorie and macro intake so far today."""
     phone = context_variables.get("phone_number")
@@ -29,9 +38,16 @@ def get_calorie_status(context_variables: dict) -> str:
             f"{limit_data['target_weight']}kg, {limit_data['days_remaining']} days left)"
         )
 
+    get_weight_trend = context_variables.get("get_weight_trend")
+    if get_weight_trend is not None:
+        trend = format_weight_trend(get_weight_trend(user["id"]))
+        if trend:
+            result += f"\n{trend}"
+
     return result
 
 
+@read_only
 def transfer_to_food_analysis(context_variables: dict):
     """Transfer to the Food Analysis agent to analyze a food photo."""
     return context_variables["food_analysis_agent"]
@@ -62,23 +78,12 @@ def update_last_meal(context_variables: dict, fraction: float) -> str:
         return "No meals logged today to update."
 
     old_calories = meal["total_calories"]
-    new_calories = round(old_calories * fraction)
-    new_protein = round(meal.get("protein_g", 0) * fraction, 1)
-    new_carbs = round(meal.get("carbs_g", 0) * fraction, 1)
-    new_sugar = round(meal.get("sugar_g", 0) * fraction, 1)
-
-    food_items = json.loads(meal["food_items"])
-    for item in food_items:
-        item["calories"] = round(item["calories"] * fraction)
-        for key in ["protein_g", "carbs_g", "sugar_g"]:
-            if key in item:
-                item[key] = round(item[key] * fraction, 1)
-        if "quantity" in item:
-            item["quantity"] = f"~{fraction}x of {item['quantity']}"
+    scaled = Meal.from_row(meal).scaled(fraction)
+    new_calories = scaled.total_calories
 
     context_variables["update_meal"](
-        meal["id"], json.dumps(food_items), new_calories,
-        protein_g=new_protein, carbs_g=new_carbs, sugar_g=new_sugar,
+        meal["id"], scaled.food_items_json, new_calories,
+        protein_g=scaled.protein_g, carbs_g=scaled.carbs_g, sugar_g=scaled.sugar_g,
         health_rating=meal.get("health_rating", 0),
     )
 
@@ -104,6 +109,141 @@ def delete_last_meal(context_variables: dict) -> str:
     return f"Deleted last meal ({calories} calories)."
 
 
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _number(operation: dict, field: str, default):
+    """`operation[field]` if given (0 included), else `default`."""
+    value = operation.get(field)
+    if value is None:
+        return default
+    if not _is_number(value) or value < 0:
+        raise ValueError(f"{field} must be a number of at least 0")
+    return value
+
+
+def _resolve_meal(operation: dict, meals: list) -> dict:
+    if "meal_id" in operation:
+        if isinstance(operation["meal_id"], bool):
+            raise ValueError(f"meal_id {operation['meal_id']!r} is not one of today's meals")
+        for meal in meals:
+            if meal["id"] == operation["meal_id"]:
+                return meal
+        raise ValueError(f"meal_id {operation['meal_id']} is not one of today's meals")
+    number = operation.get("meal")
+    if not meals:
+        raise ValueError("no meals are logged today")
+    if not isinstance(number, int) or isinstance(number, bool) or not (1 <= abs(number) <= len(meals)):
+        raise ValueError(f"meal {number!r} is not a meal number from get_meals_today (1-{len(meals)})")
+    return meals[number - 1 if number > 0 else number]
+
+
+def edit_meals(context_variables: dict, operations_json: str) -> str:
+    """Log, scale and delete several of today's meals in one step. If any operation is invalid, nothing is applied.
+
+    Args:
+        operations_json: JSON array of operations, e.g.
+            '[{"op":"log","food_items":[{"name":"oatmeal","quantity":"1 bowl","calories":300,
+               "protein_g":10,"carbs_g":54,"sugar_g":6}],"health_rating":8},
+              {"op":"scale","meal":3,"fraction":0.5},
+              {"op":"delete","meal":4}]'
+            "meal" is the number from get_meals_today (-1 for the last meal); "meal_id"
+            may be given instead. A log may also set notes and total_calories,
+            total_protein, total_carbs, total_sugar (default: sums of its items).
+    """
+    try:
+        operations = json.loads(operations_json)
+        if not isinstance(operations, list) or not operations:
+            raise ValueError("operations_json must be a non-empty JSON array")
+    except ValueError as e:
+        return f"Nothing was changed: {e}"
+
+    phone = context_variables.get("phone_number")
+    user = context_variables["get_or_create_user"](phone)
+    meals = context_variables["get_user_meals_today"](user["id"])
+    numbers = {meal["id"]: i for i, meal in enumerate(meals, 1)}
+
+    apply_meal_batch = context_variables.get("apply_meal_batch")
+    logs, updates, deletes, lines, touched = [], [], [], [], set()
+    try:
+        for operation in operations:
+            op = operation.get("op") if isinstance(operation, dict) else None
+            if op == "log":
+                items = parse_food_items(operation.get("food_items"))
+                if not items:
+                    raise ValueError("a log operation needs food_items")
+                meal = Meal(
+                    items=items,
+                    total_calories=_number(operation, "total_calories", sum(i.calories for i in items)),
+                    protein_g=_number(operation, "total_protein", round(sum(i.protein_g for i in items), 1)),
+                    carbs_g=_number(operation, "total_carbs", round(sum(i.carbs_g for i in items), 1)),
+                    sugar_g=_number(operation, "total_sugar", round(sum(i.sugar_g for i in items), 1)),
+                    health_rating=_number(operation, "health_rating", 0),
+                    notes=operation.get("notes") or "",
+                )
+                logs.append({
+                    "food_items": meal.food_items_json, "total_calories": meal.total_calories,
+                    "protein_g": meal.protein_g, "carbs_g": meal.carbs_g, "sugar_g": meal.sugar_g,
+                    "health_rating": meal.health_rating, "notes": meal.notes,
+                })
+                lines.append(f"Logged {meal.render()}")
+            elif op in ("scale", "delete"):
+                row = _resolve_meal(operation, meals)
+                if row["id"] in touched:
+                    raise ValueError(f"meal {numbers[row['id']]} appears in more than one operation")
+                touched.add(row["id"])
+                if op == "delete":
+                    deletes.append(row["id"])
+                    lines.append(f"Deleted meal {numbers[row['id']]} ({row['total_calories']} cal)")
+                    continue
+                fraction = operation.get("fraction")
+                if not _is_number(fraction) or fraction <= 0:
+                    raise ValueError("a scale operation needs a fraction above 0")
+                scaled = Meal.from_row(row).scaled(fraction)
+                updates.append({
+                    "meal_id": row["id"], "food_items": scaled.food_items_json,
+                    "total_calories": scaled.total_calories, "protein_g": scaled.protein_g,
+                    "carbs_g": scaled.carbs_g, "sugar_g": scaled.sugar_g,
+                    "health_rating": row.get("health_rating", 0),
+                })
+                lines.append(
+                    f"Scaled meal {numbers[row['id']]} x{fraction}: "
+                    f"{row['total_calories']} -> {scaled.total_calories} cal"
+                )
+            else:
+                raise ValueError(f"unknown op {op!r}; use log, scale or delete")
+        if apply_meal_batch is not None:
+            apply_meal_batch(user["id"], logs, updates, deletes)
+        elif len(lines) > 1:
+            # Without apply_meal_batch a failure midway would leave the batch half-applied.
+            raise ValueError("this data layer can only apply one change at a time; send them separately")
+    except (ValueError, LookupError) as e:
+        return f"Nothing was changed: {e}"
+    if apply_meal_batch is None:
+        for update in updates:
+            context_variables["update_meal"](
+                update["meal_id"], update["food_items"], update["total_calories"],
+                protein_g=update["protein_g"], carbs_g=update["carbs_g"], sugar_g=update["sugar_g"],
+                health_rating=update["health_rating"],
+            )
+        for meal_id in deletes:
+            context_variables["delete_meal"](meal_id)
+        for log in logs:
+            context_variables["log_meal"](user_id=user["id"], image_id=None, **log)
+
+    daily = context_variables["get_user_today_macros"](user["id"])
+    goal = context_variables["compute_daily_calorie_limit"](user["id"])["daily_limit"]
+    return (
+        f"Applied {len(lines)} change{'s' if len(lines) != 1 else ''}:\n"
+        + "\n".join(f"- {line}" for line in lines)
+        + f"\nDaily totals now: {daily['total_calories']}/{goal} cal "
+        f"(Remaining: {goal - daily['total_calories']}) | "
+        f"P:{daily['total_protein']}g C:{daily['total_carbs']}g S:{daily['total_sugar']}g"
+    )
+
+
+@read_only
 def get_meals_today(context_variables: dict) -> str:
     """Get a detailed list of all meals logged today, with individual items and macros."""
     phone = context_variables.get("phone_number")
@@ -118,16 +258,13 @@ def get_meals_today(context_variables: dict) -> str:
     goal = limit_data["daily_limit"]
     remaining = goal - daily["total_calories"]
 
-    meal_lines = []
-    for i, m in enumerate(meals, 1):
-        meal_lines.append(
-            f"{i}. {m['food_items']} - {m['total_calories']} cal "
-            f"(P:{m.get('protein_g', 0)}g C:{m.get('carbs_g', 0)}g S:{m.get('sugar_g', 0)}g) "
-            f"[Health: {m.get('health_rating', 0)}/10]"
-        )
+    meal_lines = [
+        f"{i}. {m.time} {m.render()}" if m.time else f"{i}. {m.render()}"
+        for i, m in enumerate(map(Meal.from_row, meals), 1)
+    ]
 
     return (
-        f"Today's meals ({len(meals)}):\n"
+        f"Today's meals ({len(meals)}) [cal, P/C/S grams, H=health]:\n"
         + "\n".join(meal_lines)
         + f"\n\nDaily total: {daily['total_calories']}/{goal} cal (Remaining: {remaining})\n"
         f"Protein: {daily['total_protein']}g | Carbs: {daily['total_carbs']}g | Sugar: {daily['total_sugar']}g"
@@ -279,9 +416,14 @@ def update_profile(
         parts.append(f"Dietary preferences: {dietary_preferences}")
     if timezone is not None:
         parts.append(f"Timezone: {timezone}")
-    return "Profile updated! " + " | ".join(parts)
+    message = "Profile updated! " + " | ".join(parts)
+    if not isinstance(updated, dict):
+        return message
+    profile = {**(context_variables.get("user_profile") or {}), **updated}
+    return Result(value=message, context_variables={"user_profile": profile})
 
 
+@read_only
 def get_monthly_report(context_variables: dict, month: int = None, year: int = None) -> str:
     """Get a monthly nutrition report.
 
@@ -311,6 +453,34 @@ def get_monthly_report(context_variables: dict, month: int = None, year: int = N
     )
 
 
+@read_only
+def get_range_report(context_variables: dict, start_date: str, end_date: str = None) -> str:
+    """Get a nutrition report over a date range, e.g. a quarter or a year.
+
+    Args:
+        start_date: First day of the range (YYYY-MM-DD).
+        end_date: Last day of the range (YYYY-MM-DD). Defaults to yesterday.
+    """
+    archive = context_variables.get("nutrition_archive")
+    if archive is None:
+        return "Long-range reports are not available right now. Monthly reports still work."
+    try:
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        return "Dates must be in YYYY-MM-DD format."
+
+    yesterday = archive.today() - timedelta(days=1)
+    end = min(end or yesterday, yesterday)
+    if start > end:
+        return f"No complete days in that range yet; reports cover days up to {yesterday.isoformat()}."
+
+    phone = context_variables.get("phone_number")
+    user = context_variables["get_or_create_user"](phone)
+    daily_limit = context_variables["compute_daily_calorie_limit"](user["id"])["daily_limit"]
+    return format_range_report(archive.report(user["id"], start, end, daily_limit), daily_limit)
+
+
 chat_agent = Agent(
     name="Chat Agent",
     model="gpt-4o",
@@ -346,13 +516,21 @@ Your responsibilities:
     call set_weight_goal_fn. Ask for target weight, target date, and optionally
     current weight and TDEE if not already known.
 13. If the user asks for a monthly report or monthly summary, call get_monthly_report.
-14. If the user asks about their weight goal or calorie limit, call get_calorie_status
-    which includes weight goal information.
-15. Use the user's first name from `context_variables['user_profile']` when greeting or in daily summaries.
+    For longer or custom periods (a quarter, a year, "since March"), call get_range_report
+    with exact dates worked out from the user's current local date.
+14. If the user asks about their weight goal, weight trend or calorie limit, call
+    get_calorie_status which includes weight goal and trend information. Answer "am I on
+    track" and "when will I reach my goal" from its trend lines instead of estimating.
+15. Use the user's first name, if you know it, when greeting or in daily summaries.
 16. If the user mentions dietary preferences or restrictions (e.g., 'I'm vegetarian',
     'I'm allergic to nuts', 'I don't eat pork'), call update_profile to save them.
-17. Consider the user's dietary_preferences from `context_variables['user_profile']`
+17. Consider the user's dietary preferences, if known,
     when analyzing text meals — flag if a described meal conflicts with their stated preferences.
+18. If one message asks for more than one meal change (e.g. "I had oatmeal for breakfast
+    and a sandwich for lunch, I only ate half my dinner, delete the snack"), make a single
+    edit_meals call with all of them instead of separate save_text_meal, update_last_meal
+    or delete_last_meal calls. Call get_meals_today first only if you need meal numbers.
+    Estimate logged meals as in rule 10 and reply with one consolidated summary.
 
 You do NOT analyze food photos yourself. Always hand off to Food Analysis for that.""",
     functions=[
@@ -362,10 +540,12 @@ You do NOT analyze food photos yourself. Always hand off to Food Analysis for th
         set_daily_goal,
         update_last_meal,
         delete_last_meal,
+        edit_meals,
         save_text_meal,
         record_weight,
         set_weight_goal_fn,
         get_monthly_report,
+        get_range_report,
         update_profile,
     ],
 )
@@ -0,0 +1,58 @@
+import os
+import threading
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0)
+TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _shared(key: str, build):
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = build()
+    return client
+
+
+def openai_client() -> OpenAI:
+    """The process-wide OpenAI client, built on first use.
+
+    Every agent and Swarm in the process shares its keep-alive connection
+    pool. Use `openai_client().with_options(...)` for per-caller settings
+    such as `max_retries`; the derived client keeps the same pool.
+    """
+    return _shared(
+        "sync",
+        lambda: OpenAI(http_client=DefaultHttpxClient(limits=POOL_LIMITS, timeout=TIMEOUT)),
+    )
+
+
+def async_openai_client() -> AsyncOpenAI:
+    """The process-wide AsyncOpenAI client; its pool belongs to the event loop that first uses it."""
+    return _shared(
+        "async",
+        lambda: AsyncOpenAI(http_client=DefaultAsyncHttpxClient(limits=POOL_LIMITS, timeout=TIMEOUT)),
+    )
+
+
+def reset_clients():
+    """Forget the shared clients so the next call builds fresh ones (e.g. for a new event loop)."""
+    with _lock:
+        _clients.clear()
+
+
+def _after_fork():
+    global _lock
+    _lock = threading.Lock()
+    _clients.clear()
+
+
+# Pooled sockets must not be shared with a forked worker; each child builds its own pool.
+os.register_at_fork(after_in_child=_after_fork)
@@ -3,9 +3,44 @@ import logging
 from swarm import Agent
 from swarm.types import Result
 
+from ai_agents.parallel_tools import read_only
+
 logger = logging.getLogger(__name__)
 
 
+def log_analyzed_meal(
+    context_variables: dict,
+    food_items_json: str,
+    total_calories: int,
+    total_protein: float,
+    total_carbs: float,
+    total_sugar: float,
+    health_rating: int,
+    notes: str,
+) -> tuple:
+    """Persist an analyzed photo meal and return (daily_totals, limit_data) after the write."""
+    phone = context_variables.get("phone_number")
+    media_id = context_variables.get("media_id")
+    user = context_variables["get_or_create_user"](phone)
+
+    context_variables["log_meal"](
+        user_id=user["id"],
+        food_items=food_items_json,
+        total_calories=total_calories,
+        image_id=media_id,
+        notes=notes,
+        protein_g=total_protein,
+        carbs_g=total_carbs,
+        sugar_g=total_sugar,
+        health_rating=health_rating,
+    )
+
+    # Get running daily totals to include in the response
+    daily = context_variables["get_user_today_macros"](user["id"])
+    limit_data = context_variables["compute_daily_calorie_limit"](user["id"])
+    return daily, limit_data
+
+
 def save_meal(
     context_variables: dict,
     food_items_json: str,
@@ -30,25 +65,10 @@ def save_meal(
         notes: Optional notes about the meal
     """
     try:
-        phone = context_variables.get("phone_number")
-        media_id = context_variables.get("media_id")
-        user = context_variables["get_or_create_user"](phone)
-
-        context_variables["log_meal"](
-            user_id=user["id"],
-            food_items=food_items_json,
-            total_calories=total_calories,
-            image_id=media_id,
-            notes=notes,
-            protein_g=total_protein,
-            carbs_g=total_carbs,
-            sugar_g=total_sugar,
-            health_rating=health_rating,
+        daily, limit_data = log_analyzed_meal(
+            context_variables, food_items_json, total_calories,
+            total_protein, total_carbs, total_sugar, health_rating, notes,
         )
-
-        # Get running daily totals to include in the response
-        daily = context_variables["get_user_today_macros"](user["id"])
-        limit_data = context_variables["compute_daily_calorie_limit"](user["id"])
         goal = limit_data["daily_limit"]
         remaining = goal - daily["total_calories"]
 
@@ -75,6 +95,7 @@ def save_meal(
         )
 
 
+@read_only
 def transfer_back_to_chat(context_variables: dict):
     """Transfer back to the Chat Agent after food analysis is complete."""
     return context_variables["chat_agent"]
@@ -119,7 +140,7 @@ Your process:
    - Daily running total from save_meal result: "Daily: XXX/XXX cal (XXX remaining)  P:Xg | C:Xg | S:Xg"
 8. After save_meal completes, control automatically returns to the Chat Agent.
 
-9. Check `context_variables['user_profile']['dietary_preferences']`. If the meal
+9. Check the user's dietary preferences, if known. If the meal
    conflicts with stated preferences (e.g., meat for a vegetarian, nuts for someone
    with nut allergy), mention this prominently in your response as a warning.
 
@@ -0,0 +1,249 @@
+import json
+import logging
+
+from ai_agents.async_swarm import maybe_await
+from ai_agents.models import Meal
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a character-based estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+MEMORY_PREFIX = "Conversation memory (older turns, summarized):"
+TODAY_PREFIX = "Today's logged meals:"
+
+IMAGE_TOKENS = 765
+MESSAGE_OVERHEAD_TOKENS = 4
+MIN_TRUNCATED_CHARS = 200
+
+SUMMARY_INSTRUCTIONS = """Summarize this earlier part of a calorie-tracking chat for the assistant's memory.
+Keep durable facts only: the user's goals, weight updates, dietary preferences, recurring
+foods, open questions and commitments. Drop greetings and per-meal numbers (today's meals
+are provided separately). Use at most 8 short bullet points."""
+
+_encoding = None
+
+
+def _count_text(text: str) -> int:
+    global _encoding
+    if tiktoken is None:
+        return len(text) // 4 + 1
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("o200k_base")
+    return len(_encoding.encode(text))
+
+
+def estimate_tokens(messages: list) -> int:
+    """Approximate prompt tokens for a list of chat messages."""
+    total = 0
+    for message in messages:
+        total += MESSAGE_OVERHEAD_TOKENS
+        content = message.get("content")
+        if isinstance(content, str):
+            total += _count_text(content)
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "image_url":
+                    total += IMAGE_TOKENS
+                else:
+                    total += _count_text(part.get("text", ""))
+        if message.get("tool_calls"):
+            total += _count_text(json.dumps(message["tool_calls"]))
+    return total
+
+
+def _recent_start(messages: list, keep_recent_turns: int) -> int:
+    """Index of the user message that starts the last `keep_recent_turns` turns."""
+    if keep_recent_turns <= 0:
+        return len(messages)
+    user_indexes = [i for i, m in enumerate(messages) if m.get("role") == "user"]
+    if len(user_indexes) <= keep_recent_turns:
+        return 0
+    return user_indexes[-keep_recent_turns]
+
+
+def _is_context_block(message: dict) -> bool:
+    content = message.get("content")
+    return (
+        message.get("role") == "system"
+        and isinstance(content, str)
+        and content.startswith((MEMORY_PREFIX, TODAY_PREFIX))
+    )
+
+
+def collapse_message(message: dict) -> dict:
+    """Shrink a stale message: tool results keep their first line, photos become a marker."""
+    role = message.get("role")
+    content = message.get("content")
+    if role == "tool" and isinstance(content, str) and "\n" in content:
+        return {**message, "content": content.split("\n", 1)[0] + " [...]"}
+    if isinstance(content, list):
+        text = " ".join(p.get("text", "") for p in content if p.get("type") == "text")
+        if any(p.get("type") == "image_url" for p in content):
+            text = f"[photo] {text}".strip()
+        return {**message, "content": text}
+    return message
+
+
+def _transcript(messages: list) -> str:
+    lines = []
+    for message in messages:
+        content = message.get("content")
+        if not content:
+            continue
+        if message.get("role") == "tool":
+            lines.append(f"tool {message.get('tool_name', '')}: {content}")
+        else:
+            lines.append(f"{message.get('role')}: {content}")
+    return "\n".join(lines)
+
+
+def render_today_block(meals: list) -> dict:
+    lines = [f"- {Meal.from_row(m).render()}" for m in meals] or ["- none yet"]
+    return {"role": "system", "content": TODAY_PREFIX + "\n" + "\n".join(lines)}
+
+
+def _with_today_block(messages: list, today: dict) -> list:
+    """Insert today's meals after the memory block, replacing any stale copy."""
+    messages = [
+        m for m in messages
+        if not (_is_context_block(m) and m["content"].startswith(TODAY_PREFIX))
+    ]
+    position = 1 if messages and _is_context_block(messages[0]) else 0
+    return messages[:position] + [today] + messages[position:]
+
+
+class HistoryCompactor:
+    """Keeps the message list sent to each agent run under a token budget.
+
+    Compaction runs in stages and stops as soon as the history fits:
+    1. tool results and photos older than the last `keep_recent_turns` user
+       turns are collapsed to one-line stubs;
+    2. those older turns are summarized by `summary_model` into a single
+       memory block that is carried forward and re-summarized next time;
+    3. if the recent turns alone are still over budget, they are collapsed
+       too, whole older turns are dropped, and finally the longest texts are
+       truncated.
+    Whenever compaction happens and context_variables are given, a fresh block
+    with today's meals is added from the data layer, so the current day's
+    meal context survives every stage.
+    """
+
+    def __init__(
+        self,
+        client,
+        token_budget: int = 6000,
+        keep_recent_turns: int = 4,
+        summary_model: str = "gpt-4o-mini",
+    ):
+        self.client = client
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.summary_model = summary_model
+        self.last_report = {}
+
+    def compact(self, messages: list, context_variables: dict = None) -> list:
+        compacted, older, recent = self._collapse(messages)
+        if self.last_report["stage"] == "none":
+            return compacted
+
+        if compacted is None:
+            summary = self.client.chat.completions.create(
+                model=self.summary_model, messages=self._summary_request(older)
+            )
+            compacted = [self._memory_block(summary)] + recent
+        if context_variables:
+            phone = context_variables.get("phone_number")
+            user = context_variables["get_or_create_user"](phone)
+            meals = context_variables["get_user_meals_today"](user["id"])
+            compacted = _with_today_block(compacted, render_today_block(meals))
+        return self._finish(compacted)
+
+    async def acompact(self, messages: list, context_variables: dict = None) -> list:
+        """Async variant for an AsyncOpenAI client and sync or async data-layer callables."""
+        compacted, older, recent = self._collapse(messages)
+        if self.last_report["stage"] == "none":
+            return compacted
+
+        if compacted is None:
+            summary = await self.client.chat.completions.create(
+                model=self.summary_model, messages=self._summary_request(older)
+            )
+            compacted = [self._memory_block(summary)] + recent
+        if context_variables:
+            phone = context_variables.get("phone_number")
+            user = await maybe_await(context_variables["get_or_create_user"](phone))
+            meals = await maybe_await(context_variables["get_user_meals_today"](user["id"]))
+            compacted = _with_today_block(compacted, render_today_block(meals))
+        return self._finish(compacted)
+
+    def _collapse(self, messages: list) -> tuple:
+        """Collapse stale messages; returns (compacted, None, None) if that fits the
+        budget, else (None, older, recent) for summarization."""
+        before = estimate_tokens(messages)
+        self.last_report = {"tokens_before": before, "tokens_after": before, "stage": "none"}
+        if before <= self.token_budget:
+            return messages, None, None
+
+        start = _recent_start(messages, self.keep_recent_turns)
+        memory = [
+            m for m in messages[:start]
+            if _is_context_block(m) and m["content"].startswith(MEMORY_PREFIX)
+        ]
+        older = memory + [collapse_message(m) for m in messages[:start] if not _is_context_block(m)]
+        recent = messages[start:]
+
+        collapsed = older + recent
+        if estimate_tokens(collapsed) <= self.token_budget or len(older) <= len(memory):
+            self.last_report["stage"] = "collapsed"
+            return collapsed, None, None
+        self.last_report["stage"] = "summarized"
+        return None, older, recent
+
+    def _summary_request(self, older: list) -> list:
+        return [
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": _transcript(older)},
+        ]
+
+    def _memory_block(self, summary) -> dict:
+        return {
+            "role": "system",
+            "content": f"{MEMORY_PREFIX}\n{summary.choices[0].message.content.strip()}",
+        }
+
+    def _fit(self, messages: list) -> list:
+        if estimate_tokens(messages) <= self.token_budget:
+            return messages
+        self.last_report["stage"] = "truncated"
+        blocks = [m for m in messages if _is_context_block(m)]
+        turns = [m for m in messages if not _is_context_block(m)]
+        user_indexes = [i for i, m in enumerate(turns) if m.get("role") == "user"]
+        latest = user_indexes[-1] if user_indexes else None
+        turns = [m if i == latest else collapse_message(m) for i, m in enumerate(turns)]
+
+        for start in user_indexes or [0]:
+            fitted = blocks + turns[start:]
+            if estimate_tokens(fitted) <= self.token_budget:
+                return fitted
+
+        fitted = [dict(m) for m in fitted]
+        while estimate_tokens(fitted) > self.token_budget:
+            texts = [m for m in fitted if isinstance(m.get("content"), str)]
+            longest = max(texts, key=lambda m: len(m["content"]), default=None)
+            if longest is None or len(longest["content"]) <= MIN_TRUNCATED_CHARS:
+                logger.warning(f"History still exceeds the {self.token_budget}-token budget after truncation")
+                break
+            longest["content"] = longest["content"][: len(longest["content"]) // 2] + " [...]"
+        return fitted
+
+    def _finish(self, compacted: list) -> list:
+        compacted = self._fit(compacted)
+        self.last_report["tokens_after"] = estimate_tokens(compacted)
+        logger.info(
+            f"Compacted history ({self.last_report['stage']}) "
+            f"{self.last_report['tokens_before']} -> {self.last_report['tokens_after']} tokens"
+        )
+        return compacted
@@ -0,0 +1,152 @@
+import asyncio
+import base64
+import io
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is only needed when photos are preprocessed
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+LOW_DETAIL_TOKENS = 85
+TILE_TOKENS = 170
+TILE_SIZE = 512
+
+
+def estimate_vision_tokens(width: int, height: int, detail: str = "high") -> int:
+    """Input tokens a gpt-4o vision call bills for an image of this size."""
+    if detail == "low":
+        return LOW_DETAIL_TOKENS
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+    return TILE_TOKENS * tiles + LOW_DETAIL_TOKENS
+
+
+class PreprocessedImage:
+    __slots__ = (
+        "data", "mime_type", "detail", "width", "height",
+        "bytes_in", "bytes_out", "tokens_before", "tokens_after",
+    )
+
+    def __init__(self, data, mime_type, detail, width, height, bytes_in, tokens_before, tokens_after):
+        self.data = data
+        self.mime_type = mime_type
+        self.detail = detail
+        self.width = width
+        self.height = height
+        self.bytes_in = bytes_in
+        self.bytes_out = len(data)
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode()}"
+
+    def image_part(self) -> dict:
+        """Chat-completions content part for this image."""
+        return {"type": "image_url", "image_url": {"url": self.data_url, "detail": self.detail}}
+
+    def report(self) -> dict:
+        return {
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "size": f"{self.width}x{self.height}",
+            "detail": self.detail,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": self.tokens_before - self.tokens_after,
+        }
+
+
+def preprocess_image(
+    data: bytes,
+    max_side: int = 1024,
+    quality: int = 80,
+    image_format: str = "JPEG",
+    detail: str = "auto",
+) -> PreprocessedImage:
+    """Rotate per EXIF, downscale to `max_side` and re-encode a photo for the vision model.
+
+    `detail="auto"` picks low detail when the result fits in a single 512px tile.
+    """
+    if Image is None:
+        raise ImportError("Image preprocessing requires Pillow: pip install 'ai-agents[images]'")
+
+    with Image.open(io.BytesIO(data)) as img:
+        original_size = img.size
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+        out = io.BytesIO()
+        img.save(out, format=image_format, quality=quality, optimize=True)
+        width, height = img.size
+
+    if detail == "auto":
+        detail = "low" if max(width, height) <= TILE_SIZE else "high"
+
+    return PreprocessedImage(
+        data=out.getvalue(),
+        mime_type=f"image/{image_format.lower()}",
+        detail=detail,
+        width=width,
+        height=height,
+        bytes_in=len(data),
+        tokens_before=estimate_vision_tokens(*original_size, "high"),
+        tokens_after=estimate_vision_tokens(width, height, detail),
+    )
+
+
+class ImagePreprocessor:
+    """Runs `preprocess_image` in a worker pool so large photos never block the event loop."""
+
+    def __init__(
+        self,
+        max_side: int = 1024,
+        quality: int = 80,
+        image_format: str = "JPEG",
+        detail: str = "auto",
+        executor=None,
+        max_workers: int = 4,
+    ):
+        self.options = {
+            "max_side": max_side,
+            "quality": quality,
+            "image_format": image_format,
+            "detail": detail,
+        }
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="image-preprocess"
+        )
+        self.totals = {"images": 0, "bytes_in": 0, "bytes_out": 0, "tokens_saved": 0}
+
+    def process(self, data: bytes) -> PreprocessedImage:
+        return self._record(preprocess_image(data, **self.options))
+
+    async def aprocess(self, data: bytes) -> PreprocessedImage:
+        loop = asyncio.get_running_loop()
+        image = await loop.run_in_executor(self.executor, partial(preprocess_image, data, **self.options))
+        return self._record(image)
+
+    def _record(self, image: PreprocessedImage) -> PreprocessedImage:
+        report = image.report()
+        self.totals["images"] += 1
+        self.totals["bytes_in"] += report["bytes_in"]
+        self.totals["bytes_out"] += report["bytes_out"]
+        self.totals["tokens_saved"] += report["tokens_saved"]
+        logger.info(
+            f"Preprocessed image {report['size']} ({report['detail']}): "
+            f"{report['bytes_in']} -> {report['bytes_out']} bytes, "
+            f"~{report['tokens_before']} -> {report['tokens_after']} vision tokens"
+        )
+        return image
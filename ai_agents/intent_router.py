@@ -0,0 +1,171 @@
+import asyncio
+import re
+import time
+from collections import defaultdict
+
+from ai_agents.async_swarm import bridge_context
+from ai_agents.chat_agent import (
+    delete_last_meal,
+    get_calorie_status,
+    get_meals_today,
+    record_weight,
+)
+from ai_agents.nutrition_index import log_known_meal
+
+_MIN_WEIGHT_KG = 25
+_MAX_WEIGHT_KG = 350
+
+
+class IntentRoute:
+    """A high-confidence intent: a full-message pattern and the tool it maps to."""
+
+    def __init__(self, name: str, pattern: str, tool, args_from_match=None):
+        self.name = name
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self.tool = tool
+        self.args_from_match = args_from_match or (lambda match: {})
+
+    def match(self, text: str):
+        match = self.pattern.fullmatch(text)
+        if not match:
+            return None
+        return self.args_from_match(match)
+
+
+def _weight_args(match) -> dict:
+    weight = float(match.group("weight").replace(",", "."))
+    if not _MIN_WEIGHT_KG <= weight <= _MAX_WEIGHT_KG:
+        return None
+    return {"weight_kg": weight}
+
+
+DEFAULT_ROUTES = [
+    IntentRoute(
+        "calorie_status",
+        r"(?:my )?(?:calorie )?status|calories(?: left| remaining)?"
+        r"|how many calories (?:do i have )?(?:left|remaining)|remaining(?: calories)?",
+        get_calorie_status,
+    ),
+    IntentRoute(
+        "meals_today",
+        r"what (?:did|have) i (?:eat|eaten)(?: today)?|(?:list )?(?:my )?meals(?: today)?"
+        r"|today'?s meals|show (?:me )?(?:my )?meals(?: today)?",
+        get_meals_today,
+    ),
+    IntentRoute(
+        "delete_last_meal",
+        r"undo|undo (?:my )?last meal|(?:delete|remove) (?:my |the )?last meal",
+        delete_last_meal,
+    ),
+    # The unit is required: a bare "i weigh 180" may be pounds, so the agent handles it.
+    IntentRoute(
+        "record_weight",
+        r"(?:my weight is|my weight|i weigh|weight(?: is)?:?|weighed in at)\s*"
+        r"(?P<weight>\d{2,3}(?:[.,]\d{1,2})?)\s*(?:kg|kgs|kilos?|kilograms?)(?: today)?",
+        record_weight,
+        _weight_args,
+    ),
+    # Only fires when every item is already known (see MealResolver); otherwise
+    # log_known_meal returns None and the agent estimates the meal as usual.
+    IntentRoute(
+        "known_meal",
+        r"(?:i )?(?:just )?(?:had|ate)\s+(?P<description>.+?)"
+        r"(?: for (?:breakfast|lunch|dinner|a snack))?(?: today| just now)?"
+        r"|(?:breakfast|lunch|dinner|snack)(?: was)?:?\s+(?P<meal>.+)",
+        log_known_meal,
+        lambda match: {"description": match.group("description") or match.group("meal")},
+    ),
+]
+
+
+def normalize_message(text: str) -> str:
+    text = text.strip().lower()
+    text = re.sub(r"[!?.\s]+$", "", text)
+    return re.sub(r"\s+", " ", text)
+
+
+class IntentRouter:
+    """Answers common commands by calling the chat tools directly, before any LLM call.
+
+    `route()` returns the reply text when a rule matches with high confidence,
+    or None to fall through to the agent (also when the matched tool itself
+    returns None, i.e. declines the message). The caller should append both the
+    user message and the returned reply to the conversation history so later
+    agent turns keep the context.
+    """
+
+    def __init__(self, routes: list = None):
+        self.routes = routes if routes is not None else DEFAULT_ROUTES
+        self.messages = 0
+        self.hits = defaultdict(int)
+        self.latency = defaultdict(float)
+        self.fallthrough_latency = 0.0
+
+    def match(self, message: str):
+        """Return (route, tool_args) for the first matching route, or (None, None)."""
+        text = normalize_message(message or "")
+        for route in self.routes:
+            args = route.match(text)
+            if args is not None:
+                return route, args
+        return None, None
+
+    def route(self, message: str, context_variables: dict):
+        start = time.perf_counter()
+        self.messages += 1
+        route, args = self.match(message)
+        if route is None:
+            self.fallthrough_latency += time.perf_counter() - start
+            return None
+
+        reply = route.tool(context_variables, **args)
+        if reply is None:
+            self.fallthrough_latency += time.perf_counter() - start
+            return None
+        self._record_hit(route.name, start)
+        return reply
+
+    async def aroute(self, message: str, context_variables: dict):
+        """Async variant for use with AsyncSwarm; tool I/O runs off the event loop."""
+        start = time.perf_counter()
+        self.messages += 1
+        route, args = self.match(message)
+        if route is None:
+            self.fallthrough_latency += time.perf_counter() - start
+            return None
+
+        bridged = bridge_context(context_variables, asyncio.get_running_loop())
+        reply = await asyncio.to_thread(route.tool, bridged, **args)
+        if reply is None:
+            self.fallthrough_latency += time.perf_counter() - start
+            return None
+        self._record_hit(route.name, start)
+        return reply
+
+    def _record_hit(self, name: str, start: float):
+        self.hits[name] += 1
+        self.latency[name] += time.perf_counter() - start
+
+    def stats(self) -> dict:
+        total_hits = sum(self.hits.values())
+        misses = self.messages - total_hits
+        return {
+            "messages": self.messages,
+            "hit_rate": round(total_hits / self.messages, 3) if self.messages else 0.0,
+            "fallthrough": misses,
+            "fallthrough_avg_ms": round(self.fallthrough_latency / misses * 1000, 3) if misses else 0.0,
+            "routes": {
+                route.name: {
+                    "hits": self.hits[route.name],
+                    "hit_rate": (
+                        round(self.hits[route.name] / self.messages, 3) if self.messages else 0.0
+                    ),
+                    "avg_ms": (
+                        round(self.latency[route.name] / self.hits[route.name] * 1000, 3)
+                        if self.hits[route.name]
+                        else 0.0
+                    ),
+                }
+                for route in self.routes
+            },
+        }
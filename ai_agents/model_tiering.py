@@ -0,0 +1,274 @@
+import contextvars
+import inspect
+import json
+import logging
+import re
+import threading
+from collections import Counter
+from functools import wraps
+
+from swarm.util import function_to_json
+
+from ai_agents.intent_router import DEFAULT_ROUTES, normalize_message
+
+logger = logging.getLogger(__name__)
+
+SMALL_MODEL = "gpt-4o-mini"
+LARGE_MODEL = "gpt-4o"
+
+SMALLTALK = re.compile(
+    r"(?:hi|hello|hey|yo|thanks|thank you|thx|ty|ok|okay|cool|great|nice|got it|perfect"
+    r"|good (?:morning|afternoon|evening|night)|bye|see you)(?: \w+)?",
+    re.IGNORECASE,
+)
+# Describing food means estimating calories, which stays on the large model.
+MEAL_WORDS = re.compile(
+    r"\b(?:ate|eat|eaten|eating|had|having|drank|drink|breakfast|lunch|dinner|snack|meal)\b",
+    re.IGNORECASE,
+)
+LOW_CONFIDENCE = re.compile(
+    r"\b(?:i'?m not sure|i am not sure|not certain|i can'?t (?:tell|determine)|i don'?t know"
+    r"|unable to (?:determine|estimate)|could you clarify)\b",
+    re.IGNORECASE,
+)
+_JSON_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+# The turn's user message once that turn has escalated, so the rest of its
+# completions skip the small model. The message object itself is the key: it
+# is shared by every history list built during the run (PromptAssembler and
+# other wrappers pass fresh lists), and holding it keeps its id from being reused.
+_escalated_turn = contextvars.ContextVar("ai_agents_escalated_turn", default=None)
+
+
+def _last_user_message(history: list) -> tuple:
+    for index in range(len(history) - 1, -1, -1):
+        if history[index].get("role") == "user":
+            return index, history[index]
+    return -1, None
+
+
+def _text_and_image(message: dict) -> tuple:
+    content = (message or {}).get("content") or ""
+    if isinstance(content, list):
+        text = " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+        return text, any(part.get("type") == "image_url" for part in content)
+    return content, False
+
+
+class ModelRouter:
+    """Per-completion model selection with escalation for Swarm and AsyncSwarm.
+
+    `install(swarm_client)` wraps the client's `get_chat_completion`. Agents
+    whose model is already the small tier are left alone. Otherwise the
+    turn's latest user message picks the tier: images, long messages and
+    meal descriptions (calorie estimation) go to `large`; greetings, simple
+    commands and other short messages go to `small`. A small-model answer
+    with an invalid tool call or a low-confidence reply is retried on
+    `large`, and the rest of that turn stays there. Streaming completions
+    are routed but can't be checked, so they are never escalated.
+    """
+
+    def __init__(
+        self,
+        small: str = SMALL_MODEL,
+        large: str = LARGE_MODEL,
+        short_chars: int = 120,
+        long_chars: int = 400,
+        simple_routes: list = None,
+    ):
+        self.small = small
+        self.large = large
+        self.short_chars = short_chars
+        self.long_chars = long_chars
+        self.simple_routes = simple_routes if simple_routes is not None else [
+            route for route in DEFAULT_ROUTES if route.name != "known_meal"
+        ]
+        self.decisions = Counter()
+        self.escalations = Counter()
+        self._schemas = {}
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def select(self, agent, history: list) -> tuple:
+        """Return (model, reason) for the next completion of `agent`."""
+        if agent.model == self.small:
+            return agent.model, "pinned"
+        _, message = _last_user_message(history)
+        if message is not None and _escalated_turn.get() is message:
+            return self.large, "escalated_turn"
+
+        text, has_image = _text_and_image(message)
+        if has_image:
+            return self.large, "image"
+        if len(text) > self.long_chars:
+            return self.large, "long"
+        normalized = normalize_message(text)
+        if SMALLTALK.fullmatch(normalized):
+            return self.small, "smalltalk"
+        if any(route.match(normalized) is not None for route in self.simple_routes):
+            return self.small, "simple_command"
+        if MEAL_WORDS.search(normalized):
+            return self.large, "meal_estimation"
+        if len(text) <= self.short_chars:
+            return self.small, "short"
+        return self.large, "default"
+
+    def check(self, agent, completion) -> str:
+        """Reason to escalate a small-model completion, or None if it looks usable."""
+        choice = completion.choices[0]
+        message = choice.message
+        if getattr(choice, "finish_reason", None) == "length":
+            return "truncated"
+        if message.tool_calls:
+            return self._invalid_tool_call(agent, message.tool_calls)
+        if agent.tool_choice == "required":
+            return "missing_tool_call"
+        if not (message.content or "").strip():
+            return "empty"
+        if LOW_CONFIDENCE.search(message.content):
+            return "low_confidence"
+        return None
+
+    def _invalid_tool_call(self, agent, tool_calls) -> str:
+        functions = {f.__name__: f for f in agent.functions}
+        for tool_call in tool_calls:
+            function = functions.get(tool_call.function.name)
+            if function is None:
+                return "unknown_tool"
+            try:
+                arguments = json.loads(tool_call.function.arguments or "{}")
+            except ValueError:
+                return "malformed_arguments"
+            if not isinstance(arguments, dict):
+                return "malformed_arguments"
+
+            parameters = self._parameters(function)
+            properties = parameters["properties"]
+            if set(parameters["required"]) - set(arguments):
+                return "missing_arguments"
+            for name, value in arguments.items():
+                if name not in properties:
+                    return "unexpected_argument"
+                expected = _JSON_TYPES.get(properties[name].get("type"))
+                if expected and value is not None and (
+                    not isinstance(value, expected) or isinstance(value, bool) and expected is not bool
+                ):
+                    return "argument_type"
+                if name.endswith("_json"):
+                    try:
+                        json.loads(value)
+                    except (TypeError, ValueError):
+                        return "invalid_json_argument"
+        return None
+
+    def _parameters(self, function) -> dict:
+        parameters = self._schemas.get(function)
+        if parameters is None:
+            parameters = function_to_json(function)["function"]["parameters"]
+            parameters["properties"].pop("context_variables", None)
+            parameters["required"] = [
+                name for name in parameters.get("required", []) if name != "context_variables"
+            ]
+            self._schemas[function] = parameters
+        return parameters
+
+    def install(self, swarm_client):
+        """Route `get_chat_completion` on a Swarm or AsyncSwarm instance through this policy."""
+        get_chat_completion = swarm_client.get_chat_completion
+        signature = inspect.signature(get_chat_completion)
+
+        def plan(args, kwargs) -> tuple:
+            arguments = signature.bind(*args, **kwargs).arguments
+            if arguments.get("model_override"):
+                return arguments, None, None
+            model, reason = self.select(arguments["agent"], arguments["history"])
+            self._record_decision(arguments["agent"], model, reason)
+            arguments["model_override"] = model
+            return arguments, model, reason
+
+        if inspect.iscoroutinefunction(get_chat_completion):
+            @wraps(get_chat_completion)
+            async def routed(*args, **kwargs):
+                arguments, model, reason = plan(args, kwargs)
+                completion = await get_chat_completion(**arguments)
+                if model != self.small or arguments.get("stream"):
+                    return completion
+                problem = self.check(arguments["agent"], completion)
+                if problem is None:
+                    return completion
+                self._escalate(arguments, problem)
+                return await get_chat_completion(**arguments)
+        else:
+            @wraps(get_chat_completion)
+            def routed(*args, **kwargs):
+                arguments, model, reason = plan(args, kwargs)
+                completion = get_chat_completion(**arguments)
+                if model != self.small or arguments.get("stream"):
+                    return completion
+                problem = self.check(arguments["agent"], completion)
+                if problem is None:
+                    return completion
+                self._escalate(arguments, problem)
+                return get_chat_completion(**arguments)
+
+        swarm_client.get_chat_completion = routed
+        return swarm_client
+
+    def _record_decision(self, agent, model: str, reason: str):
+        with self._lock:
+            self.decisions[(agent.name, model, reason)] += 1
+
+    def _escalate(self, arguments: dict, problem: str):
+        agent, history = arguments["agent"], arguments["history"]
+        _escalated_turn.set(_last_user_message(history)[1])
+        arguments["model_override"] = self.large
+        with self._lock:
+            self.escalations[(agent.name, problem)] += 1
+        logger.info(f"Escalating {agent.name} from {self.small} to {self.large}: {problem}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            decisions = Counter()
+            reasons = Counter()
+            for (agent, model, reason), count in self.decisions.items():
+                decisions[(agent, model)] += count
+                reasons[reason] += count
+            escalated = Counter()
+            for (agent, problem), count in self.escalations.items():
+                escalated[agent] += count
+            total = sum(decisions.values())
+            small = sum(count for (_, model), count in decisions.items() if model == self.small)
+            small_by_agent = Counter()
+            for (agent, model), count in decisions.items():
+                if model == self.small:
+                    small_by_agent[agent] += count
+            return {
+                "completions": total,
+                "small_share": round(small / total, 3) if total else 0.0,
+                "escalations": sum(self.escalations.values()),
+                "escalation_rate": round(sum(self.escalations.values()) / small, 3) if small else 0.0,
+                "by_reason": dict(reasons),
+                "by_agent": {
+                    agent: {
+                        "small": small_by_agent[agent],
+                        "large": sum(
+                            count for (name, model), count in decisions.items()
+                            if name == agent and model != self.small
+                        ),
+                        "escalations": escalated[agent],
+                    }
+                    for agent in {agent for agent, _ in decisions}
+                },
+                "escalations_by_problem": {
+                    f"{agent}:{problem}": count for (agent, problem), count in self.escalations.items()
+                },
+            }
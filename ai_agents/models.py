@@ -0,0 +1,193 @@
+import json
+
+_COMPACT = (",", ":")
+
+
+def _num(value) -> str:
+    """Shortest readable form of a macro value: 12 rather than 12.0."""
+    return f"{round(value, 1):g}" if isinstance(value, float) else str(value)
+
+
+_ITEM_FIELDS = ("name", "quantity", "calories", "protein_g", "carbs_g", "sugar_g")
+
+
+class FoodItem:
+    """One entry of a meal's `food_items` JSON array; keys it doesn't know are kept in `extra`."""
+
+    __slots__ = _ITEM_FIELDS + ("extra",)
+
+    def __init__(
+        self,
+        name: str,
+        quantity: str = "",
+        calories: int = 0,
+        protein_g: float = 0,
+        carbs_g: float = 0,
+        sugar_g: float = 0,
+        extra: dict = None,
+    ):
+        self.name = name
+        self.quantity = quantity
+        self.calories = calories
+        self.protein_g = protein_g
+        self.carbs_g = carbs_g
+        self.sugar_g = sugar_g
+        self.extra = extra or {}
+
+    @classmethod
+    def from_dict(cls, item: dict) -> "FoodItem":
+        return cls(
+            item.get("name", ""),
+            item.get("quantity") or "",
+            item.get("calories") or 0,
+            item.get("protein_g") or 0,
+            item.get("carbs_g") or 0,
+            item.get("sugar_g") or 0,
+            {key: value for key, value in item.items() if key not in _ITEM_FIELDS},
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            **self.extra,
+            "name": self.name,
+            "quantity": self.quantity,
+            "calories": self.calories,
+            "protein_g": self.protein_g,
+            "carbs_g": self.carbs_g,
+            "sugar_g": self.sugar_g,
+        }
+
+    def scaled(self, fraction: float) -> "FoodItem":
+        return FoodItem(
+            self.name,
+            f"~{fraction}x of {self.quantity}" if self.quantity else "",
+            round(self.calories * fraction),
+            round(self.protein_g * fraction, 1),
+            round(self.carbs_g * fraction, 1),
+            round(self.sugar_g * fraction, 1),
+            dict(self.extra),
+        )
+
+    def render(self) -> str:
+        """Dense one-line form for tool output, e.g. "eggs (2 large) 140cal P12 C1 S0"."""
+        quantity = f" ({self.quantity})" if self.quantity else ""
+        return (
+            f"{self.name}{quantity} {self.calories}cal "
+            f"P{_num(self.protein_g)} C{_num(self.carbs_g)} S{_num(self.sugar_g)}"
+        )
+
+
+def _load_food_items(food_items) -> tuple:
+    """(items, raw): raw is the stored text when it isn't a JSON array, else None."""
+    if isinstance(food_items, str):
+        try:
+            parsed = json.loads(food_items)
+        except ValueError:
+            parsed = None
+        if not isinstance(parsed, list):
+            return [FoodItem(food_items)], food_items
+        food_items = parsed
+    return [FoodItem.from_dict(item) for item in food_items or () if isinstance(item, dict)], None
+
+
+def parse_food_items(food_items) -> list:
+    """FoodItems from a stored `food_items` value (JSON text or an already-parsed list)."""
+    return _load_food_items(food_items)[0]
+
+
+def dump_food_items(items: list) -> str:
+    return json.dumps([item.to_dict() for item in items], separators=_COMPACT)
+
+
+def render_food_items(food_items) -> str:
+    return "; ".join(item.render() for item in parse_food_items(food_items))
+
+
+class Meal:
+    """A meal row as returned by the data layer, with its food items parsed.
+
+    If the stored `food_items` isn't a JSON array, `raw_food_items` keeps the
+    text so it is written back unchanged.
+    """
+
+    __slots__ = (
+        "id", "user_id", "logged_at", "items", "total_calories",
+        "protein_g", "carbs_g", "sugar_g", "health_rating", "image_id", "notes", "raw_food_items",
+    )
+
+    def __init__(
+        self,
+        id=None,
+        user_id=None,
+        logged_at=None,
+        items: list = None,
+        total_calories: int = 0,
+        protein_g: float = 0,
+        carbs_g: float = 0,
+        sugar_g: float = 0,
+        health_rating: int = 0,
+        image_id: str = None,
+        notes: str = "",
+        raw_food_items: str = None,
+    ):
+        self.id = id
+        self.user_id = user_id
+        self.logged_at = logged_at
+        self.items = items or []
+        self.total_calories = total_calories
+        self.protein_g = protein_g
+        self.carbs_g = carbs_g
+        self.sugar_g = sugar_g
+        self.health_rating = health_rating
+        self.image_id = image_id
+        self.notes = notes
+        self.raw_food_items = raw_food_items
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Meal":
+        items, raw = _load_food_items(row.get("food_items"))
+        return cls(
+            row.get("id"),
+            row.get("user_id"),
+            row.get("logged_at"),
+            items,
+            row.get("total_calories") or 0,
+            row.get("protein_g") or 0,
+            row.get("carbs_g") or 0,
+            row.get("sugar_g") or 0,
+            row.get("health_rating") or 0,
+            row.get("image_id"),
+            row.get("notes") or "",
+            raw,
+        )
+
+    @property
+    def food_items_json(self) -> str:
+        if self.raw_food_items is not None:
+            return self.raw_food_items
+        return dump_food_items(self.items)
+
+    @property
+    def time(self) -> str:
+        """HH:MM of logged_at, or "" if unknown."""
+        logged_at = str(self.logged_at or "")
+        return logged_at[11:16] if len(logged_at) >= 16 else logged_at
+
+    def scaled(self, fraction: float) -> "Meal":
+        return Meal(
+            self.id, self.user_id, self.logged_at,
+            self.items if self.raw_food_items is not None else [item.scaled(fraction) for item in self.items],
+            round(self.total_calories * fraction),
+            round(self.protein_g * fraction, 1),
+            round(self.carbs_g * fraction, 1),
+            round(self.sugar_g * fraction, 1),
+            self.health_rating, self.image_id, self.notes, self.raw_food_items,
+        )
+
+    def render(self) -> str:
+        """Dense one-line form: totals first, then the items."""
+        return (
+            f"{self.total_calories}cal P{_num(self.protein_g)} C{_num(self.carbs_g)} "
+            f"S{_num(self.sugar_g)} H{self.health_rating}/10: "
+            + "; ".join(item.render() for item in self.items)
+        )
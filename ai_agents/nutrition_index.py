@@ -0,0 +1,349 @@
+import difflib
+import inspect
+import json
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from functools import wraps
+
+from ai_agents.chat_agent import save_text_meal
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "half": 0.5, "a half": 0.5, "quarter": 0.25, "a quarter": 0.25, "couple": 2, "a couple": 2,
+}
+# unit word -> (canonical unit, factor to the canonical unit)
+UNITS = {
+    "g": ("g", 1), "gr": ("g", 1), "gram": ("g", 1), "grams": ("g", 1),
+    "kg": ("g", 1000), "oz": ("g", 28.35), "lb": ("g", 453.6), "lbs": ("g", 453.6),
+    "ml": ("ml", 1), "l": ("ml", 1000), "liter": ("ml", 1000), "litre": ("ml", 1000),
+    "cup": ("cup", 1), "cups": ("cup", 1),
+    "tbsp": ("tbsp", 1), "tablespoon": ("tbsp", 1), "tablespoons": ("tbsp", 1),
+    "tsp": ("tsp", 1), "teaspoon": ("tsp", 1), "teaspoons": ("tsp", 1),
+    "slice": ("slice", 1), "slices": ("slice", 1),
+    "bowl": ("bowl", 1), "bowls": ("bowl", 1), "plate": ("plate", 1), "plates": ("plate", 1),
+    "glass": ("glass", 1), "glasses": ("glass", 1), "can": ("can", 1), "cans": ("can", 1),
+    "bottle": ("bottle", 1), "bottles": ("bottle", 1), "scoop": ("scoop", 1), "scoops": ("scoop", 1),
+    "piece": ("piece", 1), "pieces": ("piece", 1), "pc": ("piece", 1), "pcs": ("piece", 1),
+    "serving": ("serving", 1), "servings": ("serving", 1), "portion": ("serving", 1),
+}
+SIZE_WORDS = {"small", "medium", "large", "big", "whole", "regular", "xl"}
+FILLER_WORDS = {"of", "my", "some", "the", "usual", "fresh", "x", "approx", "about", "~"}
+COUNT_UNITS = ("piece", "slice", "serving")
+MACRO_KEYS = ("calories", "protein_g", "carbs_g", "sugar_g")
+
+_AMOUNT = r"(?:\d+/\d+|\d+(?:[.,]\d+)?|a couple|a half|a quarter|couple|half|quarter|an?|one|two|three|four|five|six)"
+_QUANTITY_RE = re.compile(rf"^~?\s*(?:(?P<amount>{_AMOUNT})\b)?\s*(?:x\s+)?(?P<rest>.*)$")
+_SPLIT_RE = re.compile(r"\s*(?:,|\+|&|;|\band\b|\bwith\b|\bplus\b)\s*")
+
+
+def _amount(text: str) -> float:
+    if text is None:
+        return None
+    if text in NUMBER_WORDS:
+        return NUMBER_WORDS[text]
+    if "/" in text:
+        numerator, denominator = text.split("/")
+        return int(numerator) / int(denominator) if int(denominator) else None
+    return float(text.replace(",", "."))
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("oes", "ches", "shes", "sses")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def parse_portion(text: str) -> tuple:
+    """Split "2 large eggs" / "150g chicken" / "a slice of toast" into (amount, unit, rest).
+
+    amount and unit are None when the text doesn't state them.
+    """
+    text = re.sub(r"(\d)([a-z])", r"\1 \2", text.strip().lower())
+    match = _QUANTITY_RE.match(text)
+    amount = _amount(match.group("amount"))
+    words = match.group("rest").split()
+    unit = None
+    if words and words[0] in UNITS:
+        unit, factor = UNITS[words.pop(0)]
+        amount = (amount or 1) * factor
+    elif words and words[0] in SIZE_WORDS:
+        words.pop(0)
+        unit = "piece"
+    elif amount is not None:
+        unit = "piece"
+    return amount, unit, " ".join(words)
+
+
+def normalize_food_name(name: str) -> str:
+    """Canonical index key: lowercase singular words, no quantities, sizes or filler."""
+    _, _, rest = parse_portion(name)
+    words = re.findall(r"[a-z]+", rest)
+    return " ".join(
+        _singular(word) for word in words
+        if word not in FILLER_WORDS and word not in SIZE_WORDS and word not in UNITS
+    )
+
+
+def split_meal_text(text: str) -> list:
+    return [part for part in _SPLIT_RE.split(text.strip().lower()) if part]
+
+
+class FoodStats:
+    """Running per-unit averages for one food in one unit."""
+
+    __slots__ = ("count", "last_amount", "calories", "protein_g", "carbs_g", "sugar_g", "health")
+
+    def __init__(self):
+        self.count = 0
+        self.last_amount = 1.0
+        self.calories = 0.0
+        self.protein_g = 0.0
+        self.carbs_g = 0.0
+        self.sugar_g = 0.0
+        self.health = 0.0
+
+    def add(self, amount: float, item: dict, health: int):
+        self.count += 1
+        self.last_amount = amount
+        for key in MACRO_KEYS:
+            setattr(self, key, getattr(self, key) + (item.get(key) or 0) / amount)
+        self.health += health or 0
+
+    def portion(self, amount: float) -> dict:
+        return {key: getattr(self, key) / self.count * amount for key in MACRO_KEYS}
+
+
+class NutritionIndex:
+    """Per-unit nutrition values learned from logged food items, with fuzzy name lookup.
+
+    `max_foods` bounds the index (least recently used foods are dropped), which
+    makes a small index per user behave as a recent-foods cache.
+    """
+
+    def __init__(self, max_foods: int = None, cutoff: float = 0.85):
+        self.max_foods = max_foods
+        self.cutoff = cutoff
+        self._foods = OrderedDict()
+        self._by_token = defaultdict(set)
+
+    def __len__(self):
+        return len(self._foods)
+
+    def add_item(self, item: dict, health: int = 0):
+        name = normalize_food_name(item.get("name", ""))
+        amount, unit, _ = parse_portion(item.get("quantity") or "")
+        name_amount, name_unit, _ = parse_portion(item.get("name", ""))
+        if amount is None and name_amount is not None:
+            amount, unit = name_amount, name_unit
+        if not name or not item.get("calories") or amount is not None and amount <= 0:
+            return
+        if name not in self._foods:
+            self._foods[name] = {}
+            for token in name.split():
+                self._by_token[token].add(name)
+        self._foods.move_to_end(name)
+        self._foods[name].setdefault(unit or "serving", FoodStats()).add(amount or 1, item, health)
+        if self.max_foods and len(self._foods) > self.max_foods:
+            self._forget(next(iter(self._foods)))
+
+    def find(self, name: str):
+        """Best matching indexed name for a normalized name, or None."""
+        if name in self._foods:
+            return name
+        candidates = set().union(*(self._by_token.get(token, ()) for token in name.split()))
+        matches = difflib.get_close_matches(name, candidates, n=1, cutoff=self.cutoff)
+        return matches[0] if matches else None
+
+    def lookup(self, text: str):
+        """Item dict for a portion like "2 eggs" scaled from learned values, or None.
+
+        Without a stated amount, the portion last logged for that food is used.
+        """
+        amount, unit, _ = parse_portion(text)
+        key = self.find(normalize_food_name(text))
+        if key is None:
+            return None
+        units = self._foods[key]
+        if unit in COUNT_UNITS and unit not in units:
+            unit = next((u for u in COUNT_UNITS if u in units), unit)
+        if unit is None or unit not in units and amount is None:
+            unit, stats = max(units.items(), key=lambda entry: entry[1].count)
+            amount = stats.last_amount
+        elif unit not in units:
+            return None
+        stats = units[unit]
+        amount = amount or 1
+        self._foods.move_to_end(key)
+        values = stats.portion(amount)
+        return {
+            "name": key,
+            "quantity": f"{amount:g} {unit}",
+            "calories": round(values["calories"]),
+            "protein_g": round(values["protein_g"], 1),
+            "carbs_g": round(values["carbs_g"], 1),
+            "sugar_g": round(values["sugar_g"], 1),
+            "health_rating": stats.health / stats.count,
+        }
+
+    def _forget(self, name: str):
+        del self._foods[name]
+        for token in name.split():
+            self._by_token[token].discard(name)
+            if not self._by_token[token]:
+                del self._by_token[token]
+
+
+class MealResolver:
+    """Resolves text meal descriptions from previously logged food items.
+
+    Each user's own recent foods are consulted before the shared index. A
+    description resolves only if every part of it matches, so unfamiliar
+    meals still go to the model for estimation. `bind()` makes `log_meal`
+    feed both indexes; `load()` seeds them from stored meal rows.
+    """
+
+    def __init__(self, recent_foods_per_user: int = 200, max_users: int = 50_000):
+        self.recent_foods_per_user = recent_foods_per_user
+        self.max_users = max_users
+        self.shared = NutritionIndex()
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+        self.resolved = 0
+        self.unresolved = 0
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def learn(self, user_id, food_items, health_rating: int = 0):
+        if isinstance(food_items, str):
+            try:
+                food_items = json.loads(food_items)
+            except ValueError:
+                return
+        with self._lock:
+            recent = self._recent_for(user_id)
+            for item in food_items or []:
+                if isinstance(item, dict):
+                    recent.add_item(item, health_rating)
+                    self.shared.add_item(item, health_rating)
+
+    def load(self, meals):
+        """Seed from stored meal rows (dicts with user_id, food_items, health_rating)."""
+        for meal in meals:
+            self.learn(meal["user_id"], meal["food_items"], meal.get("health_rating", 0))
+
+    def resolve(self, user_id, description: str):
+        """Return {"items", totals..., "health_rating"} if every part is known, else None."""
+        parts = split_meal_text(description)
+        items = []
+        with self._lock:
+            recent = self._recent.get(user_id)
+            for part in parts:
+                item = (recent.lookup(part) if recent else None) or self.shared.lookup(part)
+                if item is None:
+                    self.unresolved += 1
+                    return None
+                items.append(item)
+        if not items:
+            return None
+        self.resolved += 1
+
+        calories = sum(item["calories"] for item in items)
+        health = sum(item.pop("health_rating") * item["calories"] for item in items)
+        return {
+            "items": items,
+            "total_calories": calories,
+            "total_protein": round(sum(item["protein_g"] for item in items), 1),
+            "total_carbs": round(sum(item["carbs_g"] for item in items), 1),
+            "total_sugar": round(sum(item["sugar_g"] for item in items), 1),
+            "health_rating": max(1, round(health / calories)) if calories else 5,
+        }
+
+    def bind(self, context_variables: dict) -> dict:
+        """Return a copy of context_variables whose log_meal also teaches the resolver."""
+        bound = dict(context_variables)
+        if "log_meal" in context_variables:
+            bound["log_meal"] = self._learning(context_variables["log_meal"])
+        bound["meal_resolver"] = self
+        return bound
+
+    def _learning(self, fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_log_meal(*args, **kwargs):
+                result = await fn(*args, **kwargs)
+                self._learn_call(args, kwargs)
+                return result
+
+            return async_log_meal
+
+        @wraps(fn)
+        def log_meal(*args, **kwargs):
+            result = fn(*args, **kwargs)
+            self._learn_call(args, kwargs)
+            return result
+
+        return log_meal
+
+    def _learn_call(self, args, kwargs):
+        user_id = args[0] if args else kwargs.get("user_id")
+        food_items = args[1] if len(args) > 1 else kwargs.get("food_items")
+        self.learn(user_id, food_items, kwargs.get("health_rating", 0))
+
+    def _recent_for(self, user_id) -> NutritionIndex:
+        recent = self._recent.get(user_id)
+        if recent is None:
+            recent = self._recent[user_id] = NutritionIndex(max_foods=self.recent_foods_per_user)
+            if len(self._recent) > self.max_users:
+                self._recent.popitem(last=False)
+        else:
+            self._recent.move_to_end(user_id)
+        return recent
+
+    def stats(self) -> dict:
+        attempts = self.resolved + self.unresolved
+        return {
+            "resolved": self.resolved,
+            "unresolved": self.unresolved,
+            "hit_rate": round(self.resolved / attempts, 3) if attempts else 0.0,
+            "shared_foods": len(self.shared),
+            "users": len(self._recent),
+        }
+
+
+def log_known_meal(context_variables: dict, description: str):
+    """Log a text meal from the user's previously logged foods, without an estimation call.
+
+    Returns the reply text, or None if the description isn't fully known (or no
+    resolver is bound), in which case the message should go to the agent.
+    """
+    resolver = context_variables.get("meal_resolver")
+    if resolver is None:
+        return None
+    phone = context_variables.get("phone_number")
+    user = context_variables["get_or_create_user"](phone)
+    meal = resolver.resolve(user["id"], description)
+    if meal is None:
+        return None
+
+    logged = save_text_meal(
+        context_variables,
+        json.dumps(meal["items"]),
+        meal["total_calories"],
+        meal["total_protein"],
+        meal["total_carbs"],
+        meal["total_sugar"],
+        meal["health_rating"],
+        notes="logged from known foods",
+    )
+    item_lines = [
+        f"• {item['name']} ({item['quantity']}) — {item['calories']} cal  "
+        f"P:{item['protein_g']}g C:{item['carbs_g']}g S:{item['sugar_g']}g"
+        for item in meal["items"]
+    ]
+    return "Logged using your usual values:\n" + "\n".join(item_lines) + "\n" + logged
@@ -0,0 +1,86 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from swarm import Swarm
+from swarm.types import Response
+
+
+def read_only(func):
+    """Mark a tool as free of writes, so it may run alongside other read-only calls."""
+    func.__read_only__ = True
+    return func
+
+
+def is_read_only(func) -> bool:
+    return getattr(func, "__read_only__", False)
+
+
+def tool_call_phases(tool_calls: list, function_map: dict) -> list:
+    """Group tool call indexes into phases that can each run concurrently.
+
+    Consecutive read-only calls share a phase; every mutating call gets a
+    phase of its own. Running the phases in order keeps writes in the order
+    the model emitted them and lets later reads see earlier writes. Unknown
+    tools only produce an error message, so they count as read-only.
+    """
+    phases = []
+    reads = []
+    for index, tool_call in enumerate(tool_calls):
+        func = function_map.get(tool_call.function.name)
+        if func is None or is_read_only(func):
+            reads.append(index)
+            continue
+        if reads:
+            phases.append(reads)
+            reads = []
+        phases.append([index])
+    if reads:
+        phases.append(reads)
+    return phases
+
+
+def merge_responses(responses: list) -> Response:
+    """Combine single-call responses in order, as one sequential pass would have."""
+    merged = Response(messages=[], agent=None, context_variables={})
+    for response in responses:
+        merged.messages.extend(response.messages)
+        merged.context_variables.update(response.context_variables)
+        if response.agent:
+            merged.agent = response.agent
+    return merged
+
+
+class ParallelSwarm(Swarm):
+    """`swarm.Swarm` that runs independent read-only tool calls on a thread pool.
+
+    Calls are grouped by `tool_call_phases`; each phase runs concurrently and
+    results come back in the model's original order. Tools opt in with
+    `@read_only`. Workers run in a copy of the caller's context, so tracing
+    spans nest under the current turn.
+    """
+
+    def __init__(self, client=None, max_workers: int = 8):
+        super().__init__(client)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    def handle_tool_calls(self, tool_calls, functions, context_variables, debug) -> Response:
+        handle_one = super().handle_tool_calls
+        function_map = {f.__name__: f for f in functions}
+        responses = []
+        for phase in tool_call_phases(tool_calls, function_map):
+            if len(phase) == 1:
+                responses.append(handle_one([tool_calls[phase[0]]], functions, context_variables, debug))
+                continue
+            futures = [
+                self.executor.submit(
+                    contextvars.copy_context().run,
+                    handle_one,
+                    [tool_calls[index]],
+                    functions,
+                    context_variables,
+                    debug,
+                )
+                for index in phase
+            ]
+            responses.extend(future.result() for future in futures)
+        return merge_responses(responses)
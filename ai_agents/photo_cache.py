@@ -0,0 +1,147 @@
+import base64
+import copy
+import io
+import threading
+import time
+from collections import Counter, OrderedDict
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is only needed when photos are hashed
+    Image = None
+
+HASH_SIZE = 8
+
+
+def perceptual_hash(image_bytes: bytes) -> int:
+    """64-bit difference hash of an image; near-identical shots differ in few bits."""
+    if Image is None:
+        raise ImportError("Photo hashing requires Pillow: pip install 'ai-agents[images]'")
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        gray = ImageOps.exif_transpose(img).convert("L")
+        small = gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def image_bytes_from_url(image_url: str):
+    """Decode a base64 data URL; returns None for remote URLs."""
+    if not image_url or not image_url.startswith("data:"):
+        return None
+    _, _, data = image_url.partition(",")
+    return base64.b64decode(data)
+
+
+def cache_variant(context_variables: dict, caption: str = "") -> str:
+    """Inputs besides the pixels that change an analysis: preferences and caption."""
+    profile = context_variables.get("user_profile") or {}
+    preferences = (profile.get("dietary_preferences") or "").strip().lower()
+    caption = caption.strip().lower()
+    return f"{preferences}|{caption}" if preferences or caption else ""
+
+
+class PhotoAnalysisCache:
+    """Bounded LRU/TTL cache of structured meal analyses keyed by perceptual hash.
+
+    Lookups match the exact `media_id` first, then the exact hash, then the
+    closest stored hash within `max_distance` bits. `variant` separates
+    analyses that depend on more than the pixels (dietary preferences, caption).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_distance: int = 5,
+        clock=time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.clock = clock
+        self.counters = Counter()
+        self._entries = OrderedDict()
+        self._by_media = {}
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def lookup(self, phash: int = None, media_id: str = None, variant: str = ""):
+        """Return a copy of the stored analysis for this image, or None."""
+        with self._lock:
+            self.counters["lookups"] += 1
+            key, kind = self._find(phash, media_id, variant)
+            if key is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters[f"hits_{kind}"] += 1
+            return copy.deepcopy(self._entries[key][0])
+
+    def store(self, analysis: dict, phash: int = None, media_id: str = None, variant: str = ""):
+        if phash is None and media_id is None:
+            return
+        key = (phash if phash is not None else ("media", media_id), variant)
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(analysis), self.clock(), media_id)
+            self._entries.move_to_end(key)
+            if media_id is not None:
+                self._by_media[media_id] = key
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.counters["evictions"] += 1
+
+    def stats(self) -> dict:
+        lookups = self.counters["lookups"]
+        hits = lookups - self.counters["misses"]
+        return {
+            "size": len(self._entries),
+            "lookups": lookups,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "hits_media": self.counters["hits_media"],
+            "hits_exact": self.counters["hits_exact"],
+            "hits_near": self.counters["hits_near"],
+            "evictions": self.counters["evictions"],
+            "expirations": self.counters["expirations"],
+        }
+
+    def _find(self, phash, media_id, variant):
+        key = self._by_media.get(media_id)
+        if key in self._entries and key[1] == variant and self._fresh(key):
+            return key, "media"
+        if phash is None:
+            return None, None
+
+        key = (phash, variant)
+        if key in self._entries and self._fresh(key):
+            return key, "exact"
+
+        best, best_distance = None, self.max_distance + 1
+        for candidate in list(self._entries):
+            stored_hash, stored_variant = candidate
+            if stored_variant != variant or not isinstance(stored_hash, int):
+                continue
+            distance = (stored_hash ^ phash).bit_count()
+            if distance < best_distance and self._fresh(candidate):
+                best, best_distance = candidate, distance
+        return (best, "near") if best is not None else (None, None)
+
+    def _fresh(self, key) -> bool:
+        if self.clock() - self._entries[key][1] <= self.ttl_seconds:
+            return True
+        self._drop(key)
+        self.counters["expirations"] += 1
+        return False
+
+    def _drop(self, key):
+        _, _, media_id = self._entries.pop(key)
+        if self._by_media.get(media_id) == key:
+            del self._by_media[media_id]
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import logging
+
+from ai_agents.async_swarm import bridge_context
+from ai_agents.food_analysis_agent import log_analyzed_meal
+from ai_agents.photo_cache import cache_variant, image_bytes_from_url, perceptual_hash
+
+logger = logging.getLogger(__name__)
+
+_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "quantity": {"type": "string"},
+        "calories": {"type": "integer"},
+        "protein_g": {"type": "number"},
+        "carbs_g": {"type": "number"},
+        "sugar_g": {"type": "number"},
+    },
+    "required": ["name", "quantity", "calories", "protein_g", "carbs_g", "sugar_g"],
+    "additionalProperties": False,
+}
+
+MEAL_ANALYSIS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "meal_analysis",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "is_food": {"type": "boolean"},
+                "commentary": {"type": "string"},
+                "items": {"type": "array", "items": _ITEM_SCHEMA},
+                "health_rating": {"type": "integer"},
+                "health_reason": {"type": "string"},
+                "preference_warning": {"type": "string"},
+                "notes": {"type": "string"},
+            },
+            "required": [
+                "is_food", "commentary", "items", "health_rating",
+                "health_reason", "preference_warning", "notes",
+            ],
+            "additionalProperties": False,
+        },
+    },
+}
+
+PHOTO_INSTRUCTIONS = """You are a food analysis specialist. You will receive an image of food.
+
+Identify ALL food items visible, estimate each portion (use common serving sizes, or a
+typical restaurant/home serving if ambiguous) and estimate calories (USDA-style),
+protein, carbohydrates and sugar in grams for each item.
+
+Rate the overall meal healthiness on a 1-10 scale:
+- 1-3: Very unhealthy (deep fried, high sugar, processed)
+- 4-5: Below average (some redeeming qualities but mostly unhealthy)
+- 6-7: Average to good (balanced, reasonable portions)
+- 8-9: Very healthy (lean protein, vegetables, whole grains)
+- 10: Exceptionally healthy (nutrient-dense, perfect balance)
+
+Fill in the JSON fields:
+- is_food: false if the image is unclear or not food (leave items empty)
+- commentary: a brief 1-sentence commentary about the meal
+- health_reason: a 1-sentence justification for the health rating
+- preference_warning: if the meal conflicts with the user's dietary preferences,
+  a short warning; otherwise an empty string
+- notes: a brief description of the meal"""
+
+NOT_FOOD_REPLY = (
+    "I couldn't identify any food in that photo. "
+    "Could you send a clearer picture of your meal?"
+)
+
+
+def is_photo_message(message: dict) -> bool:
+    """Return True if a chat message carries an image part."""
+    content = message.get("content")
+    if not isinstance(content, list):
+        return False
+    return any(part.get("type") == "image_url" for part in content)
+
+
+def build_photo_messages(
+    context_variables: dict, image_url: str, caption: str = "", detail: str = None
+) -> list:
+    profile = context_variables.get("user_profile") or {}
+    preferences = profile.get("dietary_preferences") or "none stated"
+
+    image = {"url": image_url}
+    if detail:
+        image["detail"] = detail
+    user_content = [{"type": "image_url", "image_url": image}]
+    if caption:
+        user_content.insert(0, {"type": "text", "text": caption})
+
+    return [
+        {"role": "system", "content": PHOTO_INSTRUCTIONS},
+        {"role": "system", "content": f"User dietary preferences: {preferences}"},
+        {"role": "user", "content": user_content},
+    ]
+
+
+def parse_analysis(completion) -> dict:
+    analysis = json.loads(completion.choices[0].message.content)
+    items = analysis.get("items") or []
+    analysis["total_calories"] = sum(round(item["calories"]) for item in items)
+    for key in ["protein_g", "carbs_g", "sugar_g"]:
+        analysis[f"total_{key[:-2]}"] = round(sum(item[key] for item in items), 1)
+    return analysis
+
+
+def persist_analysis(context_variables: dict, analysis: dict) -> tuple:
+    """Log the analyzed meal through the same log_meal path as save_meal."""
+    return log_analyzed_meal(
+        context_variables,
+        json.dumps(analysis["items"]),
+        analysis["total_calories"],
+        analysis["total_protein"],
+        analysis["total_carbs"],
+        analysis["total_sugar"],
+        analysis["health_rating"],
+        analysis.get("notes", ""),
+    )
+
+
+def render_photo_reply(analysis: dict, daily: dict, limit_data: dict) -> str:
+    goal = limit_data["daily_limit"]
+    remaining = goal - daily["total_calories"]
+
+    lines = []
+    if analysis.get("preference_warning"):
+        lines.append(f"⚠️ {analysis['preference_warning']}")
+    lines.append(analysis.get("commentary") or analysis.get("notes", ""))
+    for item in analysis["items"]:
+        lines.append(
+            f"• {item['name']} ({item['quantity']}) — {item['calories']} cal  "
+            f"P:{item['protein_g']}g C:{item['carbs_g']}g S:{item['sugar_g']}g"
+        )
+    lines.append(
+        f"Total: {analysis['total_calories']} cal | "
+        f"P:{analysis['total_protein']}g C:{analysis['total_carbs']}g S:{analysis['total_sugar']}g"
+    )
+    if analysis.get("health_reason"):
+        lines.append(f"Health: {analysis['health_rating']}/10 — {analysis['health_reason']}")
+    else:
+        lines.append(f"Health: {analysis['health_rating']}/10")
+    lines.append(
+        f"Daily: {daily['total_calories']}/{goal} cal ({remaining} remaining)  "
+        f"P:{daily['total_protein']}g | C:{daily['total_carbs']}g | S:{daily['total_sugar']}g"
+    )
+    return "\n".join(lines)
+
+
+class PhotoPipeline:
+    """Single-completion food photo path that bypasses the chat -> food analysis handoff.
+
+    The model returns structured items and macros in one completion; the meal
+    is logged through `log_meal` and the reply is rendered locally, so a photo
+    turn costs exactly one LLM call instead of three. With a
+    `PhotoAnalysisCache`, re-sent or near-identical photos skip the model call;
+    with an `ImagePreprocessor`, photos are shrunk before upload.
+    """
+
+    def __init__(self, client, model: str = "gpt-4o", cache=None, preprocessor=None):
+        self.client = client
+        self.model = model
+        self.cache = cache
+        self.preprocessor = preprocessor
+
+    def run(
+        self, context_variables: dict, image_url: str, caption: str = "", image_bytes: bytes = None
+    ) -> str:
+        image_bytes = image_bytes or image_bytes_from_url(image_url)
+        detail = None
+        if self.preprocessor is not None and image_bytes:
+            image = self.preprocessor.process(image_bytes)
+            image_bytes, image_url, detail = image.data, image.data_url, image.detail
+
+        cache_key, analysis = self._cached(context_variables, caption, image_bytes)
+        if analysis is None:
+            completion = self.client.chat.completions.create(
+                model=self.model,
+                messages=build_photo_messages(context_variables, image_url, caption, detail),
+                response_format=MEAL_ANALYSIS_FORMAT,
+            )
+            analysis = self._remember(cache_key, parse_analysis(completion))
+        return self._finish(context_variables, analysis)
+
+    async def arun(
+        self, context_variables: dict, image_url: str, caption: str = "", image_bytes: bytes = None
+    ) -> str:
+        """Async variant for an AsyncOpenAI client; image work and logging run off the event loop."""
+        image_bytes = image_bytes or image_bytes_from_url(image_url)
+        detail = None
+        if self.preprocessor is not None and image_bytes:
+            image = await self.preprocessor.aprocess(image_bytes)
+            image_bytes, image_url, detail = image.data, image.data_url, image.detail
+
+        cache_key, analysis = await asyncio.to_thread(
+            self._cached, context_variables, caption, image_bytes
+        )
+        if analysis is None:
+            completion = await self.client.chat.completions.create(
+                model=self.model,
+                messages=build_photo_messages(context_variables, image_url, caption, detail),
+                response_format=MEAL_ANALYSIS_FORMAT,
+            )
+            analysis = self._remember(cache_key, parse_analysis(completion))
+        bridged = bridge_context(context_variables, asyncio.get_running_loop())
+        return await asyncio.to_thread(self._finish, bridged, analysis)
+
+    def _cached(self, context_variables, caption, image_bytes):
+        if self.cache is None:
+            return None, None
+        cache_key = {
+            "phash": perceptual_hash(image_bytes) if image_bytes else None,
+            "media_id": context_variables.get("media_id"),
+            "variant": cache_variant(context_variables, caption),
+        }
+        return cache_key, self.cache.lookup(**cache_key)
+
+    def _remember(self, cache_key, analysis: dict) -> dict:
+        if cache_key is not None and analysis["is_food"] and analysis["items"]:
+            self.cache.store(analysis, **cache_key)
+        return analysis
+
+    def _finish(self, context_variables: dict, analysis: dict) -> str:
+        if not analysis["is_food"] or not analysis["items"]:
+            return NOT_FOOD_REPLY
+        try:
+            daily, limit_data = persist_analysis(context_variables, analysis)
+        except Exception as e:
+            logger.error(f"Failed to save meal: {e}", exc_info=True)
+            return "Sorry, I couldn't save that meal. Please try sending the photo again."
+        return render_photo_reply(analysis, daily, limit_data)
@@ -0,0 +1,133 @@
+import hashlib
+import inspect
+import json
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from functools import wraps
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from swarm.util import function_to_json
+
+USER_CONTEXT_PREFIX = "Current user context:"
+
+
+def user_context_block(context_variables: dict, now: datetime = None) -> dict:
+    """Trailing system message with the per-user details agents are told to use."""
+    profile = context_variables.get("user_profile") or {}
+    try:
+        zone = ZoneInfo(profile.get("timezone") or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        zone = ZoneInfo("UTC")
+    local = (now or datetime.now(zone)).astimezone(zone)
+
+    lines = [f"- Local date: {local:%A %Y-%m-%d} ({zone.key})"]
+    if profile.get("first_name"):
+        lines.append(f"- First name: {profile['first_name']}")
+    lines.append(f"- Dietary preferences: {profile.get('dietary_preferences') or 'none stated'}")
+    if profile.get("daily_goal"):
+        lines.append(f"- Daily calorie goal: {profile['daily_goal']}")
+    return {"role": "system", "content": USER_CONTEXT_PREFIX + "\n" + "\n".join(lines)}
+
+
+def static_prefix(agent) -> str:
+    """The per-agent part of every request: instructions, then tool schemas in order."""
+    tools = [function_to_json(f) for f in agent.functions]
+    for tool in tools:
+        parameters = tool["function"]["parameters"]
+        parameters["properties"].pop("context_variables", None)
+        if "context_variables" in parameters.get("required", []):
+            parameters["required"].remove("context_variables")
+    instructions = agent.instructions if isinstance(agent.instructions, str) else None
+    return json.dumps({"instructions": instructions, "tools": tools}, sort_keys=True)
+
+
+class PromptAssembler:
+    """Keeps each agent's prompt prefix byte-identical across users and turns.
+
+    `install(swarm_client)` wraps `get_chat_completion` so every request is
+    the agent's static instructions and tools, then the conversation, then
+    one trailing system message from `context_block(context_variables)`
+    (profile, dietary preferences, local date). Everything before that
+    block can be served from the provider's prompt cache. The block is
+    never stored in the conversation history.
+
+    Usage is recorded per agent, so `stats()` reports cached vs. prompt
+    tokens and how many distinct static prefixes each agent has sent (more
+    than one means something in the prefix is varying).
+    """
+
+    def __init__(self, context_block=user_context_block):
+        self.context_block = context_block
+        self.usage = defaultdict(Counter)
+        self.prefixes = defaultdict(set)
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def fingerprint(self, agent) -> str:
+        key = (agent.name, agent.instructions, tuple(agent.functions))
+        fingerprint = self._fingerprints.get(key)
+        if fingerprint is None:
+            fingerprint = hashlib.sha256(static_prefix(agent).encode()).hexdigest()[:16]
+            self._fingerprints[key] = fingerprint
+        return fingerprint
+
+    def messages(self, history: list, context_variables: dict) -> list:
+        block = self.context_block(context_variables)
+        return history + [block] if block else history
+
+    def install(self, swarm_client):
+        """Assemble prompts for `get_chat_completion` on a Swarm or AsyncSwarm instance."""
+        get_chat_completion = swarm_client.get_chat_completion
+        signature = inspect.signature(get_chat_completion)
+
+        def assemble(args, kwargs) -> dict:
+            arguments = signature.bind(*args, **kwargs).arguments
+            arguments["history"] = self.messages(arguments["history"], arguments["context_variables"])
+            return arguments
+
+        if inspect.iscoroutinefunction(get_chat_completion):
+            @wraps(get_chat_completion)
+            async def assembled(*args, **kwargs):
+                arguments = assemble(args, kwargs)
+                return self.record(arguments["agent"], await get_chat_completion(**arguments))
+        else:
+            @wraps(get_chat_completion)
+            def assembled(*args, **kwargs):
+                arguments = assemble(args, kwargs)
+                return self.record(arguments["agent"], get_chat_completion(**arguments))
+
+        swarm_client.get_chat_completion = assembled
+        return swarm_client
+
+    def record(self, agent, completion):
+        usage = getattr(completion, "usage", None)
+        fingerprint = self.fingerprint(agent)
+        with self._lock:
+            self.prefixes[agent.name].add(fingerprint)
+            counts = self.usage[agent.name]
+            counts["completions"] += 1
+            if usage is not None:
+                details = getattr(usage, "prompt_tokens_details", None)
+                counts["prompt_tokens"] += usage.prompt_tokens
+                counts["cached_tokens"] += getattr(details, "cached_tokens", None) or 0
+        return completion
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                agent: {
+                    "completions": counts["completions"],
+                    "prompt_tokens": counts["prompt_tokens"],
+                    "cached_tokens": counts["cached_tokens"],
+                    "cache_hit_rate": (
+                        round(counts["cached_tokens"] / counts["prompt_tokens"], 3)
+                        if counts["prompt_tokens"] else 0.0
+                    ),
+                    "prefix_variants": len(self.prefixes[agent]),
+                }
+                for agent, counts in self.usage.items()
+            }
@@ -0,0 +1,335 @@
+import calendar
+import inspect
+import threading
+from datetime import date, datetime, timedelta
+from functools import wraps
+
+
+class Rollup:
+    """Running totals for one user and one period (day, ISO week or month)."""
+
+    __slots__ = ("calories", "protein", "carbs", "sugar", "health_sum", "health_count", "meal_count")
+
+    def __init__(self):
+        self.calories = 0
+        self.protein = 0.0
+        self.carbs = 0.0
+        self.sugar = 0.0
+        self.health_sum = 0
+        self.health_count = 0
+        self.meal_count = 0
+
+    def apply(self, contribution: tuple, sign: int):
+        calories, protein, carbs, sugar, health = contribution
+        self.calories += sign * calories
+        self.protein += sign * protein
+        self.carbs += sign * carbs
+        self.sugar += sign * sugar
+        if health:
+            self.health_sum += sign * health
+            self.health_count += sign
+        self.meal_count += sign
+
+    def as_tuple(self) -> tuple:
+        return (
+            self.calories, round(self.protein, 1), round(self.carbs, 1), round(self.sugar, 1),
+            self.health_sum, self.health_count, self.meal_count,
+        )
+
+    def totals(self) -> dict:
+        return {
+            "total_calories": self.calories,
+            "total_protein": round(self.protein, 1),
+            "total_carbs": round(self.carbs, 1),
+            "total_sugar": round(self.sugar, 1),
+            "avg_health_rating": (
+                round(self.health_sum / self.health_count, 1) if self.health_count else 0
+            ),
+            "meal_count": self.meal_count,
+        }
+
+
+def period_keys(day: date) -> tuple:
+    iso = day.isocalendar()
+    return (
+        ("day", day.isoformat()),
+        ("week", f"{iso.year}-W{iso.week:02d}"),
+        ("month", f"{day.year}-{day.month:02d}"),
+    )
+
+
+def coverage_start(day: date) -> date:
+    """Earliest date whose meals are needed to serve today's day, week and month."""
+    return min(day - timedelta(days=day.weekday()), day.replace(day=1))
+
+
+def _meal_day(logged_at) -> date:
+    if logged_at is None:
+        return date.today()
+    if isinstance(logged_at, str):
+        logged_at = datetime.fromisoformat(logged_at)
+    return logged_at.date() if isinstance(logged_at, datetime) else logged_at
+
+
+def _contribution(meal: dict) -> tuple:
+    return (
+        meal.get("total_calories") or 0,
+        meal.get("protein_g") or 0,
+        meal.get("carbs_g") or 0,
+        meal.get("sugar_g") or 0,
+        meal.get("health_rating") or 0,
+    )
+
+
+def _meal_id(result):
+    if isinstance(result, dict):
+        result = result.get("id")
+    return None if isinstance(result, bool) else result
+
+
+def _arguments(signature, args: tuple, kwargs: dict) -> dict:
+    """Call arguments by parameter name, defaults included; kwargs only if the signature is unknown."""
+    if signature is None:
+        return dict(kwargs)
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        return dict(kwargs)
+    bound.apply_defaults()
+    return bound.arguments
+
+
+class RollupStore:
+    """Incrementally maintained per-user daily, weekly and monthly nutrition totals.
+
+    `bind()` swaps the aggregate reads in context_variables for O(1) rollup
+    lookups and makes `log_meal`, `update_meal`, `delete_meal` and
+    `apply_meal_batch` apply deltas.
+    Users the store hasn't loaded yet are served by the original callables
+    until `load_user()` (or `loader`, if given) seeds them from raw meal rows.
+    Pass `user_today` (e.g. `SQLiteDataLayer.user_today`) so each user's
+    day, week and month follow their local date rather than `today()`.
+    """
+
+    def __init__(self, loader=None, today=date.today, user_today=None):
+        self.loader = loader
+        self.today = today
+        self.user_today = user_today
+        self._rollups = {}
+        self._meals = {}
+        self._coverage = {}
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def load_user(self, user_id, meals):
+        """Seed a user's rollups from raw meal rows covering at least `coverage_start(today)`."""
+        since = coverage_start(self._today(user_id))
+        with self._lock:
+            self._forget_user(user_id)
+            for meal in meals:
+                self._apply(user_id, meal.get("id"), _meal_day(meal.get("logged_at")), _contribution(meal))
+            self._coverage[user_id] = since
+
+    def rebuild(self, meals):
+        """Replace all rollups with totals recomputed from raw meal rows."""
+        by_user = {}
+        for meal in meals:
+            by_user.setdefault(meal["user_id"], []).append(meal)
+        with self._lock:
+            self._rollups.clear()
+            self._meals.clear()
+            self._coverage.clear()
+        for user_id, user_meals in by_user.items():
+            self.load_user(user_id, user_meals)
+
+    def reconcile(self, meals) -> list:
+        """Compare rollups against raw meal rows; returns (user_id, period, stored, expected) mismatches."""
+        expected = RollupStore(today=self.today, user_today=self.user_today)
+        expected.rebuild(meals)
+        mismatches = []
+        with self._lock:
+            keys = set(self._rollups) | {
+                key for key in expected._rollups if key[0] in self._coverage
+            }
+            for key in sorted(keys, key=str):
+                stored = self._rollups.get(key, Rollup()).as_tuple()
+                fresh = expected._rollups.get(key, Rollup()).as_tuple()
+                if stored != fresh:
+                    mismatches.append((key[0], key[1], stored, fresh))
+        return mismatches
+
+    def daily_totals(self, user_id) -> dict:
+        totals = self._totals(user_id, period_keys(self._today(user_id))[0])
+        del totals["meal_count"]
+        return totals
+
+    def weekly_totals(self, user_id) -> dict:
+        today = self._today(user_id)
+        totals = self._totals(user_id, period_keys(today)[1])
+        totals["days_elapsed"] = today.weekday() + 1
+        return totals
+
+    def monthly_totals(self, user_id, month: int = None, year: int = None) -> dict:
+        today = self._today(user_id)
+        month = month or today.month
+        year = year or today.year
+        days_in_month = calendar.monthrange(year, month)[1]
+        if (year, month) == (today.year, today.month):
+            days_elapsed = today.day
+        elif (year, month) < (today.year, today.month):
+            days_elapsed = days_in_month
+        else:
+            days_elapsed = 0
+
+        totals = self._totals(user_id, ("month", f"{year}-{month:02d}"))
+        totals.update(
+            month=month, year=year, days_in_month=days_in_month, days_elapsed=days_elapsed
+        )
+        return totals
+
+    def covers(self, user_id, month: int = None, year: int = None) -> bool:
+        today = self._today(user_id)
+        since = self._coverage.get(user_id)
+        if since is None and self.loader is not None:
+            self.load_user(user_id, self.loader(user_id, coverage_start(today)))
+            since = self._coverage[user_id]
+        if since is None or since > coverage_start(today):
+            return False
+        if month is None and year is None:
+            return True
+        return since <= date(year or today.year, month or today.month, 1)
+
+    def bind(self, context_variables: dict) -> dict:
+        """Return a copy of context_variables with rollup-backed reads and delta-applying writes."""
+        bound = dict(context_variables)
+        reads = {
+            "get_user_today_macros": self.daily_totals,
+            "get_weekly_consumption": self.weekly_totals,
+            "get_monthly_consumption": self.monthly_totals,
+        }
+        for name, read in reads.items():
+            if name in context_variables:
+                bound[name] = self._read_through(context_variables[name], read)
+        for name, write in (
+            ("log_meal", self._after_log),
+            ("update_meal", self._after_update),
+            ("delete_meal", self._after_delete),
+            ("apply_meal_batch", self._after_batch),
+        ):
+            if name in context_variables:
+                bound[name] = self._write_through(context_variables[name], write)
+        bound["rollups"] = self
+        return bound
+
+    def _read_through(self, fn, read):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_read(user_id, *args, **kwargs):
+                if self.covers(user_id, *args, **kwargs):
+                    return read(user_id, *args, **kwargs)
+                return await fn(user_id, *args, **kwargs)
+
+            return async_read
+
+        @wraps(fn)
+        def rollup_read(user_id, *args, **kwargs):
+            if self.covers(user_id, *args, **kwargs):
+                return read(user_id, *args, **kwargs)
+            return fn(user_id, *args, **kwargs)
+
+        return rollup_read
+
+    def _write_through(self, fn, after):
+        try:
+            signature = inspect.signature(fn)
+        except (TypeError, ValueError):
+            signature = None
+
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_write(*args, **kwargs):
+                result = await fn(*args, **kwargs)
+                after(result, _arguments(signature, args, kwargs))
+                return result
+
+            return async_write
+
+        @wraps(fn)
+        def write(*args, **kwargs):
+            result = fn(*args, **kwargs)
+            after(result, _arguments(signature, args, kwargs))
+            return result
+
+        return write
+
+    def _after_log(self, result, arguments):
+        user_id = arguments.get("user_id")
+        with self._lock:
+            if user_id not in self._coverage:
+                return
+            meal_id = _meal_id(result)
+            if meal_id is None:
+                # Without an id a later update or delete can't be applied; serve this
+                # user from the original callables until they are loaded again.
+                self._forget_user(user_id)
+                return
+            self._apply(user_id, meal_id, self._today(user_id), _contribution(arguments))
+
+    def _after_update(self, result, arguments):
+        meal_id = arguments.get("meal_id")
+        with self._lock:
+            if meal_id not in self._meals:
+                return
+            user_id, day, old = self._meals[meal_id]
+            self._apply(user_id, meal_id, day, old, sign=-1)
+            self._apply(user_id, meal_id, day, _contribution(arguments))
+
+    def _after_delete(self, result, arguments):
+        meal_id = arguments.get("meal_id")
+        with self._lock:
+            if meal_id in self._meals:
+                user_id, day, old = self._meals[meal_id]
+                self._apply(user_id, meal_id, day, old, sign=-1)
+
+    def _after_batch(self, result, arguments):
+        user_id = arguments.get("user_id")
+        logs = arguments.get("logs") or ()
+        for update in arguments.get("updates") or ():
+            self._after_update(None, update)
+        for meal_id in arguments.get("deletes") or ():
+            self._after_delete(None, {"meal_id": meal_id})
+        with self._lock:
+            if user_id not in self._coverage or not logs:
+                return
+            meal_ids = [_meal_id(meal_id) for meal_id in result or ()]
+            if len(meal_ids) != len(logs) or None in meal_ids:
+                self._forget_user(user_id)
+                return
+            today = self._today(user_id)
+            for meal_id, log in zip(meal_ids, logs):
+                self._apply(user_id, meal_id, today, _contribution(log))
+
+    def _today(self, user_id) -> date:
+        return self.user_today(user_id) if self.user_today is not None else self.today()
+
+    def _apply(self, user_id, meal_id, day: date, contribution: tuple, sign: int = 1):
+        for period in period_keys(day):
+            self._rollups.setdefault((user_id, period), Rollup()).apply(contribution, sign)
+        if meal_id is not None:
+            if sign > 0:
+                self._meals[meal_id] = (user_id, day, contribution)
+            else:
+                self._meals.pop(meal_id, None)
+
+    def _totals(self, user_id, period) -> dict:
+        rollup = self._rollups.get((user_id, period))
+        return (rollup or Rollup()).totals()
+
+    def _forget_user(self, user_id):
+        for key in [key for key in self._rollups if key[0] == user_id]:
+            del self._rollups[key]
+        for meal_id in [m for m, (owner, _, _) in self._meals.items() if owner == user_id]:
+            del self._meals[meal_id]
+        self._coverage.pop(user_id, None)
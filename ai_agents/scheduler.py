@@ -0,0 +1,332 @@
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from ai_agents.history import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def _retry_after_header(error) -> float:
+    """Seconds from an API error's retry-after headers, or None if absent."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def merge_messages(messages: list) -> dict:
+    """Combine a burst of user messages into one, keeping every line of text and every image."""
+    if len(messages) == 1:
+        return messages[0]
+    texts = []
+    attachments = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            texts.extend(part["text"] for part in content if part.get("type") == "text" and part.get("text"))
+            attachments.extend(part for part in content if part.get("type") != "text")
+        elif content:
+            texts.append(content)
+    text = "\n".join(texts)
+    if not attachments:
+        return {"role": "user", "content": text}
+    return {"role": "user", "content": [{"type": "text", "text": text}] + attachments}
+
+
+class TokenBucket:
+    """A budget of `capacity` units per `period` seconds, refilled continuously.
+
+    `reserve()` always succeeds and may leave the bucket in debt; the
+    returned delay is how long the caller must wait for its share, so
+    concurrent callers are served in the order they reserved.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def empty(self):
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RateLimiter:
+    """Client-side OpenAI RPM/TPM budget with 429 back-off for Swarm and AsyncSwarm.
+
+    `install(swarm_client)` wraps `get_chat_completion`: each completion
+    reserves one request and its estimated tokens (prompt plus
+    `max_completion_tokens`) and waits until both budgets allow it. Once
+    usage is known the estimate is corrected. A 429 pauses every caller
+    for the server's retry-after (or an exponential back-off) and the
+    request is retried up to `max_retries` times.
+
+    It stacks with ModelRouter, PromptAssembler and Tracer in any order.
+    Install it before ModelRouter so escalations are budgeted too, and
+    build the OpenAI client with `max_retries=0` so the SDK doesn't retry
+    behind the limiter's back.
+    """
+
+    def __init__(
+        self,
+        rpm: int = 500,
+        tpm: int = 200_000,
+        period: float = 60.0,
+        max_completion_tokens: int = 500,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        clock=time.monotonic,
+    ):
+        self.requests = TokenBucket(rpm, period, clock)
+        self.tokens = TokenBucket(tpm, period, clock)
+        self.max_completion_tokens = max_completion_tokens
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.clock = clock
+        self.paused_until = 0.0
+        self.counts = Counter()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def estimate(self, agent, history: list) -> int:
+        messages = list(history)
+        if isinstance(agent.instructions, str):
+            messages.append({"role": "system", "content": agent.instructions})
+        return estimate_tokens(messages) + self.max_completion_tokens
+
+    def reserve(self, tokens: int) -> float:
+        """Claim one request and `tokens`; return the seconds to wait before sending it."""
+        with self._lock:
+            delay = max(
+                self.requests.reserve(1),
+                self.tokens.reserve(tokens),
+                self.paused_until - self.clock(),
+                0.0,
+            )
+            self.counts["requests"] += 1
+            if delay:
+                self.counts["delayed"] += 1
+                self.waited += delay
+            return delay
+
+    def settle(self, estimated: int, completion):
+        usage = getattr(completion, "usage", None)
+        if usage is None:
+            return
+        with self._lock:
+            self.tokens.refund(estimated - usage.total_tokens)
+
+    def back_off(self, error, attempt: int) -> float:
+        """Pause all callers after a 429; return the delay, or None if `error` shouldn't be retried."""
+        if getattr(error, "status_code", None) != 429 or attempt >= self.max_retries:
+            return None
+        delay = _retry_after_header(error)
+        if delay is None:
+            delay = self.backoff * 2 ** attempt
+        with self._lock:
+            self.paused_until = max(self.paused_until, self.clock() + delay)
+            self.requests.empty()
+            self.counts["rate_limited"] += 1
+        logger.warning(f"OpenAI rate limit hit; pausing requests for {delay:.2f}s (attempt {attempt + 1})")
+        return delay
+
+    def install(self, swarm_client):
+        """Budget `get_chat_completion` on a Swarm or AsyncSwarm instance."""
+        get_chat_completion = swarm_client.get_chat_completion
+        signature = inspect.signature(get_chat_completion)
+
+        if inspect.iscoroutinefunction(get_chat_completion):
+            @wraps(get_chat_completion)
+            async def limited(*args, **kwargs):
+                arguments = signature.bind(*args, **kwargs).arguments
+                estimated = self.estimate(arguments["agent"], arguments["history"])
+                attempt = 0
+                while True:
+                    # A retry reuses the first attempt's token reservation.
+                    delay = self.reserve(estimated if attempt == 0 else 0)
+                    if delay:
+                        await asyncio.sleep(delay)
+                    try:
+                        completion = await get_chat_completion(**arguments)
+                    except Exception as e:
+                        if self.back_off(e, attempt) is None:
+                            raise
+                        attempt += 1
+                        continue
+                    self.settle(estimated, completion)
+                    return completion
+        else:
+            @wraps(get_chat_completion)
+            def limited(*args, **kwargs):
+                arguments = signature.bind(*args, **kwargs).arguments
+                estimated = self.estimate(arguments["agent"], arguments["history"])
+                attempt = 0
+                while True:
+                    # A retry reuses the first attempt's token reservation.
+                    delay = self.reserve(estimated if attempt == 0 else 0)
+                    if delay:
+                        time.sleep(delay)
+                    try:
+                        completion = get_chat_completion(**arguments)
+                    except Exception as e:
+                        if self.back_off(e, attempt) is None:
+                            raise
+                        attempt += 1
+                        continue
+                    self.settle(estimated, completion)
+                    return completion
+
+        swarm_client.get_chat_completion = limited
+        return swarm_client
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.counts["requests"],
+                "delayed": self.counts["delayed"],
+                "rate_limited": self.counts["rate_limited"],
+                "waited_s": round(self.waited, 3),
+            }
+
+
+class _UserQueue:
+    __slots__ = ("messages", "futures", "first_at", "last_at", "arrived", "worker")
+
+    def __init__(self):
+        self.messages = []
+        self.futures = []
+        self.first_at = 0.0
+        self.last_at = 0.0
+        self.arrived = asyncio.Event()
+        self.worker = None
+
+
+class ChatScheduler:
+    """Per-user debounce and serialization in front of the agent run.
+
+    `handle(key, message)` is the app's turn coroutine: load the user's
+    history, append `message`, run the agent, send the reply, and return
+    whatever `submit()` callers should get back.
+
+        scheduler = ChatScheduler(handle_turn, debounce=1.5)
+        reply = await scheduler.submit(chat_id, {"role": "user", "content": text})
+
+    Messages from one user that arrive within `debounce` seconds of each
+    other are merged (see `merge_messages`) into a single turn, which
+    starts at most `max_delay` seconds after the first of them. A user's
+    turns never overlap: messages sent while a turn is running become the
+    next turn. Every message in a merged turn resolves to that turn's result.
+    """
+
+    def __init__(self, handle, debounce: float = 1.5, max_delay: float = 5.0):
+        self.handle = handle
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.counts = Counter()
+        self.largest_burst = 0
+        self._queues = {}
+
+    async def submit(self, key, message: dict):
+        loop = asyncio.get_running_loop()
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _UserQueue()
+        now = loop.time()
+        if not queue.messages:
+            queue.first_at = now
+        queue.last_at = now
+        future = loop.create_future()
+        queue.messages.append(message)
+        queue.futures.append(future)
+        queue.arrived.set()
+        self.counts["messages"] += 1
+        if queue.worker is None:
+            queue.worker = asyncio.create_task(self._work(key, queue))
+        return await future
+
+    async def drain(self):
+        """Wait until every queued message has been handled."""
+        while self._queues:
+            await asyncio.gather(
+                *(queue.worker for queue in list(self._queues.values()) if queue.worker),
+                return_exceptions=True,
+            )
+
+    async def _work(self, key, queue: _UserQueue):
+        try:
+            while queue.messages:
+                await self._wait_for_quiet(queue)
+                messages, futures = queue.messages, queue.futures
+                queue.messages, queue.futures = [], []
+                self.counts["turns"] += 1
+                self.largest_burst = max(self.largest_burst, len(messages))
+                try:
+                    result = await self.handle(key, merge_messages(messages))
+                except Exception as e:
+                    self.counts["errors"] += 1
+                    logger.exception(f"Turn failed for {key}")
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for future in futures:
+                        if not future.done():
+                            future.set_result(result)
+        finally:
+            queue.worker = None
+            if not queue.messages:
+                self._queues.pop(key, None)
+
+    async def _wait_for_quiet(self, queue: _UserQueue):
+        loop = asyncio.get_running_loop()
+        while True:
+            deadline = min(queue.last_at + self.debounce, queue.first_at + self.max_delay)
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            queue.arrived.clear()
+            try:
+                await asyncio.wait_for(queue.arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    def stats(self) -> dict:
+        messages = self.counts["messages"]
+        turns = self.counts["turns"]
+        return {
+            "messages": messages,
+            "turns": turns,
+            "coalesced": messages - turns - sum(len(q.messages) for q in self._queues.values()),
+            "largest_burst": self.largest_burst,
+            "errors": self.counts["errors"],
+            "active_users": len(self._queues),
+        }
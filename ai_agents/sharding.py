@@ -0,0 +1,423 @@
+import asyncio
+import bisect
+import hashlib
+import inspect
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerLost(RuntimeError):
+    """The shard worker died or stopped answering before finishing this update."""
+
+
+def _point(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing of keys (phone numbers) onto named nodes.
+
+    Each node owns `vnodes` points on the ring, so adding or removing one of
+    N nodes moves about 1/N of the keys and leaves the rest where they were.
+    Hashes are stable across processes and restarts.
+    """
+
+    def __init__(self, nodes: list = (), vnodes: int = 128):
+        self.vnodes = vnodes
+        self.nodes = []
+        self._points = []
+        self._owners = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for i in range(self.vnodes):
+            point = _point(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str):
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def node_for(self, key: str) -> str:
+        if not self._points:
+            raise LookupError("hash ring has no nodes")
+        index = bisect.bisect(self._points, _point(key)) % len(self._points)
+        return self._owners[index]
+
+
+async def _serve(shard: str, handle, inbox, outbox, heartbeat_interval: float):
+    loop = asyncio.get_running_loop()
+    is_async = inspect.iscoroutinefunction(handle)
+    tails = {}
+    counts = Counter()
+    busy = 0.0
+
+    async def process(seq: int, key: str, payload, previous):
+        nonlocal busy
+        if previous is not None:
+            await asyncio.wait([previous])
+        start = time.perf_counter()
+        try:
+            if is_async:
+                result = handle(key, payload)
+            else:
+                # Off the event loop, so a blocking turn can't stall heartbeats or other users.
+                result = await asyncio.to_thread(handle, key, payload)
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            counts["errors"] += 1
+            outbox.send(("result", shard, seq, False, f"{type(e).__name__}: {e}"))
+        else:
+            outbox.send(("result", shard, seq, True, result))
+        finally:
+            busy += time.perf_counter() - start
+            counts["processed"] += 1
+            if tails.get(key) is asyncio.current_task():
+                del tails[key]
+
+    async def heartbeat():
+        while True:
+            outbox.send(("heartbeat", shard, os.getpid(), {
+                "processed": counts["processed"],
+                "errors": counts["errors"],
+                "active_users": len(tails),
+                "busy_s": round(busy, 3),
+            }))
+            await asyncio.sleep(heartbeat_interval)
+
+    beat = asyncio.create_task(heartbeat())
+    while True:
+        message = await loop.run_in_executor(None, inbox.get)
+        if message[0] == "stop":
+            break
+        _, seq, key, payload = message
+        tails[key] = asyncio.create_task(process(seq, key, payload, tails.get(key)))
+    if tails:
+        await asyncio.wait(list(tails.values()))
+    beat.cancel()
+
+
+def _worker_main(shard: str, factory, inbox, outbox, heartbeat_interval: float):
+    handle = factory(shard)
+    asyncio.run(_serve(shard, handle, inbox, outbox, heartbeat_interval))
+
+
+class _Shard:
+    __slots__ = (
+        "name", "process", "inbox", "outbox", "last_heartbeat", "report", "restarts", "stopping", "stop_sent",
+    )
+
+    def __init__(self, name: str):
+        self.name = name
+        self.process = None
+        self.inbox = None
+        self.outbox = None
+        self.last_heartbeat = 0.0
+        self.report = {}
+        self.restarts = 0
+        self.stopping = False
+        self.stop_sent = False
+
+
+class ShardSupervisor:
+    """Runs agent turns in worker processes with sticky per-user routing.
+
+    `factory(shard_name)` runs once in each worker and returns its
+    `handle(key, payload)` function (sync or async; a sync one runs in a
+    thread per update, so it must be thread-safe). It is the place to
+    build per-process state that should stay warm, such as the data layer,
+    TurnCache/RollupStore and history. Under the default "spawn" start
+    method `factory` must be a module-level function and payloads must be
+    picklable.
+
+        supervisor = ShardSupervisor(make_handler, workers=4).start()
+        future = supervisor.submit(phone_number, update)   # concurrent.futures.Future
+        reply = await asyncio.wrap_future(future)
+
+    Keys are placed with a HashRing. Each worker runs one user's updates
+    strictly in order and different users concurrently. A monitor thread
+    restarts workers that exit or miss heartbeats for `heartbeat_timeout`
+    seconds; their unfinished updates fail with WorkerLost rather than
+    being replayed, since turns write meals. `resize()` changes the worker
+    count; a user whose shard moves keeps going to the old shard until
+    their in-flight updates finish, so ordering holds across rebalances.
+    """
+
+    def __init__(
+        self,
+        factory,
+        workers: int = os.cpu_count() or 2,
+        vnodes: int = 128,
+        heartbeat_interval: float = 1.0,
+        heartbeat_timeout: float = 10.0,
+        start_method: str = "spawn",
+    ):
+        self.factory = factory
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.ring = HashRing(vnodes=vnodes)
+        self.shards = {}
+        self.counts = Counter()
+        self.latency = Counter()
+        self._context = multiprocessing.get_context(start_method)
+        self._pending = {}
+        self._key_routes = {}
+        self._closing = []
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._running = False
+        self._threads = []
+        self._initial_workers = workers
+
+    def start(self):
+        self._running = True
+        for i in range(self._initial_workers):
+            self._add_shard(f"shard-{i}")
+        for target in (self._collect, self._monitor):
+            thread = threading.Thread(target=target, name=f"shard-{target.__name__.strip('_')}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def shard_for(self, key: str) -> str:
+        with self._lock:
+            return self._route(key)
+
+    def submit(self, key: str, payload) -> Future:
+        future = Future()
+        with self._lock:
+            shard = self._route(key)
+            self._seq += 1
+            seq = self._seq
+            self._pending[seq] = (future, key, shard, time.perf_counter())
+            _, count = self._key_routes.get(key, (shard, 0))
+            self._key_routes[key] = (shard, count + 1)
+            self.counts[(shard, "submitted")] += 1
+            self.shards[shard].inbox.put(("update", seq, key, payload))
+        return future
+
+    def resize(self, workers: int):
+        """Grow or shrink to `workers` shards.
+
+        A removed shard leaves the ring at once but keeps serving users with
+        updates still in flight on it; it is stopped once those drain.
+        """
+        with self._lock:
+            active = [s for s in self.shards.values() if not s.stopping]
+            names = {s.name for s in self.shards.values()}
+            next_id = 0
+            while len(active) < workers:
+                while f"shard-{next_id}" in names:
+                    next_id += 1
+                active.append(self._add_shard(f"shard-{next_id}"))
+                names.add(f"shard-{next_id}")
+            for shard in active[workers:]:
+                shard.stopping = True
+                self.ring.remove(shard.name)
+        logger.info(f"Resharded to {workers} workers: {self.ring.nodes}")
+
+    def stop(self, timeout: float = 10.0):
+        with self._lock:
+            self._running = False
+            for shard in self.shards.values():
+                shard.stopping = True
+                if not shard.stop_sent:
+                    shard.stop_sent = True
+                    shard.inbox.put(("stop",))
+        deadline = time.monotonic() + timeout
+        for shard in list(self.shards.values()):
+            shard.process.join(max(0.0, deadline - time.monotonic()))
+            if shard.process.is_alive():
+                shard.process.terminate()
+        for thread in self._threads:
+            thread.join(timeout)
+        with self._lock:
+            self._fail_pending(lambda shard: True, "supervisor stopped")
+
+    def stats(self) -> dict:
+        with self._lock:
+            shards = {}
+            for name, shard in self.shards.items():
+                submitted = self.counts[(name, "submitted")]
+                completed = self.counts[(name, "completed")]
+                shards[name] = {
+                    "pid": shard.process.pid if shard.process else None,
+                    "alive": bool(shard.process and shard.process.is_alive()),
+                    "submitted": submitted,
+                    "completed": completed,
+                    "errors": self.counts[(name, "errors")],
+                    "in_flight": submitted - completed - self.counts[(name, "lost")],
+                    "restarts": shard.restarts,
+                    "mean_latency_ms": (
+                        round(self.latency[name] / completed * 1000, 2) if completed else 0.0
+                    ),
+                    "users": sum(1 for route, _ in self._key_routes.values() if route == name),
+                    **shard.report,
+                }
+            loads = [s["submitted"] for s in shards.values() if s["alive"]]
+            mean = sum(loads) / len(loads) if loads else 0
+            return {
+                "shards": shards,
+                "skew": round(max(loads) / mean, 3) if mean else 0.0,
+                "pending": len(self._pending),
+            }
+
+    def _route(self, key: str) -> str:
+        route = self._key_routes.get(key)
+        if route and route[1] > 0:
+            return route[0]
+        return self.ring.node_for(key)
+
+    def _add_shard(self, name: str) -> _Shard:
+        shard = self.shards.get(name) or _Shard(name)
+        shard.stopping = shard.stop_sent = False
+        self.shards[name] = shard
+        self._spawn(shard)
+        self.ring.add(name)
+        return shard
+
+    def _spawn(self, shard: _Shard):
+        """Start (or restart) the shard's worker. Caller holds the lock."""
+        if shard.inbox is not None:
+            shard.inbox.cancel_join_thread()
+            shard.inbox.close()
+        if shard.outbox is not None:
+            # The collector may be waiting on the old pipe; it closes it on its next pass.
+            self._closing.append(shard.outbox)
+        shard.inbox = self._context.Queue()
+        shard.outbox, sender = self._context.Pipe(duplex=False)
+        shard.process = self._context.Process(
+            target=_worker_main,
+            args=(shard.name, self.factory, shard.inbox, sender, self.heartbeat_interval),
+            name=f"ai-agents-{shard.name}",
+            daemon=True,
+        )
+        shard.process.start()
+        sender.close()
+        shard.last_heartbeat = time.monotonic()
+
+    def _collect(self):
+        # One pipe per worker: a killed worker can only break its own channel.
+        while True:
+            with self._lock:
+                closing, self._closing = self._closing, []
+                outboxes = {s.outbox: s for s in self.shards.values() if s.outbox is not None}
+                if not (self._running or outboxes):
+                    return
+            for outbox in closing:
+                outbox.close()
+            for outbox in wait(list(outboxes), timeout=self.heartbeat_interval):
+                try:
+                    message = outbox.recv()
+                except (EOFError, OSError):
+                    self._exited(outboxes[outbox], outbox)
+                else:
+                    self._handle(message)
+
+    def _handle(self, message: tuple):
+        if message[0] == "heartbeat":
+            _, shard, pid, report = message
+            with self._lock:
+                if shard in self.shards and self.shards[shard].process.pid == pid:
+                    self.shards[shard].last_heartbeat = time.monotonic()
+                    self.shards[shard].report = report
+            return
+
+        _, shard, seq, ok, value = message
+        with self._lock:
+            entry = self._pending.pop(seq, None)
+            if entry is None:
+                return
+            future, key, _, started = entry
+            self._release(key)
+            self.counts[(shard, "completed")] += 1
+            self.latency[shard] += time.perf_counter() - started
+            if not ok:
+                self.counts[(shard, "errors")] += 1
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(RuntimeError(value))
+
+    def _exited(self, shard: _Shard, outbox):
+        with self._lock:
+            if shard.outbox is not outbox:
+                return
+            shard.outbox = None
+            outbox.close()
+            if shard.stopping:
+                self._fail_pending(lambda name: name == shard.name, f"{shard.name} exited while draining")
+                del self.shards[shard.name]
+
+    def _monitor(self):
+        while self._running:
+            time.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            with self._lock:
+                if not self._running:
+                    return
+                for shard in list(self.shards.values()):
+                    if shard.stopping:
+                        self._retire(shard)
+                        continue
+                    dead = not shard.process.is_alive()
+                    silent = now - shard.last_heartbeat > self.heartbeat_timeout
+                    if not (dead or silent):
+                        continue
+                    logger.warning(
+                        f"Restarting {shard.name} (pid {shard.process.pid}): "
+                        f"{'exited' if dead else 'no heartbeat'}"
+                    )
+                    if not dead:
+                        shard.process.kill()
+                    shard.restarts += 1
+                    self._fail_pending(lambda name, lost=shard.name: name == lost, f"{shard.name} restarted")
+                    self._spawn(shard)
+
+    def _retire(self, shard: _Shard):
+        """Stop a shard removed by resize() once nothing is in flight on it. Caller holds the lock."""
+        if not shard.stop_sent and not any(entry[2] == shard.name for entry in self._pending.values()):
+            shard.stop_sent = True
+            shard.inbox.put(("stop",))
+
+    def _fail_pending(self, matches, reason: str):
+        """Fail every pending update on a shard matching `matches(shard_name)`. Caller holds the lock."""
+        lost = [(seq, entry) for seq, entry in self._pending.items() if matches(entry[2])]
+        for seq, (future, key, shard, _) in lost:
+            del self._pending[seq]
+            self._release(key)
+            self.counts[(shard, "lost")] += 1
+            if not future.done():
+                future.set_exception(WorkerLost(reason))
+
+    def _release(self, key: str):
+        shard, count = self._key_routes[key]
+        if count > 1:
+            self._key_routes[key] = (shard, count - 1)
+        else:
+            del self._key_routes[key]
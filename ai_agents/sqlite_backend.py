@@ -0,0 +1,751 @@
+import calendar
+import logging
+import queue
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DAILY_GOAL = 2000
+DEFAULT_TDEE = 2000
+MIN_DAILY_CALORIES = 1200
+KCAL_PER_KG = 7700
+TREND_WINDOW_DAYS = 28
+
+PROFILE_FIELDS = ("first_name", "dietary_preferences", "timezone", "daily_goal")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    phone_number TEXT NOT NULL,
+    first_name TEXT NOT NULL DEFAULT '',
+    daily_goal INTEGER NOT NULL DEFAULT 2000,
+    dietary_preferences TEXT NOT NULL DEFAULT '',
+    timezone TEXT NOT NULL DEFAULT 'UTC',
+    created_at TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_phone ON users (phone_number);
+
+CREATE TABLE IF NOT EXISTS meals (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    logged_at TEXT NOT NULL,
+    food_items TEXT NOT NULL,
+    total_calories INTEGER NOT NULL,
+    protein_g REAL NOT NULL DEFAULT 0,
+    carbs_g REAL NOT NULL DEFAULT 0,
+    sugar_g REAL NOT NULL DEFAULT 0,
+    health_rating INTEGER NOT NULL DEFAULT 0,
+    image_id TEXT,
+    notes TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_meals_user_logged ON meals (user_id, logged_at);
+
+CREATE TABLE IF NOT EXISTS weight_logs (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    weight_kg REAL NOT NULL,
+    logged_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_weight_logs_user_logged ON weight_logs (user_id, logged_at);
+
+CREATE TABLE IF NOT EXISTS weight_goals (
+    user_id INTEGER PRIMARY KEY REFERENCES users (id),
+    target_weight REAL NOT NULL,
+    target_date TEXT NOT NULL,
+    tdee INTEGER
+);
+"""
+
+# Statements are module constants so each pooled connection's statement cache
+# compiles them once and reuses the prepared statement on every call.
+SELECT_USER_BY_PHONE = "SELECT * FROM users WHERE phone_number = ?"
+SELECT_USER_BY_ID = "SELECT * FROM users WHERE id = ?"
+SELECT_USER_TIMEZONE = "SELECT timezone FROM users WHERE id = ?"
+SELECT_USER_TIMEZONES = "SELECT id, timezone FROM users WHERE id IN ({placeholders})"
+INSERT_USER = "INSERT OR IGNORE INTO users (phone_number, created_at) VALUES (?, ?)"
+UPDATE_USER_GOAL = "UPDATE users SET daily_goal = ? WHERE phone_number = ?"
+INSERT_MEAL = """
+INSERT INTO meals (user_id, logged_at, food_items, total_calories, protein_g, carbs_g,
+                   sugar_g, health_rating, image_id, notes)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+UPDATE_MEAL = """
+UPDATE meals SET food_items = ?, total_calories = ?, protein_g = ?, carbs_g = ?,
+                 sugar_g = ?, health_rating = ?
+WHERE id = ?
+"""
+DELETE_MEAL = "DELETE FROM meals WHERE id = ?"
+UPDATE_USER_MEAL = """
+UPDATE meals SET food_items = ?, total_calories = ?, protein_g = ?, carbs_g = ?,
+                 sugar_g = ?, health_rating = ?
+WHERE id = ? AND user_id = ?
+"""
+DELETE_USER_MEAL = "DELETE FROM meals WHERE id = ? AND user_id = ?"
+SELECT_MEALS_BETWEEN = """
+SELECT * FROM meals WHERE user_id = ? AND logged_at >= ? AND logged_at < ?
+ORDER BY logged_at, id
+"""
+SELECT_LAST_MEAL = """
+SELECT * FROM meals WHERE user_id = ? AND logged_at >= ? AND logged_at < ?
+ORDER BY logged_at DESC, id DESC LIMIT 1
+"""
+AGGREGATE_MEALS_BETWEEN = """
+SELECT COALESCE(SUM(total_calories), 0) AS total_calories,
+       COALESCE(SUM(protein_g), 0) AS total_protein,
+       COALESCE(SUM(carbs_g), 0) AS total_carbs,
+       COALESCE(SUM(sugar_g), 0) AS total_sugar,
+       COALESCE(AVG(NULLIF(health_rating, 0)), 0) AS avg_health_rating,
+       COUNT(*) AS meal_count
+FROM meals WHERE user_id = ? AND logged_at >= ? AND logged_at < ?
+"""
+INSERT_WEIGHT = "INSERT INTO weight_logs (user_id, weight_kg, logged_at) VALUES (?, ?, ?)"
+UPSERT_WEIGHT_GOAL = """
+INSERT INTO weight_goals (user_id, target_weight, target_date, tdee) VALUES (?, ?, ?, ?)
+ON CONFLICT (user_id) DO UPDATE SET
+    target_weight = excluded.target_weight,
+    target_date = excluded.target_date,
+    tdee = COALESCE(excluded.tdee, weight_goals.tdee)
+"""
+SELECT_USERS = "SELECT * FROM users ORDER BY id"
+SELECT_LIMIT_INPUTS = """
+SELECT u.daily_goal, g.target_weight, g.target_date, g.tdee,
+       (SELECT w.weight_kg FROM weight_logs w WHERE w.user_id = u.id
+        ORDER BY w.logged_at DESC, w.id DESC LIMIT 1) AS current_weight
+FROM users u LEFT JOIN weight_goals g ON g.user_id = u.id
+WHERE u.id = ?
+"""
+
+SELECT_BULK_USERS = """
+SELECT u.*, g.target_weight, g.target_date, g.tdee,
+       (SELECT w.weight_kg FROM weight_logs w WHERE w.user_id = u.id
+        ORDER BY w.logged_at DESC, w.id DESC LIMIT 1) AS current_weight
+FROM users u LEFT JOIN weight_goals g ON g.user_id = u.id
+WHERE u.id IN ({placeholders})
+"""
+SELECT_BULK_MEALS = """
+SELECT * FROM meals WHERE user_id IN ({placeholders})
+AND logged_at >= :day_start AND logged_at < :range_end
+ORDER BY user_id, logged_at, id
+"""
+SELECT_BULK_WEIGHT_DAYS = """
+SELECT user_id, date(logged_at) AS day, AVG(weight_kg) AS weight_kg
+FROM weight_logs WHERE user_id IN ({placeholders})
+AND logged_at >= :range_start AND logged_at < :range_end
+GROUP BY user_id, day
+"""
+SELECT_BULK_INTAKE_DAYS = """
+SELECT user_id, date(logged_at) AS day, SUM(total_calories) AS calories
+FROM meals WHERE user_id IN ({placeholders})
+AND logged_at >= :range_start AND logged_at < :range_end
+GROUP BY user_id, day
+"""
+SELECT_BULK_GOALS = """
+SELECT user_id, target_weight, target_date FROM weight_goals WHERE user_id IN ({placeholders})
+"""
+SELECT_DAILY_BUCKETS = """
+SELECT user_id, date(logged_at) AS day,
+       SUM(total_calories) AS calories, SUM(protein_g) AS protein, SUM(carbs_g) AS carbs,
+       SUM(sugar_g) AS sugar, SUM(health_rating) AS health_sum,
+       SUM(health_rating > 0) AS health_count, COUNT(*) AS meal_count
+FROM meals WHERE logged_at >= ? AND logged_at < ?
+GROUP BY user_id, day
+ORDER BY user_id, day
+"""
+
+BULK_CHUNK_SIZE = 500
+
+# column suffix -> expression summed per period in the grouped bulk query
+_BULK_SUMS = {
+    "total_calories": "total_calories",
+    "total_protein": "protein_g",
+    "total_carbs": "carbs_g",
+    "total_sugar": "sugar_g",
+    "health_sum": "health_rating",
+    "health_count": "health_rating > 0",
+    "meal_count": "1",
+}
+
+
+def _bulk_totals_sql(placeholders: str) -> str:
+    columns = ",\n       ".join(
+        f"SUM(CASE WHEN logged_at >= :{period}_start THEN {expression} ELSE 0 END) AS {period}_{name}"
+        for period in ("day", "week", "month")
+        for name, expression in _BULK_SUMS.items()
+    )
+    return (
+        f"SELECT user_id,\n       {columns}\n"
+        f"FROM meals WHERE user_id IN ({placeholders}) "
+        f"AND logged_at >= :range_start AND logged_at < :range_end\n"
+        f"GROUP BY user_id"
+    )
+
+
+def _period_totals(row, period: str) -> dict:
+    if row is None:
+        return {
+            "total_calories": 0, "total_protein": 0.0, "total_carbs": 0.0,
+            "total_sugar": 0.0, "avg_health_rating": 0, "meal_count": 0,
+        }
+    count = row[f"{period}_health_count"]
+    return {
+        "total_calories": row[f"{period}_total_calories"],
+        "total_protein": round(row[f"{period}_total_protein"], 1),
+        "total_carbs": round(row[f"{period}_total_carbs"], 1),
+        "total_sugar": round(row[f"{period}_total_sugar"], 1),
+        "avg_health_rating": round(row[f"{period}_health_sum"] / count, 1) if count else 0,
+        "meal_count": row[f"{period}_meal_count"],
+    }
+
+
+def _zone(name: str):
+    if name not in _ZONES:
+        try:
+            _ZONES[name] = ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            logger.warning(f"Unknown timezone {name!r}; using UTC")
+            _ZONES[name] = ZoneInfo("UTC")
+    return _ZONES[name]
+
+
+_ZONES = {}
+
+
+def _timestamp(moment: datetime = None, zone=None) -> str:
+    """Wall-clock time in `zone`; naive moments are taken as already local."""
+    if moment is None:
+        moment = datetime.now(zone) if zone else datetime.now()
+    elif zone and moment.tzinfo is not None:
+        moment = moment.astimezone(zone)
+    return moment.replace(tzinfo=None).isoformat(sep=" ", timespec="seconds")
+
+
+def _day_bounds(start: date, end: date) -> tuple:
+    """Half-open [start, end) range as comparable logged_at strings."""
+    return start.isoformat(), end.isoformat()
+
+
+def _round_totals(row: dict) -> dict:
+    for key in ("total_protein", "total_carbs", "total_sugar", "avg_health_rating"):
+        row[key] = round(row[key], 1)
+    return row
+
+
+def calorie_limit(daily_goal, target_weight, target_date, tdee, current_weight, today: date) -> dict:
+    """Daily limit from a weight goal (7700 kcal per kg), or the user's static goal."""
+    tdee = tdee or DEFAULT_TDEE
+    days_remaining = None
+    if target_date:
+        days_remaining = (date.fromisoformat(target_date) - today).days
+
+    if target_weight is None or current_weight is None or not days_remaining or days_remaining <= 0:
+        return {
+            "daily_limit": daily_goal or DEFAULT_DAILY_GOAL,
+            "has_weight_goal": False,
+            "current_weight": current_weight,
+            "target_weight": target_weight,
+            "target_date": target_date,
+            "days_remaining": days_remaining,
+            "tdee": tdee,
+            "daily_deficit": 0,
+        }
+
+    daily_deficit = round((current_weight - target_weight) * KCAL_PER_KG / days_remaining)
+    return {
+        "daily_limit": max(MIN_DAILY_CALORIES, tdee - daily_deficit),
+        "has_weight_goal": True,
+        "current_weight": current_weight,
+        "target_weight": target_weight,
+        "target_date": target_date,
+        "days_remaining": days_remaining,
+        "tdee": tdee,
+        "daily_deficit": daily_deficit,
+    }
+
+
+class SQLiteDataLayer:
+    """First-party implementation of the data-layer callables agents expect in context_variables.
+
+    Usage:
+
+        db = SQLiteDataLayer("health.db")
+        context_variables = {**db.context_variables(), "phone_number": phone, ...}
+
+    Connections are pooled and run in WAL mode, so readers never block the
+    single writer. Each statement is a module-level constant served from the
+    connection's prepared-statement cache, and every period total is a
+    single indexed SQL aggregation over (user_id, logged_at).
+
+    `logged_at` is stored as wall-clock time in the user's `timezone`, and
+    "today", this week and this month are the user's local ones, matching
+    the per-user schedule of DailySummaryScheduler. Pass `today` to pin the
+    date for every user (benchmarks, replays).
+    """
+
+    def __init__(self, path: str = "ai_agents.db", pool_size: int = 8, today=None):
+        self.path = path
+        self.today = today
+        if path == ":memory:":
+            pool_size = 1
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def __deepcopy__(self, memo):
+        # Swarm deep-copies context_variables; the pool must be shared, not copied.
+        return self
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, cached_statements=256
+        )
+        conn.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -65536")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection; the block runs as one transaction."""
+        conn = self._pool.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    def user_zone(self, user_id: int):
+        with self.connection() as conn:
+            row = conn.execute(SELECT_USER_TIMEZONE, (user_id,)).fetchone()
+        return _zone(row["timezone"] if row else "UTC")
+
+    def user_today(self, user_id: int) -> date:
+        """The user's local date (or the pinned `today`)."""
+        if self.today is not None:
+            return self.today()
+        return datetime.now(self.user_zone(user_id)).date()
+
+    def _zones(self, user_ids) -> dict:
+        user_ids = list(user_ids)
+        zones = {}
+        for offset in range(0, len(user_ids), BULK_CHUNK_SIZE):
+            chunk = user_ids[offset:offset + BULK_CHUNK_SIZE]
+            placeholders = ", ".join("?" for _ in chunk)
+            with self.connection() as conn:
+                zones.update(conn.execute(SELECT_USER_TIMEZONES.format(placeholders=placeholders), chunk).fetchall())
+        return {user_id: _zone(zones.get(user_id) or "UTC") for user_id in user_ids}
+
+    def _local_days(self, user_ids: list) -> dict:
+        """Group user ids by their local date: {date: [user_id, ...]}."""
+        if self.today is not None:
+            return {self.today(): list(user_ids)} if user_ids else {}
+        groups = {}
+        for user_id, zone in self._zones(user_ids).items():
+            groups.setdefault(datetime.now(zone).date(), []).append(user_id)
+        return groups
+
+    def context_variables(self) -> dict:
+        from ai_agents.weight_trends import available
+
+        callables = {
+            "get_or_create_user": self.get_or_create_user,
+            "update_user_goal": self.update_user_goal,
+            "update_user_profile": self.update_user_profile,
+            "log_meal": self.log_meal,
+            "get_user_meals_today": self.get_user_meals_today,
+            "get_user_today_macros": self.get_user_today_macros,
+            "get_last_meal": self.get_last_meal,
+            "update_meal": self.update_meal,
+            "delete_meal": self.delete_meal,
+            "apply_meal_batch": self.apply_meal_batch,
+            "log_weight": self.log_weight,
+            "set_weight_goal": self.set_weight_goal,
+            "compute_daily_calorie_limit": self.compute_daily_calorie_limit,
+            "get_weekly_consumption": self.get_weekly_consumption,
+            "get_monthly_consumption": self.get_monthly_consumption,
+        }
+        if available():
+            callables["get_weight_trend"] = self.get_weight_trend
+        return callables
+
+    # Users
+
+    def get_or_create_user(self, phone: str) -> dict:
+        with self.connection() as conn:
+            row = conn.execute(SELECT_USER_BY_PHONE, (phone,)).fetchone()
+            if row is None:
+                conn.execute(INSERT_USER, (phone, _timestamp()))
+                row = conn.execute(SELECT_USER_BY_PHONE, (phone,)).fetchone()
+        return dict(row)
+
+    def update_user_goal(self, phone: str, calories: int):
+        with self.connection() as conn:
+            conn.execute(UPDATE_USER_GOAL, (calories, phone))
+
+    def update_user_profile(self, user_id: int, **fields) -> dict:
+        unknown = set(fields) - set(PROFILE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown profile fields: {', '.join(sorted(unknown))}")
+        with self.connection() as conn:
+            if fields:
+                assignments = ", ".join(f"{name} = ?" for name in fields)
+                conn.execute(
+                    f"UPDATE users SET {assignments} WHERE id = ?", (*fields.values(), user_id)
+                )
+            return dict(conn.execute(SELECT_USER_BY_ID, (user_id,)).fetchone())
+
+    # Meals
+
+    def log_meal(
+        self,
+        user_id: int,
+        food_items: str,
+        total_calories: int,
+        image_id: str = None,
+        notes: str = "",
+        protein_g: float = 0,
+        carbs_g: float = 0,
+        sugar_g: float = 0,
+        health_rating: int = 0,
+        logged_at: datetime = None,
+    ) -> int:
+        zone = self.user_zone(user_id)
+        with self.connection() as conn:
+            cursor = conn.execute(
+                INSERT_MEAL,
+                (
+                    user_id, _timestamp(logged_at, zone), food_items, total_calories, protein_g,
+                    carbs_g, sugar_g, health_rating, image_id, notes or "",
+                ),
+            )
+        return cursor.lastrowid
+
+    def log_meals(self, meals: list) -> int:
+        """Insert many meals in one transaction; each item takes log_meal's keyword arguments."""
+        zones = self._zones({m["user_id"] for m in meals})
+        rows = [
+            (
+                m["user_id"], _timestamp(m.get("logged_at"), zones[m["user_id"]]), m["food_items"],
+                m["total_calories"], m.get("protein_g", 0), m.get("carbs_g", 0),
+                m.get("sugar_g", 0), m.get("health_rating", 0), m.get("image_id"),
+                m.get("notes") or "",
+            )
+            for m in meals
+        ]
+        with self.connection() as conn:
+            conn.executemany(INSERT_MEAL, rows)
+        return len(rows)
+
+    def update_meal(
+        self,
+        meal_id: int,
+        food_items: str,
+        total_calories: int,
+        protein_g: float = 0,
+        carbs_g: float = 0,
+        sugar_g: float = 0,
+        health_rating: int = 0,
+    ):
+        with self.connection() as conn:
+            conn.execute(
+                UPDATE_MEAL,
+                (food_items, total_calories, protein_g, carbs_g, sugar_g, health_rating, meal_id),
+            )
+
+    def delete_meal(self, meal_id: int):
+        with self.connection() as conn:
+            conn.execute(DELETE_MEAL, (meal_id,))
+
+    def apply_meal_batch(self, user_id: int, logs: list = (), updates: list = (), deletes: list = ()) -> list:
+        """Log, update and delete one user's meals in a single transaction; returns the new meal ids.
+
+        `logs` items take log_meal's keyword arguments (without user_id),
+        `updates` items take update_meal's, and `deletes` holds meal ids. If
+        any updated or deleted meal is not the user's, nothing is applied
+        and LookupError is raised.
+        """
+        meal_ids = []
+        zone = self.user_zone(user_id)
+        with self.connection() as conn:
+            for m in updates:
+                cursor = conn.execute(
+                    UPDATE_USER_MEAL,
+                    (
+                        m["food_items"], m["total_calories"], m.get("protein_g", 0), m.get("carbs_g", 0),
+                        m.get("sugar_g", 0), m.get("health_rating", 0), m["meal_id"], user_id,
+                    ),
+                )
+                if not cursor.rowcount:
+                    raise LookupError(f"Meal {m['meal_id']} not found")
+            for meal_id in deletes:
+                if not conn.execute(DELETE_USER_MEAL, (meal_id, user_id)).rowcount:
+                    raise LookupError(f"Meal {meal_id} not found")
+            for m in logs:
+                cursor = conn.execute(
+                    INSERT_MEAL,
+                    (
+                        user_id, _timestamp(m.get("logged_at"), zone), m["food_items"],
+                        m["total_calories"], m.get("protein_g", 0), m.get("carbs_g", 0),
+                        m.get("sugar_g", 0), m.get("health_rating", 0), m.get("image_id"),
+                        m.get("notes") or "",
+                    ),
+                )
+                meal_ids.append(cursor.lastrowid)
+        return meal_ids
+
+    def get_user_meals_today(self, user_id: int) -> list:
+        today = self.user_today(user_id)
+        return self.meals_between(user_id, today, today + timedelta(days=1))
+
+    def get_last_meal(self, user_id: int):
+        today = self.user_today(user_id)
+        with self.connection() as conn:
+            row = conn.execute(
+                SELECT_LAST_MEAL, (user_id, *_day_bounds(today, today + timedelta(days=1)))
+            ).fetchone()
+        return dict(row) if row else None
+
+    def meals_between(self, user_id: int, start: date, end: date) -> list:
+        """Raw meal rows with start <= logged_at < end; also serves RollupStore's loader."""
+        with self.connection() as conn:
+            rows = conn.execute(SELECT_MEALS_BETWEEN, (user_id, *_day_bounds(start, end))).fetchall()
+        return [dict(row) for row in rows]
+
+    def meals_since(self, user_id: int, since: date) -> list:
+        return self.meals_between(user_id, since, self.user_today(user_id) + timedelta(days=1))
+
+    # Aggregates
+
+    def totals_between(self, user_id: int, start: date, end: date) -> dict:
+        with self.connection() as conn:
+            row = conn.execute(AGGREGATE_MEALS_BETWEEN, (user_id, *_day_bounds(start, end))).fetchone()
+        return _round_totals(dict(row))
+
+    def get_user_today_macros(self, user_id: int) -> dict:
+        today = self.user_today(user_id)
+        totals = self.totals_between(user_id, today, today + timedelta(days=1))
+        del totals["meal_count"]
+        return totals
+
+    def get_weekly_consumption(self, user_id: int) -> dict:
+        today = self.user_today(user_id)
+        start = today - timedelta(days=today.weekday())
+        totals = self.totals_between(user_id, start, today + timedelta(days=1))
+        totals["days_elapsed"] = today.weekday() + 1
+        return totals
+
+    def get_monthly_consumption(self, user_id: int, month: int = None, year: int = None) -> dict:
+        today = self.user_today(user_id)
+        month = month or today.month
+        year = year or today.year
+        days_in_month = calendar.monthrange(year, month)[1]
+        start = date(year, month, 1)
+        end = start + timedelta(days=days_in_month)
+
+        if (year, month) == (today.year, today.month):
+            days_elapsed = today.day
+        elif (year, month) < (today.year, today.month):
+            days_elapsed = days_in_month
+        else:
+            days_elapsed = 0
+
+        totals = self.totals_between(user_id, start, end)
+        totals.update(
+            month=month, year=year, days_in_month=days_in_month, days_elapsed=days_elapsed
+        )
+        return totals
+
+    # Bulk reads for batch jobs
+
+    def list_users(self) -> list:
+        with self.connection() as conn:
+            return [dict(row) for row in conn.execute(SELECT_USERS)]
+
+    def bulk_daily_data(self, user_ids: list, day: date = None) -> dict:
+        """Everything get_daily_data reads, for many users, in three grouped queries per chunk.
+
+        Returns {user_id: {"user", "meals", "daily", "limit_data", "weekly", "monthly", "trend"}}
+        with each value shaped like the corresponding single-user callable;
+        "trend" is None when NumPy is not installed. Without `day`, each user
+        is read for their own local date.
+        """
+        from ai_agents.weight_trends import available
+
+        if day is None:
+            data = {}
+            for local_day, ids in self._local_days(user_ids).items():
+                data.update(self.bulk_daily_data(ids, local_day))
+            return data
+        trends = self.bulk_weight_trends(user_ids, day) if available() else {}
+        week_start = day - timedelta(days=day.weekday())
+        month_start = day.replace(day=1)
+        days_in_month = calendar.monthrange(day.year, day.month)[1]
+        params = {
+            "day_start": day.isoformat(),
+            "week_start": week_start.isoformat(),
+            "month_start": month_start.isoformat(),
+            "range_start": min(week_start, month_start).isoformat(),
+            "range_end": (day + timedelta(days=1)).isoformat(),
+        }
+
+        data = {}
+        for offset in range(0, len(user_ids), BULK_CHUNK_SIZE):
+            chunk = user_ids[offset:offset + BULK_CHUNK_SIZE]
+            placeholders = ", ".join(f":u{i}" for i in range(len(chunk)))
+            chunk_params = {**params, **{f"u{i}": user_id for i, user_id in enumerate(chunk)}}
+
+            with self.connection() as conn:
+                users = conn.execute(
+                    SELECT_BULK_USERS.format(placeholders=placeholders), chunk_params
+                ).fetchall()
+                meals = conn.execute(
+                    SELECT_BULK_MEALS.format(placeholders=placeholders), chunk_params
+                ).fetchall()
+                totals = {
+                    row["user_id"]: row
+                    for row in conn.execute(_bulk_totals_sql(placeholders), chunk_params)
+                }
+
+            meals_by_user = {}
+            for meal in meals:
+                meals_by_user.setdefault(meal["user_id"], []).append(dict(meal))
+
+            for row in users:
+                user_id = row["id"]
+                user_totals = totals.get(user_id)
+                daily = _period_totals(user_totals, "day")
+                del daily["meal_count"]
+                weekly = _period_totals(user_totals, "week")
+                weekly["days_elapsed"] = day.weekday() + 1
+                monthly = _period_totals(user_totals, "month")
+                monthly.update(
+                    month=day.month, year=day.year,
+                    days_in_month=days_in_month, days_elapsed=day.day,
+                )
+                user = {key: row[key] for key in row.keys() if key not in (
+                    "target_weight", "target_date", "tdee", "current_weight",
+                )}
+                data[user_id] = {
+                    "user": user,
+                    "meals": meals_by_user.get(user_id, []),
+                    "daily": daily,
+                    "limit_data": calorie_limit(
+                        row["daily_goal"], row["target_weight"], row["target_date"],
+                        row["tdee"], row["current_weight"], day,
+                    ),
+                    "weekly": weekly,
+                    "monthly": monthly,
+                    "trend": trends.get(user_id),
+                }
+        return data
+
+    def bulk_trend_inputs(self, user_ids: list, day: date = None, days: int = TREND_WINDOW_DAYS) -> dict:
+        """Daily weights, daily calorie totals and goals over the `days` ending on `day`.
+
+        Returns {user_id: {"weights": [(date, kg)], "intake": [(date, calories)],
+        "target_weight", "target_date"}}; several weigh-ins on one day are averaged.
+        """
+        if day is None:
+            inputs = {}
+            for local_day, ids in self._local_days(user_ids).items():
+                inputs.update(self.bulk_trend_inputs(ids, local_day, days))
+            return inputs
+        params = {
+            "range_start": (day - timedelta(days=days - 1)).isoformat(),
+            "range_end": (day + timedelta(days=1)).isoformat(),
+        }
+        inputs = {
+            user_id: {"weights": [], "intake": [], "target_weight": None, "target_date": None}
+            for user_id in user_ids
+        }
+        for offset in range(0, len(user_ids), BULK_CHUNK_SIZE):
+            chunk = user_ids[offset:offset + BULK_CHUNK_SIZE]
+            placeholders = ", ".join(f":u{i}" for i in range(len(chunk)))
+            chunk_params = {**params, **{f"u{i}": user_id for i, user_id in enumerate(chunk)}}
+
+            with self.connection() as conn:
+                weights = conn.execute(
+                    SELECT_BULK_WEIGHT_DAYS.format(placeholders=placeholders), chunk_params
+                ).fetchall()
+                intake = conn.execute(
+                    SELECT_BULK_INTAKE_DAYS.format(placeholders=placeholders), chunk_params
+                ).fetchall()
+                goals = conn.execute(
+                    SELECT_BULK_GOALS.format(placeholders=placeholders), chunk_params
+                ).fetchall()
+
+            for row in weights:
+                inputs[row["user_id"]]["weights"].append((date.fromisoformat(row["day"]), row["weight_kg"]))
+            for row in intake:
+                inputs[row["user_id"]]["intake"].append((date.fromisoformat(row["day"]), row["calories"]))
+            for row in goals:
+                inputs[row["user_id"]].update(target_weight=row["target_weight"], target_date=row["target_date"])
+        return inputs
+
+    def bulk_weight_trends(self, user_ids: list, day: date = None) -> dict:
+        """`weight_trends.analyze()` for many users at once; requires NumPy."""
+        from ai_agents.weight_trends import analyze
+
+        if day is None:
+            trends = {}
+            for local_day, ids in self._local_days(user_ids).items():
+                trends.update(analyze(self.bulk_trend_inputs(ids, local_day), local_day))
+            return trends
+        return analyze(self.bulk_trend_inputs(user_ids, day), day)
+
+    def daily_buckets(self, start: date = None, end: date = None) -> list:
+        """Per-user per-day meal totals with start <= day < end (all history by default).
+
+        Each row has user_id, day (date) and the NutritionArchive bucket fields.
+        """
+        bounds = (start.isoformat() if start else "", end.isoformat() if end else "9999")
+        with self.connection() as conn:
+            rows = conn.execute(SELECT_DAILY_BUCKETS, bounds).fetchall()
+        return [{**dict(row), "day": date.fromisoformat(row["day"])} for row in rows]
+
+    # Weight
+
+    def log_weight(self, user_id: int, weight_kg: float, logged_at: datetime = None):
+        zone = self.user_zone(user_id)
+        with self.connection() as conn:
+            conn.execute(INSERT_WEIGHT, (user_id, weight_kg, _timestamp(logged_at, zone)))
+
+    def log_weights(self, weights: list) -> int:
+        """Insert many (user_id, weight_kg, logged_at) rows in one transaction."""
+        zones = self._zones({user_id for user_id, _, _ in weights})
+        rows = [
+            (user_id, weight_kg, _timestamp(logged_at, zones[user_id]))
+            for user_id, weight_kg, logged_at in weights
+        ]
+        with self.connection() as conn:
+            conn.executemany(INSERT_WEIGHT, rows)
+        return len(rows)
+
+    def set_weight_goal(self, user_id: int, target_weight: float, target_date: str, tdee: int = None):
+        with self.connection() as conn:
+            conn.execute(UPSERT_WEIGHT_GOAL, (user_id, target_weight, target_date, tdee))
+
+    def get_weight_trend(self, user_id: int) -> dict:
+        return self.bulk_weight_trends([user_id])[user_id]
+
+    def compute_daily_calorie_limit(self, user_id: int) -> dict:
+        with self.connection() as conn:
+            row = conn.execute(SELECT_LIMIT_INPUTS, (user_id,)).fetchone()
+        if row is None:
+            raise LookupError(f"Unknown user id {user_id}")
+        return calorie_limit(
+            row["daily_goal"], row["target_weight"], row["target_date"], row["tdee"],
+            row["current_weight"], self.user_today(user_id),
+        )
@@ -0,0 +1,259 @@
+import asyncio
+import inspect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+DEFAULT_TOOL_STATUS = {
+    "save_meal": "⏳ Logging your meal…",
+    "save_text_meal": "⏳ Logging your meal…",
+    "transfer_to_food_analysis": "⏳ Analyzing your photo…",
+    "get_daily_data": "⏳ Pulling together your summary…",
+}
+FALLBACK_TOOL_STATUS = "⏳ Working on it…"
+FINAL_ATTEMPTS = 3
+
+
+def _retry_after(error) -> float:
+    """Seconds to back off for a rate-limit error, or None if it isn't one."""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        return None
+    if hasattr(retry_after, "total_seconds"):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+def _not_modified(error) -> bool:
+    """Telegram rejects an edit whose text equals the current one; the user already sees it."""
+    return "message is not modified" in str(error).lower()
+
+
+def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> list:
+    """Split text into Telegram-sized parts, preferring line breaks."""
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    parts.append(text)
+    return parts
+
+
+class ReplyState:
+    """Accumulates a streamed Swarm run into the text the user should currently see."""
+
+    def __init__(self, tool_status: dict, clock, chat_id=None):
+        self.tool_status = tool_status
+        self.chat_id = chat_id
+        self.clock = clock
+        self.segments = []
+        self.status = None
+        self.shown = None
+        self.message_id = None
+        self.response = None
+        self.metrics = {
+            "started": clock(),
+            "first_token_s": None,
+            "first_visible_s": None,
+            "first_visible_token_s": None,
+            "sends": 0,
+            "edits": 0,
+            "rate_limited": 0,
+            "tool_phases": 0,
+        }
+
+    def feed(self, chunk: dict):
+        if "response" in chunk:
+            self.response = chunk["response"]
+        elif chunk.get("delim") == "start":
+            self.segments.append("")
+        elif chunk.get("delim") == "end":
+            pass
+        else:
+            if chunk.get("content"):
+                if self.metrics["first_token_s"] is None:
+                    self.metrics["first_token_s"] = self._elapsed()
+                if not self.segments:
+                    self.segments.append("")
+                self.segments[-1] += chunk["content"]
+            for tool_call in chunk.get("tool_calls") or []:
+                name = (tool_call.get("function") or {}).get("name")
+                if name:
+                    self.metrics["tool_phases"] += 1
+                    self.status = self.tool_status.get(name, FALLBACK_TOOL_STATUS)
+
+    @property
+    def text(self) -> str:
+        text = "\n\n".join(segment.strip() for segment in self.segments if segment.strip())
+        return text or self.status or ""
+
+    @property
+    def has_model_text(self) -> bool:
+        return any(segment.strip() for segment in self.segments)
+
+    def record_visible(self):
+        elapsed = self._elapsed()
+        if self.metrics["first_visible_s"] is None:
+            self.metrics["first_visible_s"] = elapsed
+        if self.has_model_text and self.metrics["first_visible_token_s"] is None:
+            self.metrics["first_visible_token_s"] = elapsed
+
+    def finish_metrics(self) -> dict:
+        metrics = dict(self.metrics)
+        del metrics["started"]
+        metrics["total_s"] = self._elapsed()
+        return metrics
+
+    def _elapsed(self) -> float:
+        return round(self.clock() - self.metrics["started"], 3)
+
+
+class StreamingReplier:
+    """Pushes a streamed agent run to a Telegram chat as throttled message edits.
+
+    `send_message(text) -> message_id` and `edit_message(message_id, text)`
+    are the bot's own calls; they may be coroutine functions when used with
+    `adeliver()`. Edits are coalesced to at most one per `min_interval`
+    seconds per chat (pass `chat_id` when one replier serves several
+    chats). Errors carrying a `retry_after` (Telegram's flood control)
+    pause edits for that chat. A failed intermediate edit is logged and
+    skipped so the run keeps going; the final text is retried through
+    flood control, and if it still can't be delivered the error is raised.
+    While tools run, a short status line is shown until the model starts
+    writing the reply.
+    """
+
+    def __init__(
+        self,
+        send_message,
+        edit_message,
+        min_interval: float = 1.0,
+        tool_status: dict = None,
+        clock=time.monotonic,
+    ):
+        self.send_message = send_message
+        self.edit_message = edit_message
+        self.min_interval = min_interval
+        self.tool_status = DEFAULT_TOOL_STATUS if tool_status is None else tool_status
+        self.clock = clock
+        self.last_metrics = {}
+        self._next_edit_at = {}
+
+    def deliver(self, stream, chat_id=None):
+        """Consume `swarm_client.run(..., stream=True)` and return the final Response."""
+        state = self._start(chat_id)
+        for chunk in stream:
+            state.feed(chunk)
+            if self._due(state):
+                self._push(state, final=False)
+        self._push(state, final=True)
+        self.last_metrics = state.finish_metrics()
+        return state.response
+
+    async def adeliver(self, stream, chat_id=None):
+        """Consume `AsyncSwarm.run_and_stream(...)` and return the final Response."""
+        state = self._start(chat_id)
+        async for chunk in stream:
+            state.feed(chunk)
+            if self._due(state):
+                await self._apush(state, final=False)
+        await self._apush(state, final=True)
+        self.last_metrics = state.finish_metrics()
+        return state.response
+
+    def _start(self, chat_id) -> ReplyState:
+        now = self.clock()
+        for chat in [chat for chat, at in self._next_edit_at.items() if at <= now]:
+            del self._next_edit_at[chat]
+        return ReplyState(self.tool_status, self.clock, chat_id)
+
+    def _wait(self, state: ReplyState) -> float:
+        return max(0.0, self._next_edit_at.get(state.chat_id, 0.0) - self.clock())
+
+    def _due(self, state: ReplyState) -> bool:
+        return bool(state.text) and state.text != state.shown and not self._wait(state)
+
+    def _plan(self, state: ReplyState, final: bool) -> list:
+        """Return the (message_id or None, text) operations needed to show the current text."""
+        text = state.text
+        # Intermediate edits show only the first part, so a long final text is
+        # always split and sent even if it hasn't changed since the last edit.
+        if not text or (text == state.shown and (not final or len(text) <= TELEGRAM_MESSAGE_LIMIT)):
+            return []
+        if not final:
+            return [(state.message_id, text[:TELEGRAM_MESSAGE_LIMIT])]
+        parts = split_message(text)
+        return [(state.message_id, parts[0])] + [(None, part) for part in parts[1:]]
+
+    def _push(self, state: ReplyState, final: bool):
+        for index, (message_id, text) in enumerate(self._plan(state, final)):
+            for attempt in range(FINAL_ATTEMPTS):
+                if final:
+                    time.sleep(self._wait(state))
+                try:
+                    result = self._call(message_id, text)
+                except Exception as e:
+                    if _not_modified(e):
+                        break
+                    if not self._handle_error(state, e, final, attempt):
+                        return
+                    continue
+                self._record(state, message_id, result, index)
+                break
+        state.shown = state.text
+
+    async def _apush(self, state: ReplyState, final: bool):
+        for index, (message_id, text) in enumerate(self._plan(state, final)):
+            for attempt in range(FINAL_ATTEMPTS):
+                if final:
+                    await asyncio.sleep(self._wait(state))
+                try:
+                    result = self._call(message_id, text)
+                    if inspect.isawaitable(result):
+                        result = await result
+                except Exception as e:
+                    if _not_modified(e):
+                        break
+                    if not self._handle_error(state, e, final, attempt):
+                        return
+                    continue
+                self._record(state, message_id, result, index)
+                break
+        state.shown = state.text
+
+    def _call(self, message_id, text: str):
+        if message_id is None:
+            return self.send_message(text)
+        return self.edit_message(message_id, text)
+
+    def _record(self, state: ReplyState, message_id, result, index: int):
+        if message_id is None:
+            state.metrics["sends"] += 1
+            if index == 0:
+                state.message_id = result
+        else:
+            state.metrics["edits"] += 1
+        state.record_visible()
+        self._next_edit_at[state.chat_id] = self.clock() + self.min_interval
+
+    def _handle_error(self, state: ReplyState, error: Exception, final: bool, attempt: int) -> bool:
+        """True to retry the final text; False to skip an intermediate edit. Raises if the final text fails."""
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            state.metrics["rate_limited"] += 1
+            self._next_edit_at[state.chat_id] = self.clock() + retry_after
+            logger.warning(f"Telegram rate limit hit; backing off {retry_after}s (final={final})")
+        if not final:
+            if retry_after is None:
+                logger.warning(f"Skipping failed intermediate edit: {error}")
+            return False
+        if retry_after is None or attempt + 1 >= FINAL_ATTEMPTS:
+            logger.error(f"Could not deliver the final reply after {attempt + 1} attempts: {error}")
+            raise error
+        return True
@@ -3,7 +3,12 @@ from datetime import date
 
 from swarm import Agent
 
+from ai_agents.models import Meal
+from ai_agents.parallel_tools import read_only
+from ai_agents.weight_trends import format_weight_trend
 
+
+@read_only
 def get_daily_data(context_variables: dict) -> str:
     """Retrieve comprehensive daily, weekly, and monthly data for the user."""
     phone = context_variables.get("phone_number")
@@ -13,24 +18,34 @@ def get_daily_data(context_variables: dict) -> str:
     limit_data = context_variables["compute_daily_calorie_limit"](user["id"])
     weekly = context_variables["get_weekly_consumption"](user["id"])
     monthly = context_variables["get_monthly_consumption"](user["id"])
-
+    get_weight_trend = context_variables.get("get_weight_trend")
+    trend = get_weight_trend(user["id"]) if get_weight_trend is not None else None
+    return format_daily_data(meals, daily, limit_data, weekly, monthly, trend=trend)
+
+
+def format_daily_data(
+    meals: list,
+    daily: dict,
+    limit_data: dict,
+    weekly: dict,
+    monthly: dict,
+    today: date = None,
+    trend: dict = None,
+) -> str:
+    """Render the get_daily_data report from already-fetched data-layer results."""
     daily_limit = limit_data["daily_limit"]
     daily_deviation = daily["total_calories"] - daily_limit
 
     weekly_budget = daily_limit * 7
     weekly_deviation = weekly["total_calories"] - (daily_limit * weekly["days_elapsed"])
 
-    today = date.today()
+    today = today or date.today()
     days_in_month = calendar.monthrange(today.year, today.month)[1]
     monthly_budget = daily_limit * days_in_month
     monthly_deviation = monthly["total_calories"] - (daily_limit * monthly["days_elapsed"])
 
     meal_details = "\n".join(
-        f"- Meal at {m['logged_at']}: {m['total_calories']} cal "
-        f"(P:{m.get('protein_g', 0)}g C:{m.get('carbs_g', 0)}g S:{m.get('sugar_g', 0)}g) "
-        f"[Health: {m.get('health_rating', 0)}/10] "
-        f"({m['food_items']})"
-        for m in meals
+        f"- {meal.time} {meal.render()}" for meal in map(Meal.from_row, meals)
     ) if meals else "No meals logged."
 
     sections = [
@@ -40,7 +55,7 @@ def get_daily_data(context_variables: dict) -> str:
         f"Deviation: {'+' if daily_deviation > 0 else ''}{daily_deviation} cal",
         f"Protein: {daily['total_protein']}g | Carbs: {daily['total_carbs']}g | Sugar: {daily['total_sugar']}g",
         f"Avg health rating: {daily['avg_health_rating']}/10",
-        f"Meals ({len(meals)}):\n{meal_details}",
+        f"Meals ({len(meals)}) [cal, P/C/S grams, H=health]:\n{meal_details}",
         f"",
         f"=== WEEKLY ===",
         f"Week so far ({weekly['days_elapsed']} days): {weekly['total_calories']} cal consumed",
@@ -66,6 +81,10 @@ def get_daily_data(context_variables: dict) -> str:
             f"Required daily deficit: {limit_data['daily_deficit']} cal",
         ])
 
+    trend_lines = format_weight_trend(trend)
+    if trend_lines:
+        sections.extend([f"", f"=== WEIGHT TREND ===", trend_lines])
+
     return "\n".join(sections)
 
 
@@ -74,7 +93,7 @@ summary_agent = Agent(
     model="gpt-4o-mini",
     instructions="""You generate end-of-day calorie summary reports.
 
-Address the user by their first name from `context_variables['user_profile']` if available.
+Address the user by their first name if available.
 
 When asked to generate a summary, first call get_daily_data to retrieve comprehensive data.
 Then create a Telegram-friendly summary covering:
@@ -102,7 +121,8 @@ Then create a Telegram-friendly summary covering:
 5. WEIGHT GOAL (if set):
    - Current weight vs target weight
    - Days remaining
-   - Whether on track based on calorie adherence
+   - Whether on track: use the projected goal date from the WEIGHT TREND section when
+     present, otherwise calorie adherence
 
 6. MOTIVATION:
    - An encouraging or cautionary closing note based on overall performance
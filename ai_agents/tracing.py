@@ -0,0 +1,424 @@
+import contextvars
+import inspect
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+# upper bounds in seconds, Prometheus-style cumulative buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_trace = contextvars.ContextVar("ai_agents_trace", default=None)
+_current_span = contextvars.ContextVar("ai_agents_span", default=None)
+_trace_ids = itertools.count(1)
+
+
+class Span:
+    __slots__ = ("id", "parent", "kind", "name", "start", "duration", "attrs")
+
+    def __init__(self, id: int, parent, kind: str, name: str, start: float):
+        self.id = id
+        self.parent = parent
+        self.kind = kind
+        self.name = name
+        self.start = start
+        self.duration = None
+        self.attrs = {}
+
+    def to_dict(self, origin: float) -> dict:
+        return {
+            "id": self.id,
+            "parent": self.parent,
+            "kind": self.kind,
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            **self.attrs,
+        }
+
+
+class Trace:
+    """Spans recorded during one conversation turn."""
+
+    def __init__(self, attrs: dict):
+        self.id = next(_trace_ids)
+        self.attrs = attrs
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self._span_ids = itertools.count(1)
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attrs):
+        span = self.open_span(kind, name, **attrs)
+        token = _current_span.set(span.id)
+        try:
+            yield span
+        except Exception as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.start
+            _current_span.reset(token)
+
+    def open_span(self, kind: str, name: str, **attrs) -> Span:
+        """Start a span that the caller ends by setting its duration; nothing nests under it."""
+        span = Span(next(self._span_ids), _current_span.get(), kind, name, time.perf_counter())
+        span.attrs.update(attrs)
+        self.spans.append(span)
+        return span
+
+    def totals(self) -> dict:
+        by_kind = defaultdict(float)
+        tokens = defaultdict(int)
+        for span in self.spans:
+            if span.parent is None and span.duration is not None:
+                by_kind[span.kind] += span.duration
+            if span.kind == "llm":
+                tokens["prompt_tokens"] += span.attrs.get("prompt_tokens") or 0
+                tokens["completion_tokens"] += span.attrs.get("completion_tokens") or 0
+                tokens["cached_tokens"] += span.attrs.get("cached_tokens") or 0
+        return {
+            "ms_by_kind": {kind: round(seconds * 1000, 3) for kind, seconds in by_kind.items()},
+            **tokens,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.id,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            **self.attrs,
+            **self.totals(),
+            "spans": [span.to_dict(self.start) for span in self.spans],
+        }
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> list:
+        return list(itertools.accumulate(self.counts))
+
+
+def _labels(**labels) -> str:
+    escaped = (
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Tracer:
+    """Per-turn latency and token accounting for agent runs.
+
+    Wire it up once, then open a turn around each Swarm run:
+
+        tracer = Tracer(jsonl_path="traces.jsonl")
+        tracer.instrument_agents([chat_agent, food_analysis_agent, summary_agent])
+        tracer.instrument_client(swarm_client)
+
+        with tracer.turn(chat_id=chat_id):
+            response = swarm_client.run(chat_agent, messages, tracer.wrap(context_variables))
+
+    Agent functions become "tool" spans, context_variables callables "data"
+    spans (nested under the tool that called them) and completions "llm"
+    spans with model, agent and token usage (a streamed completion's span
+    lasts until its stream is exhausted and reports usage if the client asks
+    for it, as AsyncSwarm does). Each finished turn is appended
+    to `jsonl_path` and folded into histograms served by `prometheus()`.
+
+    With `enabled=False` nothing is wrapped, so there is no overhead at all;
+    wrapped callables also run untimed outside of a `turn()`.
+    """
+
+    def __init__(self, enabled: bool = True, jsonl_path: str = None, buckets: tuple = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self.buckets = buckets
+        self.last_trace = None
+        self._histograms = {}
+        self._tokens = defaultdict(int)
+        self._turns = 0
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @contextmanager
+    def turn(self, **attrs):
+        if not self.enabled:
+            yield None
+            return
+        trace = Trace(attrs)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            trace.duration = time.perf_counter() - trace.start
+            self._finish(trace)
+
+    def wrap(self, context_variables: dict) -> dict:
+        """Return a copy of context_variables with every data-layer callable timed."""
+        if not self.enabled:
+            return context_variables
+        wrapped = dict(context_variables)
+        for key, value in context_variables.items():
+            if callable(value) and (inspect.isfunction(value) or inspect.ismethod(value)):
+                wrapped[key] = self._timed(value, "data", key)
+        return wrapped
+
+    def instrument_agents(self, agents: list):
+        """Replace each agent's functions with timed wrappers (idempotent)."""
+        if not self.enabled:
+            return
+        for agent in agents:
+            agent.functions = [
+                f if getattr(f, "__traced__", False) else self._traced_tool(f)
+                for f in agent.functions
+            ]
+
+    def instrument_client(self, swarm_client):
+        """Time `get_chat_completion` on a Swarm or AsyncSwarm instance and record usage."""
+        if not self.enabled or getattr(swarm_client.get_chat_completion, "__traced__", False):
+            return swarm_client
+        swarm_client.get_chat_completion = self._traced_completion(swarm_client.get_chat_completion)
+        return swarm_client
+
+    def _timed(self, fn, kind: str, name: str):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_timed(*args, **kwargs):
+                trace = _current_trace.get()
+                if trace is None:
+                    return await fn(*args, **kwargs)
+                with trace.span(kind, name):
+                    return await fn(*args, **kwargs)
+
+            return async_timed
+
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            with trace.span(kind, name):
+                return fn(*args, **kwargs)
+
+        return timed
+
+    def _traced_tool(self, fn):
+        # Swarm only passes context_variables to functions that name it in
+        # co_varnames, so the wrapper has to declare it explicitly.
+        name = fn.__name__
+        is_async = inspect.iscoroutinefunction(fn)
+        if "context_variables" not in fn.__code__.co_varnames:
+            traced = self._timed(fn, "tool", name)
+        elif is_async:
+            @wraps(fn)
+            async def traced(context_variables, **kwargs):
+                trace = _current_trace.get()
+                if trace is None:
+                    return await fn(context_variables, **kwargs)
+                with trace.span("tool", name) as span:
+                    return _note_handoff(span, await fn(context_variables, **kwargs))
+        else:
+            @wraps(fn)
+            def traced(context_variables, **kwargs):
+                trace = _current_trace.get()
+                if trace is None:
+                    return fn(context_variables, **kwargs)
+                with trace.span("tool", name) as span:
+                    return _note_handoff(span, fn(context_variables, **kwargs))
+
+        traced.__traced__ = True
+        return traced
+
+    def _traced_completion(self, get_chat_completion):
+        # Other installers wrap get_chat_completion with functools.wraps, so this
+        # resolves to the client's own signature however they are stacked.
+        signature = inspect.signature(get_chat_completion)
+
+        def attrs(args, kwargs) -> dict:
+            arguments = signature.bind_partial(*args, **kwargs).arguments
+            agent = arguments.get("agent")
+            return {
+                "agent": getattr(agent, "name", None),
+                "model": arguments.get("model_override") or getattr(agent, "model", None),
+                "stream": bool(arguments.get("stream")),
+            }
+
+        # A streamed completion's span stays open until the stream is exhausted,
+        # and takes its usage from the final chunk.
+        if inspect.iscoroutinefunction(get_chat_completion):
+            @wraps(get_chat_completion)
+            async def traced(*args, **kwargs):
+                trace = _current_trace.get()
+                if trace is None:
+                    return await get_chat_completion(*args, **kwargs)
+                span_attrs = attrs(args, kwargs)
+                if not span_attrs["stream"]:
+                    with trace.span("llm", "completion", **span_attrs) as span:
+                        return _note_usage(span, await get_chat_completion(*args, **kwargs))
+                span = trace.open_span("llm", "completion", **span_attrs)
+                try:
+                    stream = await get_chat_completion(*args, **kwargs)
+                except Exception as e:
+                    _end_span(span, e)
+                    raise
+                return _traced_astream(span, stream)
+        else:
+            @wraps(get_chat_completion)
+            def traced(*args, **kwargs):
+                trace = _current_trace.get()
+                if trace is None:
+                    return get_chat_completion(*args, **kwargs)
+                span_attrs = attrs(args, kwargs)
+                if not span_attrs["stream"]:
+                    with trace.span("llm", "completion", **span_attrs) as span:
+                        return _note_usage(span, get_chat_completion(*args, **kwargs))
+                span = trace.open_span("llm", "completion", **span_attrs)
+                try:
+                    stream = get_chat_completion(*args, **kwargs)
+                except Exception as e:
+                    _end_span(span, e)
+                    raise
+                return _traced_stream(span, stream)
+
+        traced.__traced__ = True
+        return traced
+
+    def _finish(self, trace: Trace):
+        self.last_trace = trace
+        with self._lock:
+            self._turns += 1
+            self._observe(("turn", "turn"), trace.duration)
+            for span in trace.spans:
+                if span.duration is not None:
+                    self._observe((span.kind, span.name), span.duration)
+                if span.kind == "llm":
+                    for kind in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                        key = (span.attrs.get("model"), span.attrs.get("agent"), kind)
+                        self._tokens[key] += span.attrs.get(kind) or 0
+        if self.jsonl_path:
+            line = json.dumps(trace.to_dict(), default=str)
+            with self._lock, open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _observe(self, key: tuple, seconds: float):
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def prometheus(self) -> str:
+        """Aggregated histograms and token counters in the Prometheus text format."""
+        lines = [
+            "# HELP ai_agents_span_duration_seconds Time spent per turn, tool, data-layer call and completion.",
+            "# TYPE ai_agents_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (kind, name), histogram in sorted(self._histograms.items()):
+                for bound, count in zip(histogram.buckets, histogram.cumulative()):
+                    lines.append(
+                        f"ai_agents_span_duration_seconds_bucket"
+                        f"{_labels(kind=kind, name=name, le=f'{bound:g}')} {count}"
+                    )
+                lines.append(
+                    f"ai_agents_span_duration_seconds_bucket"
+                    f"{_labels(kind=kind, name=name, le='+Inf')} {histogram.count}"
+                )
+                lines.append(
+                    f"ai_agents_span_duration_seconds_sum{_labels(kind=kind, name=name)} "
+                    f"{histogram.sum:.6f}"
+                )
+                lines.append(
+                    f"ai_agents_span_duration_seconds_count{_labels(kind=kind, name=name)} "
+                    f"{histogram.count}"
+                )
+            lines += [
+                "# HELP ai_agents_llm_tokens_total Tokens used by agent completions.",
+                "# TYPE ai_agents_llm_tokens_total counter",
+            ]
+            for (model, agent, kind), count in sorted(self._tokens.items(), key=str):
+                lines.append(
+                    f"ai_agents_llm_tokens_total"
+                    f"{_labels(model=model, agent=agent, type=kind.removesuffix('_tokens'))} {count}"
+                )
+            lines += [
+                "# HELP ai_agents_turns_total Conversation turns traced.",
+                "# TYPE ai_agents_turns_total counter",
+                f"ai_agents_turns_total {self._turns}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def _note_handoff(span: Span, result):
+    agent_name = getattr(result, "name", None) or getattr(getattr(result, "agent", None), "name", None)
+    if agent_name:
+        span.attrs["handoff"] = agent_name
+    return result
+
+
+def _end_span(span: Span, error: Exception = None):
+    if error is not None:
+        span.attrs["error"] = type(error).__name__
+    span.duration = time.perf_counter() - span.start
+
+
+def _traced_stream(span: Span, stream):
+    error = None
+    try:
+        for chunk in stream:
+            _note_usage(span, chunk)
+            yield chunk
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        _end_span(span, error)
+
+
+async def _traced_astream(span: Span, stream):
+    error = None
+    try:
+        async for chunk in stream:
+            _note_usage(span, chunk)
+            yield chunk
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        _end_span(span, error)
+
+
+def _note_usage(span: Span, completion):
+    usage = getattr(completion, "usage", None)
+    if usage is not None:
+        span.attrs["prompt_tokens"] = usage.prompt_tokens
+        span.attrs["completion_tokens"] = usage.completion_tokens
+        details = getattr(usage, "prompt_tokens_details", None)
+        span.attrs["cached_tokens"] = getattr(details, "cached_tokens", None) or 0
+    if getattr(completion, "model", None):
+        span.attrs["model"] = completion.model
+    return completion
@@ -0,0 +1,175 @@
+import inspect
+from collections import Counter
+from functools import wraps
+
+_USER_READS = ("get_or_create_user",)
+_LIMIT_READS = ("compute_daily_calorie_limit",)
+_MEAL_READS = (
+    "get_user_today_macros",
+    "get_user_meals_today",
+    "get_last_meal",
+    "get_weekly_consumption",
+    "get_monthly_consumption",
+)
+_TREND_READS = ("get_weight_trend",)
+
+CACHED_READS = _USER_READS + _LIMIT_READS + _MEAL_READS + _TREND_READS
+
+# write callable -> (argument that identifies the owner, reads it makes stale)
+INVALIDATIONS = {
+    "log_meal": ("user_id", _MEAL_READS + _TREND_READS),
+    "update_meal": ("meal_id", _MEAL_READS + _TREND_READS),
+    "delete_meal": ("meal_id", _MEAL_READS + _TREND_READS),
+    "apply_meal_batch": ("user_id", _MEAL_READS + _TREND_READS),
+    "log_weight": ("user_id", _LIMIT_READS + _TREND_READS),
+    "set_weight_goal": ("user_id", _LIMIT_READS + _TREND_READS),
+    "update_user_goal": ("phone", _USER_READS + _LIMIT_READS),
+    "update_user_profile": ("user_id", _USER_READS + _LIMIT_READS),
+}
+
+
+def _first_arg(args: tuple, kwargs: dict, name: str):
+    if args:
+        return args[0]
+    return kwargs.get(name)
+
+
+class TurnCache:
+    """Memoizes data-layer reads for the duration of one conversation turn.
+
+    Build a fresh cache per incoming message and pass the wrapped dict to the
+    Swarm run in place of the original context_variables:
+
+        cache = TurnCache()
+        response = swarm_client.run(agent, messages, cache.wrap(context_variables))
+        cache.stats()
+    """
+
+    def __init__(self):
+        self.hits = Counter()
+        self.misses = Counter()
+        self._entries = {}
+        self._phone_owner = {}
+        self._meal_owner = {}
+
+    def __deepcopy__(self, memo):
+        # Swarm deep-copies context_variables on every run; the cache must survive it.
+        return self
+
+    def wrap(self, context_variables: dict) -> dict:
+        """Return a copy of context_variables with cached reads and invalidating writes."""
+        wrapped = dict(context_variables)
+        for name in CACHED_READS:
+            if name in context_variables:
+                wrapped[name] = self._cached_read(name, context_variables[name])
+        for name, (owner_arg, stale) in INVALIDATIONS.items():
+            if name in context_variables:
+                wrapped[name] = self._invalidating_write(
+                    name, context_variables[name], owner_arg, stale
+                )
+        wrapped["turn_cache"] = self
+        return wrapped
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+            "entries": len(self._entries),
+            "by_callable": {
+                name: {"hits": self.hits[name], "misses": self.misses[name]}
+                for name in sorted(set(self.hits) | set(self.misses))
+            },
+        }
+
+    def _cached_read(self, name: str, fn):
+        def lookup(args, kwargs):
+            try:
+                key = (name, args, tuple(sorted(kwargs.items())))
+                hash(key)
+            except TypeError:
+                return None, False
+            return key, key in self._entries
+
+        def store(key, args, kwargs, value):
+            if key is not None:
+                self._entries[key] = (self._owner_of(name, args, kwargs, value), value)
+            return value
+
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_read(*args, **kwargs):
+                key, cached = lookup(args, kwargs)
+                if cached:
+                    self.hits[name] += 1
+                    return self._entries[key][1]
+                self.misses[name] += 1
+                return store(key, args, kwargs, await fn(*args, **kwargs))
+
+            return async_read
+
+        @wraps(fn)
+        def read(*args, **kwargs):
+            key, cached = lookup(args, kwargs)
+            if cached:
+                self.hits[name] += 1
+                return self._entries[key][1]
+            self.misses[name] += 1
+            return store(key, args, kwargs, fn(*args, **kwargs))
+
+        return read
+
+    def _invalidating_write(self, name: str, fn, owner_arg: str, stale: tuple):
+        def invalidate(args, kwargs):
+            ref = _first_arg(args, kwargs, owner_arg)
+            if owner_arg == "phone":
+                owner = self._phone_owner.get(ref)
+            elif owner_arg == "meal_id":
+                owner = self._meal_owner.get(ref)
+            else:
+                owner = ref
+            self._invalidate(owner, stale)
+
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_write(*args, **kwargs):
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    invalidate(args, kwargs)
+
+            return async_write
+
+        @wraps(fn)
+        def write(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                invalidate(args, kwargs)
+
+        return write
+
+    def _owner_of(self, name: str, args: tuple, kwargs: dict, value):
+        if name == "get_or_create_user":
+            owner = value.get("id") if isinstance(value, dict) else None
+            self._phone_owner[_first_arg(args, kwargs, "phone")] = owner
+            return owner
+
+        owner = _first_arg(args, kwargs, "user_id")
+        meals = value if isinstance(value, list) else [value]
+        for meal in meals:
+            if isinstance(meal, dict) and "id" in meal:
+                self._meal_owner[meal["id"]] = owner
+        return owner
+
+    def _invalidate(self, owner, names: tuple):
+        """Drop cached reads in `names` for `owner`, or for everyone if the owner is unknown."""
+        for key, (entry_owner, _) in list(self._entries.items()):
+            if key[0] in names and (owner is None or entry_owner == owner):
+                del self._entries[key]
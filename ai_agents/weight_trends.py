@@ -0,0 +1,190 @@
+import math
+from datetime import date, timedelta
+
+from ai_agents.sqlite_backend import KCAL_PER_KG, MIN_DAILY_CALORIES, TREND_WINDOW_DAYS
+
+TREND_HALF_LIFE_DAYS = 14
+MIN_WEIGH_INS = 3
+MIN_SPAN_DAYS = 7
+MIN_LOGGED_DAYS = 7
+GOAL_REACHED_KG = 0.2
+MAX_PROJECTION_DAYS = 730
+
+
+def available() -> bool:
+    """Whether NumPy is installed; imports it, so call this at setup rather than mid-turn."""
+    try:
+        require_numpy()
+    except ImportError:
+        return False
+    return True
+
+
+def require_numpy():
+    """NumPy, imported on first use so importing the agents doesn't pay for it at startup."""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Analytics require NumPy: pip install 'ai-agents[analytics]'") from None
+    return numpy
+
+
+def trend_arrays(inputs: dict, today: date, days: int = TREND_WINDOW_DAYS) -> tuple:
+    """Stack per-user series into (users x days) arrays ending today; NaN marks days without data.
+
+    `inputs` is shaped like `SQLiteDataLayer.bulk_trend_inputs()`. Returns
+    (user_ids, weights, intake, targets, target_offsets), the last two being
+    per-user arrays (NaN when the user has no goal).
+    """
+    np = require_numpy()
+    user_ids = list(inputs)
+    start = today - timedelta(days=days - 1)
+    origin = start.toordinal()
+    arrays = []
+    for name in ("weights", "intake"):
+        rows, offsets, values = [], [], []
+        for row, user_id in enumerate(user_ids):
+            for day, value in inputs[user_id][name]:
+                rows.append(row)
+                offsets.append(day.toordinal() - origin)
+                values.append(value)
+        rows, offsets = np.array(rows, dtype=int), np.array(offsets, dtype=int)
+        keep = (offsets >= 0) & (offsets < days)
+        array = np.full((len(user_ids), days), np.nan)
+        array[rows[keep], offsets[keep]] = np.array(values, dtype=float)[keep]
+        arrays.append(array)
+
+    targets = np.full(len(user_ids), np.nan)
+    target_offsets = np.full(len(user_ids), np.nan)
+    for row, user_id in enumerate(user_ids):
+        user = inputs[user_id]
+        if user.get("target_weight") is not None and user.get("target_date"):
+            targets[row] = user["target_weight"]
+            target_offsets[row] = (date.fromisoformat(user["target_date"]) - today).days
+    return (user_ids, *arrays, targets, target_offsets)
+
+
+def fit_trends(weights, half_life: float = TREND_HALF_LIFE_DAYS) -> tuple:
+    """Recency-weighted least-squares line through each row of `weights`.
+
+    Returns (trend weight today, kg per day, weigh-ins, span in days) per
+    row; the first two are NaN where there are too few weigh-ins to fit.
+    """
+    np = require_numpy()
+    days = weights.shape[1]
+    x = np.arange(days, dtype=float) - (days - 1)
+    observed = ~np.isnan(weights)
+    w = np.where(observed, 0.5 ** (-x / half_life), 0.0)
+    y = np.where(observed, weights, 0.0)
+
+    s = w.sum(axis=1)
+    sx = w @ x
+    sy = (w * y).sum(axis=1)
+    sxx = w @ (x * x)
+    sxy = (w * y) @ x
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (s * sxy - sx * sy) / (s * sxx - sx * sx)
+        intercept = (sy - slope * sx) / s
+
+    count = observed.sum(axis=1)
+    first = np.where(count, observed.argmax(axis=1), 0)
+    last = np.where(count, days - 1 - observed[:, ::-1].argmax(axis=1), 0)
+    span = last - first
+    valid = (count >= MIN_WEIGH_INS) & (span >= MIN_SPAN_DAYS)
+    return np.where(valid, intercept, np.nan), np.where(valid, slope, np.nan), count, span
+
+
+def analyze(inputs: dict, today: date = None, days: int = TREND_WINDOW_DAYS) -> dict:
+    """Weight trend, effective TDEE and goal projection for every user in `inputs`.
+
+    Effective TDEE is mean logged intake minus the trend's energy change
+    (KCAL_PER_KG per kg), so it is expressed in the same logged calories
+    the daily limit is compared against. Today's intake is left out as
+    the day is not over. Returns {user_id: dict} of plain Python values;
+    fields are None where there is not enough data.
+    """
+    np = require_numpy()
+    today = today or date.today()
+    user_ids, weights, intake, targets, target_offsets = trend_arrays(inputs, today, days)
+    trend, slope, weigh_ins, _ = fit_trends(weights)
+
+    past = intake[:, :-1]
+    logged = ~np.isnan(past)
+    logged_days = logged.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_intake = np.nansum(past, axis=1) / logged_days
+        avg_intake = np.where(logged_days >= MIN_LOGGED_DAYS, avg_intake, np.nan)
+        effective_tdee = avg_intake - slope * KCAL_PER_KG
+
+        remaining = targets - trend
+        reached = np.abs(remaining) <= GOAL_REACHED_KG
+        days_to_goal = np.where(reached, 0.0, remaining / slope)
+        reachable = (days_to_goal >= 0) & (days_to_goal <= MAX_PROJECTION_DAYS)
+        days_to_goal = np.where(reachable, days_to_goal, np.nan)
+        on_track = reached | (days_to_goal <= target_offsets)
+        required_intake = effective_tdee + remaining / target_offsets * KCAL_PER_KG
+        required_intake = np.where(
+            target_offsets > 0, np.maximum(required_intake, MIN_DAILY_CALORIES), np.nan
+        )
+
+    columns = zip(
+        user_ids, weigh_ins.tolist(), logged_days.tolist(), trend.tolist(), (slope * 7).tolist(),
+        avg_intake.tolist(), effective_tdee.tolist(), targets.tolist(), days_to_goal.tolist(),
+        on_track.tolist(), required_intake.tolist(),
+    )
+    results = {}
+    for user_id, count, logged, weight, weekly, mean_intake, tdee, target, to_goal, track, required in columns:
+        has_goal = not math.isnan(target)
+        results[user_id] = {
+            "weigh_ins": count,
+            "logged_days": logged,
+            "trend_weight": _number(weight, 1),
+            "weekly_change_kg": _number(weekly, 2),
+            "avg_intake": _number(mean_intake),
+            "effective_tdee": _number(tdee),
+            "target_weight": target if has_goal else None,
+            "target_date": inputs[user_id].get("target_date") if has_goal else None,
+            "projected_goal_date": (
+                (today + timedelta(days=math.ceil(to_goal))).isoformat()
+                if has_goal and not math.isnan(to_goal) else None
+            ),
+            "on_track": track if has_goal and not math.isnan(weight) else None,
+            "required_daily_intake": _number(required) if has_goal else None,
+        }
+    return results
+
+
+def _number(value, digits: int = None):
+    if math.isnan(value):
+        return None
+    return round(value, digits) if digits else round(value)
+
+
+def format_weight_trend(trend: dict) -> str:
+    """Plain-text lines for a tool result; empty when the user has never weighed in."""
+    if not trend or not trend["weigh_ins"]:
+        return ""
+    if trend["trend_weight"] is None:
+        return (
+            f"Weight trend: not enough data yet ({trend['weigh_ins']} weigh-ins; needs "
+            f"{MIN_WEIGH_INS} over {MIN_SPAN_DAYS}+ days)"
+        )
+
+    change = trend["weekly_change_kg"]
+    lines = [f"Weight trend: {trend['trend_weight']} kg, {'+' if change > 0 else ''}{change} kg/week"]
+    if trend["effective_tdee"] is not None:
+        lines.append(
+            f"Effective TDEE: ~{trend['effective_tdee']} cal "
+            f"(avg logged intake {trend['avg_intake']} cal over {trend['logged_days']} days)"
+        )
+    if trend["target_weight"] is not None:
+        goal = f"Goal {trend['target_weight']} kg by {trend['target_date']}: "
+        if trend["projected_goal_date"] is None:
+            goal += "not reached within two years at the current trend"
+        else:
+            status = "on track" if trend["on_track"] else "behind"
+            goal += f"projected {trend['projected_goal_date']}, {status}"
+        lines.append(goal)
+        if trend["required_daily_intake"] is not None:
+            lines.append(f"Daily intake to reach the goal on time: {trend['required_daily_intake']} cal")
+    return "\n".join(lines)
@@ -0,0 +1,171 @@
+"""General-advice answer cache: hit rate, wrong hits and latency saved on FAQ-style traffic.
+
+Each FAQ below is one intent asked several ways. The simulated stream
+draws intents Zipf-style and a random phrasing of each. A miss "calls the
+model" (`--model-ms`, not slept, only accounted) and stores the answer. A
+hit is wrong when the cached answer belongs to a different intent. A share
+of the messages (`--personal-rate`) are personal or follow-up messages the
+cache must never answer. The threshold sweep stores one phrasing of every
+intent and asks each other phrasing once, so it measures how often a new
+wording is matched and how often it is matched to the wrong intent. It
+also asks CONFUSABLE questions, which differ from a stored one only in
+subject or polarity and must never get its answer; the run fails if the
+default threshold serves any of them. The traffic run uses the
+AnswerCache default.
+
+    python benchmarks/bench_answer_cache.py --messages 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_agents.answer_cache import AnswerCache  # noqa: E402
+
+FAQS = [
+    ["is rice healthy", "is white rice healthy?", "is rice good for you", "are rice dishes healthy"],
+    ["how much protein do i need", "how much protein do i need per day?",
+     "how much protein should i eat a day", "what is the daily protein requirement"],
+    ["is it bad to eat late at night", "is eating late at night bad?",
+     "is eating at night bad for weight loss", "should i avoid eating late at night"],
+    ["how much water should i drink", "how much water should i drink a day?",
+     "how many glasses of water per day", "what is the recommended daily water intake"],
+    ["are eggs healthy", "are eggs good for you?", "is eating eggs every day healthy", "is egg healthy"],
+    ["what are good sources of fiber", "which foods are high in fiber?",
+     "what foods have a lot of fiber", "what are high fiber foods"],
+    ["is intermittent fasting effective", "does intermittent fasting work?",
+     "is intermittent fasting good for weight loss", "should i try intermittent fasting"],
+    ["how many calories are in a banana", "how many calories does a banana have?",
+     "calories in a banana?", "what are the calories in one banana"],
+    ["is sugar bad for you", "is sugar unhealthy?", "how bad is sugar for health", "why is sugar bad"],
+    ["what is a healthy breakfast", "what should i eat for breakfast?",
+     "what are healthy breakfast ideas", "what is a good healthy breakfast"],
+    ["are carbs bad for weight loss", "should i cut carbs to lose weight?",
+     "do carbs make you gain weight", "are carbohydrates bad when dieting"],
+    ["is coffee healthy", "is coffee bad for you?", "how much coffee is safe per day", "is drinking coffee healthy"],
+    ["how do i lose belly fat", "how can i lose belly fat?", "what is the best way to lose belly fat",
+     "how to get rid of belly fat"],
+    ["is olive oil healthy", "is olive oil good for you?", "is cooking with olive oil healthy",
+     "are olive oil calories bad"],
+    ["what is a calorie deficit", "what does calorie deficit mean?", "how does a calorie deficit work",
+     "what is a caloric deficit"],
+    ["are protein shakes healthy", "are protein shakes good for you?", "should i drink protein shakes",
+     "is whey protein healthy"],
+]
+# (stored, asked) pairs that look alike but need different answers.
+CONFUSABLE = [
+    ("how much protein does a woman need", "how much protein does a man need"),
+    ("how many calories should a man eat", "how many calories should a woman eat"),
+    ("how much protein does a child need", "how much protein does an adult need"),
+    ("is intermittent fasting good", "is intermittent fasting bad"),
+    ("is fruit good for weight loss", "is fruit bad for weight loss"),
+    ("are carbs good before bed", "are carbs bad before bed"),
+    ("is white rice healthy", "is brown rice healthy"),
+    ("is coffee healthy during pregnancy", "is alcohol healthy during pregnancy"),
+    ("what foods raise blood sugar", "what foods lower blood sugar"),
+    ("how to gain weight fast", "how to lose weight fast"),
+]
+PERSONAL = [
+    "how many calories have i eaten today", "is that healthy?", "what about my dinner?",
+    "how am i doing this week", "can you undo that", "is it bad that i ate pizza?",
+    "what did i eat yesterday", "am i on track with my goal?",
+]
+
+
+def simulate(threshold: float, messages: int, personal_rate: float, model_ms: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(FAQS))]
+    cache = AnswerCache(threshold=threshold)
+    wrong = personal_hits = 0
+    start = time.perf_counter()
+    for _ in range(messages):
+        if rng.random() < personal_rate:
+            if cache.lookup(rng.choice(PERSONAL)) is not None:
+                personal_hits += 1
+            continue
+        intent = rng.choices(range(len(FAQS)), weights)[0]
+        question = rng.choice(FAQS[intent])
+        reply = cache.lookup(question)
+        if reply is None:
+            reply = f"answer {intent}"
+            cache.store(question, reply, cost=model_ms / 1000)
+        elif reply != f"answer {intent}":
+            wrong += 1
+    stats = cache.stats()
+    stats.update(
+        wrong_hits=wrong,
+        personal_hits=personal_hits,
+        wall_ms=round((time.perf_counter() - start) * 1000),
+    )
+    return stats
+
+
+def paraphrase_recall(threshold: float) -> tuple:
+    """(right, wrong, missed) lookups of unseen phrasings, over every choice of stored phrasing."""
+    right = wrong = missed = 0
+    for stored in range(4):
+        cache = AnswerCache(threshold=threshold)
+        for intent, phrasings in enumerate(FAQS):
+            cache.store(phrasings[stored], f"answer {intent}")
+        for intent, phrasings in enumerate(FAQS):
+            for asked in range(4):
+                if asked == stored:
+                    continue
+                reply = cache.lookup(phrasings[asked])
+                if reply is None:
+                    missed += 1
+                elif reply == f"answer {intent}":
+                    right += 1
+                else:
+                    wrong += 1
+    return right, wrong, missed
+
+
+def confusable_hits(threshold: float) -> int:
+    """Lookups that were served the answer of a question with a different subject or polarity."""
+    hits = 0
+    for stored, asked in CONFUSABLE:
+        for first, second in ((stored, asked), (asked, stored)):
+            cache = AnswerCache(threshold=threshold)
+            for intent, phrasings in enumerate(FAQS):
+                cache.store(phrasings[0], f"answer {intent}")
+            cache.store(first, "confusable")
+            hits += cache.lookup(second) == "confusable"
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--personal-rate", type=float, default=0.3)
+    parser.add_argument("--model-ms", type=float, default=1500, help="latency of a gpt-4o answer")
+    parser.add_argument("--thresholds", default="0.3,0.4,0.5,0.6,0.7,0.8,0.9")
+    args = parser.parse_args()
+
+    print(f"{args.messages} messages, {len(FAQS)} FAQ intents x 4 phrasings, "
+          f"{args.personal_rate:.0%} personal, model {args.model_ms:.0f} ms")
+    print(f"{'threshold':>10}{'new wording matched':>21}{'wrong intent':>14}{'missed':>8}{'confusable':>12}")
+    for threshold in map(float, args.thresholds.split(",")):
+        right, wrong, missed = paraphrase_recall(threshold)
+        total = right + wrong + missed
+        print(
+            f"{threshold:>10.2f}{right / total:>21.1%}{wrong / total:>14.1%}{missed / total:>8.1%}"
+            f"{confusable_hits(threshold):>7}/{2 * len(CONFUSABLE)}"
+        )
+    stats = simulate(AnswerCache().threshold, args.messages, args.personal_rate, args.model_ms, seed=2)
+    print(
+        f"traffic at threshold {AnswerCache().threshold}: hit rate {stats['hit_rate']:.1%} "
+        f"({stats['hits_similar']} similar), wrong {stats['wrong_hits']}, personal {stats['personal_hits']}, "
+        f"lookup {stats['avg_lookup_ms']} ms, saved {stats['saved_s'] / 3600:.1f} model-hours, "
+        f"skipped {stats['skipped']}"
+    )
+    served = confusable_hits(AnswerCache().threshold)
+    if served:
+        raise SystemExit(f"default threshold served {served} confusable question(s) the wrong answer")
+
+
+if __name__ == "__main__":
+    main()
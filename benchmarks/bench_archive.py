@@ -0,0 +1,135 @@
+"""Columnar history archive: yearly range reports from the archive vs. SQL over the meals table.
+
+Seeds `--users` users with `--days` days of history (`--meals-per-day` on
+logged days), runs the first sync (a full backfill) and a compaction, then
+times `--reports` one-year reports for random users both ways. The SQL path
+is the cheapest query that can answer the same report: one indexed
+per-day aggregation over the user's meals. Finally one more day of meals
+is logged and the nightly incremental sync plus compaction are timed.
+
+    python benchmarks/bench_archive.py --users 2000 --days 730
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_agents.archive import NutritionArchive  # noqa: E402
+from ai_agents.sqlite_backend import SQLiteDataLayer  # noqa: E402
+
+USER_DAILY_BUCKETS = """
+SELECT date(logged_at) AS day, SUM(total_calories) AS calories, SUM(protein_g) AS protein,
+       SUM(carbs_g) AS carbs, SUM(sugar_g) AS sugar, SUM(health_rating) AS health_sum,
+       SUM(health_rating > 0) AS health_count, COUNT(*) AS meal_count
+FROM meals WHERE user_id = ? AND logged_at >= ? AND logged_at < ?
+GROUP BY day
+"""
+
+
+def meals_for(rng: random.Random, users: int, day: date, per_day: int, log_rate: float):
+    for user_id in range(1, users + 1):
+        if rng.random() >= log_rate:
+            continue
+        for _ in range(rng.randint(1, per_day * 2 - 1)):
+            yield {
+                "user_id": user_id,
+                "logged_at": datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randint(360, 1380)),
+                "food_items": "[]",
+                "total_calories": rng.randint(100, 1200),
+                "protein_g": rng.randint(0, 60),
+                "carbs_g": rng.randint(0, 150),
+                "sugar_g": rng.randint(0, 40),
+                "health_rating": rng.randint(1, 10),
+            }
+
+
+def sql_report(db: SQLiteDataLayer, user_id: int, start: date, end: date, daily_limit: int) -> dict:
+    with db.connection() as conn:
+        rows = conn.execute(
+            USER_DAILY_BUCKETS, (user_id, start.isoformat(), (end + timedelta(days=1)).isoformat())
+        ).fetchall()
+    calories = sorted(row["calories"] for row in rows)
+    deciles = statistics.quantiles(calories, n=10) if len(calories) > 1 else calories * 9
+    return {
+        "total_calories": sum(calories),
+        "days_logged": len(rows),
+        "median_daily_calories": round(statistics.median(calories)) if calories else None,
+        "p90": deciles[-1] if deciles else None,
+        "days_over_limit": sum(c > daily_limit for c in calories),
+    }
+
+
+def timed(fn, *args) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--meals-per-day", type=int, default=3)
+    parser.add_argument("--log-rate", type=float, default=0.8, help="share of days with meals logged")
+    parser.add_argument("--reports", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    workdir = tempfile.mkdtemp(prefix="bench_archive_")
+    today = date.today()
+    clock = {"today": today}
+    db = SQLiteDataLayer(os.path.join(workdir, "health.db"), today=lambda: clock["today"])
+    archive = NutritionArchive(os.path.join(workdir, "archive"), today=lambda: clock["today"])
+
+    start = time.perf_counter()
+    with db.connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (phone_number, created_at) VALUES (?, ?)",
+            ((f"+1555{i:07d}", "2024-01-01 00:00:00") for i in range(args.users)),
+        )
+    meals = 0
+    for offset in range(args.days, 0, -1):
+        batch = list(meals_for(rng, args.users, today - timedelta(days=offset), args.meals_per_day, args.log_rate))
+        db.log_meals(batch)
+        meals += len(batch)
+    print(f"seeded {args.users} users, {meals:,} meals over {args.days} days in {time.perf_counter() - start:.0f}s")
+
+    appended, backfill = timed(archive.sync, db)
+    compacted, compaction = timed(archive.compact)
+    print(f"backfill sync: {appended:,} buckets in {backfill:.2f}s; "
+          f"compact: {compacted['rows']:,} rows in {compaction:.2f}s")
+
+    end = today - timedelta(days=1)
+    first = end - timedelta(days=364)
+    sample = [rng.randint(1, args.users) for _ in range(args.reports)]
+    archive_times, sql_times = [], []
+    for user_id in sample:
+        report, elapsed = timed(archive.report, user_id, first, end, 2000)
+        archive_times.append(elapsed)
+        expected, elapsed = timed(sql_report, db, user_id, first, end, 2000)
+        sql_times.append(elapsed)
+        assert report["total_calories"] == expected["total_calories"]
+        assert report["days_logged"] == expected["days_logged"]
+        assert report["days_over_limit"] == expected["days_over_limit"]
+
+    for name, times in (("archive", archive_times), ("sql scan", sql_times)):
+        times.sort()
+        print(f"{name:>9}: p50 {times[len(times) // 2] * 1000:.2f} ms  "
+              f"p99 {times[int(len(times) * 0.99)] * 1000:.2f} ms  (1-year report, {len(times)} users)")
+
+    db.log_meals(list(meals_for(rng, args.users, today, args.meals_per_day, args.log_rate)))
+    clock["today"] = today + timedelta(days=1)
+    appended, nightly = timed(archive.sync, db)
+    compacted, compaction = timed(archive.compact)
+    print(f"nightly sync: {appended:,} buckets in {nightly:.2f}s; compact: {compaction:.2f}s")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""End-of-day summary throughput: serial per-user vs. BatchSummaryEngine.
+
+Runs against a seeded SQLite database and the local fake completion server,
+so the numbers reflect data access and concurrency, not OpenAI latency.
+
+    python benchmarks/bench_batch_summary.py --users 5000 --latency 0.3 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from openai import AsyncOpenAI  # noqa: E402
+
+from ai_agents.batch_summary import (  # noqa: E402
+    BatchSummaryEngine,
+    prefetch_daily_data,
+    summary_messages,
+)
+from ai_agents.sqlite_backend import SQLiteDataLayer  # noqa: E402
+from bench_sqlite_backend import seed  # noqa: E402
+from fake_openai import FakeOpenAIServer  # noqa: E402
+
+
+async def serial_baseline(db: SQLiteDataLayer, client, users: list, model: str) -> float:
+    """The old shape: six data-layer calls and one completion per user, one user at a time."""
+    context_variables = db.context_variables()
+    start = time.perf_counter()
+    for user in users:
+        data = prefetch_daily_data(context_variables, [user])
+        await client.chat.completions.create(model=model, messages=summary_messages(data[user["id"]]))
+    return time.perf_counter() - start
+
+
+async def run(args):
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench.db")
+    db = SQLiteDataLayer(path)
+    if not db.list_users():
+        seed(db, args.users, args.users * args.meals_per_user, days=40)
+    users = db.list_users()[: args.users]
+
+    with FakeOpenAIServer(latency=args.latency) as server:
+        client = AsyncOpenAI(base_url=server.url, api_key="fake", max_retries=0)
+        engine = BatchSummaryEngine(db, client=client, max_concurrency=args.concurrency)
+
+        start = time.perf_counter()
+        db.bulk_daily_data([user["id"] for user in users])
+        print(f"bulk prefetch: {len(users):,} users in {time.perf_counter() - start:.2f}s")
+
+        summaries = await engine.run(users)
+        print(f"engine:   {len(summaries):,} summaries in {engine.last_report['elapsed_s']:.1f}s "
+              f"({engine.last_report['users_per_s']} users/s, "
+              f"peak {server.max_in_flight} in flight, {len(engine.failures)} failures)")
+
+        sample = users[: args.serial_sample]
+        elapsed = await serial_baseline(db, client, sample, engine.model)
+        per_user = elapsed / len(sample)
+        print(f"serial:   {len(sample)} users in {elapsed:.1f}s "
+              f"-> ~{per_user * len(users):.0f}s projected for {len(users):,} users")
+
+        batch_path = os.path.join(os.path.dirname(path), "summaries.jsonl")
+        start = time.perf_counter()
+        count = engine.write_batch_file(batch_path, users)
+        print(f"batch api: wrote {count:,} requests to {batch_path} "
+              f"in {time.perf_counter() - start:.2f}s")
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--meals-per-user", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.3, help="fake completion latency (s)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--serial-sample", type=int, default=20)
+    parser.add_argument("--db", help="reuse a seeded database file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Cold-start cost of importing ai_agents, in fresh interpreters.
+
+Each snippet runs `--runs` times in a new `python -c` process; the table
+shows the median wall time minus an empty interpreter's. "eager" repeats
+what ai_agents/__init__.py used to do on import: build both Swarm clients
+and import all three agents.
+
+    python benchmarks/bench_import.py --runs 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+EAGER = """
+from swarm import Swarm
+from ai_agents.async_swarm import AsyncSwarm
+swarm_client = Swarm()
+async_swarm_client = AsyncSwarm()
+from ai_agents.chat_agent import chat_agent
+from ai_agents.food_analysis_agent import food_analysis_agent
+from ai_agents.summary_agent import summary_agent
+"""
+SNIPPETS = {
+    "eager (old __init__)": EAGER,
+    "import ai_agents": "import ai_agents",
+    "summary_agent only": "from ai_agents import summary_agent",
+    "chat_agent + swarm_client": "from ai_agents import chat_agent, swarm_client",
+    "everything": "import ai_agents as a; a.chat_agent, a.food_analysis_agent, a.summary_agent, "
+                  "a.swarm_client, a.async_swarm_client",
+}
+
+
+def time_snippet(code: str, runs: int, env: dict) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15, help="fresh interpreters per snippet")
+    args = parser.parse_args()
+
+    # Building a client needs a key to exist, not to be valid.
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "unused")}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    baseline = time_snippet("pass", args.runs, env)
+    eager = None
+    print(f"empty interpreter: {baseline:.1f} ms (subtracted below)")
+    for name, code in SNIPPETS.items():
+        elapsed = time_snippet(code, args.runs, env) - baseline
+        eager = elapsed if eager is None else eager
+        print(f"{name:<28}{elapsed:>9.1f} ms{elapsed / eager:>8.0%} of eager")
+
+
+if __name__ == "__main__":
+    main()
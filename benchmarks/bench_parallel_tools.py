@@ -0,0 +1,117 @@
+"""Multi-tool assistant messages: sequential vs. concurrent read-only tool execution.
+
+Runs the tool calls of one assistant message through Swarm vs. ParallelSwarm
+and AsyncSwarm with concurrent_reads off vs. on. Every data-layer call
+sleeps `--db-latency` seconds to stand in for a networked database; with
+0 the in-memory data layer shows pure scheduling overhead.
+
+    python benchmarks/bench_parallel_tools.py --db-latency 0.005 --repeat 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from openai import AsyncOpenAI, OpenAI  # noqa: E402
+from swarm import Swarm  # noqa: E402
+from swarm.types import ChatCompletionMessageToolCall, Function  # noqa: E402
+
+from ai_agents.async_swarm import AsyncSwarm  # noqa: E402
+from ai_agents.chat_agent import chat_agent  # noqa: E402
+from ai_agents.food_analysis_agent import food_analysis_agent  # noqa: E402
+from ai_agents.parallel_tools import ParallelSwarm  # noqa: E402
+from synthetic import InMemoryDataLayer, populate  # noqa: E402
+
+GOAL_DATE = (date.today() + timedelta(days=90)).isoformat()
+MESSAGES = {
+    "status+meals": [("get_calorie_status", {}), ("get_meals_today", {})],
+    "status+meals+report": [
+        ("get_calorie_status", {}), ("get_meals_today", {}), ("get_monthly_report", {}),
+    ],
+    "weight+goal": [
+        ("record_weight", {"weight_kg": 81.5}),
+        ("set_weight_goal_fn", {"target_weight": 76.0, "target_date": GOAL_DATE}),
+    ],
+}
+
+
+def tool_calls(calls: list) -> list:
+    return [
+        ChatCompletionMessageToolCall(
+            id=f"call_{i}", type="function",
+            function=Function(name=name, arguments=json.dumps(arguments)),
+        )
+        for i, (name, arguments) in enumerate(calls)
+    ]
+
+
+def with_latency(context_variables: dict, latency: float) -> dict:
+    """Make every data-layer callable wait `latency` seconds before answering."""
+    if not latency:
+        return context_variables
+    slowed = dict(context_variables)
+    for name, fn in context_variables.items():
+        if callable(fn) and not name.endswith("_agent"):
+            def call(*args, _fn=fn, **kwargs):
+                time.sleep(latency)
+                return _fn(*args, **kwargs)
+
+            slowed[name] = call
+    return slowed
+
+
+def measure(handle, calls: list, context_variables: dict, repeat: int) -> tuple:
+    """Return (median ms, tool messages of the last run)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = handle(tool_calls(calls), chat_agent.functions, context_variables, False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), [m["content"] for m in response.messages]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-latency", type=float, default=0.005, help="seconds per data-layer call")
+    parser.add_argument("--repeat", type=int, default=50, help="runs per message and executor")
+    args = parser.parse_args()
+
+    data_layer = InMemoryDataLayer()
+    phone = populate(data_layer, 1, days=30)[0]
+    context_variables = with_latency(
+        {**data_layer.context_variables(), "phone_number": phone, "food_analysis_agent": food_analysis_agent},
+        args.db_latency,
+    )
+
+    sync_sequential = Swarm(client=OpenAI(api_key="unused"))
+    sync_parallel = ParallelSwarm(client=OpenAI(api_key="unused"))
+    async_sequential = AsyncSwarm(client=AsyncOpenAI(api_key="unused"), concurrent_reads=False)
+    async_parallel = AsyncSwarm(client=AsyncOpenAI(api_key="unused"))
+
+    def on_loop(swarm):
+        return lambda *args: asyncio.run(swarm.handle_tool_calls(*args))
+
+    executors = [
+        ("Swarm", sync_sequential.handle_tool_calls, sync_parallel.handle_tool_calls),
+        ("AsyncSwarm", on_loop(async_sequential), on_loop(async_parallel)),
+    ]
+
+    print(f"data-layer latency {args.db_latency * 1000:g} ms, median of {args.repeat} runs")
+    print(f"{'message':<22}{'executor':<12}{'sequential':>12}{'concurrent':>12}{'speedup':>9}")
+    for name, calls in MESSAGES.items():
+        for label, sequential, concurrent in executors:
+            before, expected = measure(sequential, calls, context_variables, args.repeat)
+            after, actual = measure(concurrent, calls, context_variables, args.repeat)
+            assert actual == expected, f"{name}: results differ between executors"
+            print(f"{name:<22}{label:<12}{before:>10.2f}ms{after:>10.2f}ms{before / after:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
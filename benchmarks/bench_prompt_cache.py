@@ -0,0 +1,101 @@
+"""Provider prompt-cache hit rate: profile inlined at the top of the prompt vs. a stable prefix.
+
+Users with different names and dietary preferences each run `--turns`
+chat turns against the fake completion server with prompt caching on.
+"inline" puts the per-user block in front of the instructions, which is
+what mixing profile guidance into the prompt amounts to; "stable" keeps
+the instructions and tools as a shared prefix and sends the block last
+(PromptAssembler).
+
+    python benchmarks/bench_prompt_cache.py --users 50 --turns 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from openai import AsyncOpenAI  # noqa: E402
+from swarm import Agent  # noqa: E402
+
+from ai_agents.async_swarm import AsyncSwarm  # noqa: E402
+from ai_agents.chat_agent import chat_agent  # noqa: E402
+from ai_agents.prompting import PromptAssembler, user_context_block  # noqa: E402
+from fake_openai import FakeOpenAIServer  # noqa: E402
+from scenarios import SCENARIOS, script  # noqa: E402
+from synthetic import InMemoryDataLayer, populate  # noqa: E402
+
+TURNS = ["text_meal", "status", "portion_edit"]
+NAMES = ["Ana", "Ben", "Chen", "Dara", "Eli", "Fatima", "Goran", "Hana"]
+PREFERENCES = ["", "vegetarian", "allergic to nuts", "no pork", "lactose intolerant"]
+ZONES = ["UTC", "Europe/London", "Asia/Riyadh", "America/New_York"]
+
+
+def make_client(base_url: str):
+    return AsyncOpenAI(base_url=base_url, api_key="fake", max_retries=0)
+
+
+def inline_agent() -> Agent:
+    def instructions(context_variables: dict) -> str:
+        return user_context_block(context_variables)["content"] + "\n\n" + chat_agent.instructions
+
+    return Agent(
+        name=chat_agent.name,
+        model=chat_agent.model,
+        instructions=instructions,
+        functions=chat_agent.functions,
+    )
+
+
+async def run_mode(mode: str, data_layer, phones: list, turns: int, latency: float) -> dict:
+    agent = inline_agent() if mode == "inline" else chat_agent
+    assembler = PromptAssembler(context_block=lambda context_variables: None) if mode == "inline" else PromptAssembler()
+    with FakeOpenAIServer(latency=latency, script=script, keep_requests=False, prompt_cache=True) as server:
+        swarm = assembler.install(AsyncSwarm(client=make_client(server.url)))
+
+        async def chat(phone: str):
+            history = []
+            context_variables = {
+                **data_layer.context_variables(),
+                "phone_number": phone,
+                "user_profile": data_layer.get_or_create_user(phone),
+            }
+            for turn in range(turns):
+                history.append(SCENARIOS[TURNS[turn % len(TURNS)]].message())
+                response = await swarm.run(agent, history, context_variables)
+                history.extend(response.messages)
+
+        await asyncio.gather(*(chat(phone) for phone in phones))
+    stats = assembler.stats()[chat_agent.name]
+    stats["cached_per_completion"] = round(stats["cached_tokens"] / stats["completions"])
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02, help="fake completion latency (s)")
+    args = parser.parse_args()
+
+    data_layer = InMemoryDataLayer()
+    phones = populate(data_layer, args.users, days=2)
+    rng = random.Random(5)
+    for phone in phones:
+        user = data_layer.get_or_create_user(phone)
+        data_layer.update_user_profile(
+            user["id"], first_name=rng.choice(NAMES), dietary_preferences=rng.choice(PREFERENCES),
+            timezone=rng.choice(ZONES),
+        )
+
+    print(f"{args.users} users x {args.turns} turns, chat_agent")
+    for mode in ("inline", "stable"):
+        stats = asyncio.run(run_mode(mode, data_layer, phones, args.turns, args.latency))
+        print(f"{mode:<8} " + "  ".join(f"{key}={value}" for key, value in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
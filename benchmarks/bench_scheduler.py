@@ -0,0 +1,136 @@
+"""Message bursts at peak time: one run per message vs. ChatScheduler + RateLimiter.
+
+Each user sends a burst like "had lunch", "2 eggs", "and toast", "oh and
+coffee" a fraction of a second apart, users starting at random offsets.
+The fake completion server enforces an RPM budget per `--window` seconds
+and answers 429 beyond it. Naive mode runs every message immediately
+with no client-side limiting; scheduled mode merges bursts per user and
+budgets requests.
+
+    python benchmarks/bench_scheduler.py --users 40 --rpm 60 --window 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from openai import AsyncOpenAI  # noqa: E402
+
+from ai_agents.async_swarm import AsyncSwarm  # noqa: E402
+from ai_agents.chat_agent import chat_agent  # noqa: E402
+from ai_agents.scheduler import ChatScheduler, RateLimiter  # noqa: E402
+from fake_openai import FakeOpenAIServer, tool_call  # noqa: E402
+from synthetic import InMemoryDataLayer  # noqa: E402
+
+BURST = ["had lunch", "2 eggs", "and toast", "oh and coffee"]
+MEAL_ARGS = {
+    "food_items_json": json.dumps([{"name": "eggs", "quantity": "2 large", "calories": 180,
+                                    "protein_g": 12.6, "carbs_g": 1.2, "sugar_g": 0.8}]),
+    "total_calories": 180, "total_protein": 12.6, "total_carbs": 1.2, "total_sugar": 0.8,
+    "health_rating": 7,
+}
+
+
+def make_client(base_url: str):
+    return AsyncOpenAI(base_url=base_url, api_key="fake", max_retries=0)
+
+
+def script(body: dict) -> dict:
+    """Log the described food, then confirm."""
+    if body["messages"][-1].get("role") == "tool":
+        return {"content": "Logged."}
+    return {"tool_calls": [tool_call("save_text_meal", MEAL_ARGS)]}
+
+
+class Simulation:
+    def __init__(self, swarm, data_layer, users: int, gap: float, spread: float, seed: int = 3):
+        self.swarm = swarm
+        self.data_layer = data_layer
+        self.histories = {}
+        self.contexts = {}
+        self.latencies = []
+        self.failures = 0
+        rng = random.Random(seed)
+        self.starts = {f"+1555{i:07d}": rng.uniform(0, spread) for i in range(users)}
+        self.gap = gap
+        for phone in self.starts:
+            self.histories[phone] = []
+            self.contexts[phone] = {**data_layer.context_variables(), "phone_number": phone}
+
+    async def run_turn(self, phone: str, message: dict):
+        response = await self.swarm.run(chat_agent, self.histories[phone] + [message], self.contexts[phone])
+        self.histories[phone] += [message] + response.messages
+        return response.messages[-1]["content"]
+
+    async def user(self, phone: str, send):
+        await asyncio.sleep(self.starts[phone])
+        sends = []
+        for text in BURST:
+            sends.append(asyncio.create_task(send(phone, {"role": "user", "content": text})))
+            await asyncio.sleep(self.gap)
+        last_sent = time.perf_counter() - self.gap
+        for result in await asyncio.gather(*sends, return_exceptions=True):
+            if isinstance(result, Exception):
+                self.failures += 1
+        self.latencies.append(time.perf_counter() - last_sent)
+
+    async def run(self, send) -> float:
+        start = time.perf_counter()
+        await asyncio.gather(*(self.user(phone, send) for phone in self.starts))
+        return time.perf_counter() - start
+
+
+async def bench(mode: str, args) -> dict:
+    data_layer = InMemoryDataLayer()
+    with FakeOpenAIServer(
+        latency=args.latency, script=script, keep_requests=False, rpm=args.rpm, rate_window=args.window
+    ) as server:
+        swarm = AsyncSwarm(client=make_client(server.url))
+        limiter = None
+        if mode == "scheduled":
+            limiter = RateLimiter(rpm=args.rpm, tpm=10_000_000, period=args.window)
+            limiter.install(swarm)
+        sim = Simulation(swarm, data_layer, args.users, args.gap, args.spread)
+        if mode == "scheduled":
+            scheduler = ChatScheduler(sim.run_turn, debounce=args.debounce)
+            elapsed = await sim.run(scheduler.submit)
+        else:
+            elapsed = await sim.run(sim.run_turn)
+        return {
+            "completions": server.request_count,
+            "rate_limited": server.rate_limited,
+            "failed_messages": sim.failures,
+            "meals_logged": len(data_layer.meals),
+            "reply_p50_s": round(statistics.median(sim.latencies), 2),
+            "reply_max_s": round(max(sim.latencies), 2),
+            "elapsed_s": round(elapsed, 2),
+            **({"client_delayed": limiter.stats()["delayed"]} if limiter else {}),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--rpm", type=int, default=60, help="requests allowed per window")
+    parser.add_argument("--window", type=float, default=5.0, help="rate-limit window (s), scaled down from 60")
+    parser.add_argument("--latency", type=float, default=0.1, help="fake completion latency (s)")
+    parser.add_argument("--gap", type=float, default=0.4, help="seconds between a user's burst messages")
+    parser.add_argument("--spread", type=float, default=3.0, help="users start within this many seconds")
+    parser.add_argument("--debounce", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{args.users} users x {len(BURST)} messages, {args.rpm} requests per {args.window:g}s")
+    for mode in ("naive", "scheduled"):
+        results = asyncio.run(bench(mode, args))
+        print(f"{mode:<10} " + "  ".join(f"{key}={value}" for key, value in results.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Sharded workers: key movement on reshard, load skew, and a live supervisor run.
+
+Ring: `--keys` synthetic phone numbers are placed on N shards with the
+consistent-hash ring and with `hash % N`; the table shows the share of
+users that change shard when one worker is added, and the max/mean load.
+
+Live: `--users` users each send `--turns` updates to a ShardSupervisor.
+The handler loads a user's state on first sight ("cold", `--cold-ms`),
+burns `--cpu-ms` of CPU and waits `--io-ms` for the model, and checks that
+each user's updates arrive in order. Halfway through, the run resizes from
+`--workers` to `--workers + 1` shards, and `--kill` also kills one worker to
+exercise the health check.
+
+    python benchmarks/bench_sharding.py --workers 4 --users 200 --turns 6
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_agents.sharding import HashRing, ShardSupervisor, WorkerLost  # noqa: E402
+
+
+def phone(i: int) -> str:
+    return f"+1555{i:07d}"
+
+
+def skew(loads) -> float:
+    loads = list(loads)
+    return max(loads) / (sum(loads) / len(loads))
+
+
+def ring_table(keys: int, shard_counts: list, vnodes: int):
+    phones = [phone(i) for i in range(keys)]
+    print(f"{keys} keys, {vnodes} vnodes per shard")
+    print(f"{'shards':>8}{'ring moved':>12}{'mod moved':>11}{'ring skew':>11}{'mod skew':>10}")
+    for n in shard_counts:
+        before = HashRing([f"shard-{i}" for i in range(n)], vnodes=vnodes)
+        after = HashRing([f"shard-{i}" for i in range(n + 1)], vnodes=vnodes)
+        ring_moved = sum(before.node_for(p) != after.node_for(p) for p in phones)
+        mod_moved = sum(int(p) % n != int(p) % (n + 1) for p in phones)
+        ring_loads = Counter(before.node_for(p) for p in phones)
+        mod_loads = Counter(int(p) % n for p in phones)
+        print(
+            f"{f'{n}->{n + 1}':>8}{ring_moved / keys:>12.1%}{mod_moved / keys:>11.1%}"
+            f"{skew(ring_loads.values()):>11.3f}{skew(mod_loads.values()):>10.3f}"
+        )
+
+
+def make_handler(shard: str):
+    cold_ms = float(os.environ.get("BENCH_COLD_MS", "20"))
+    cpu_ms = float(os.environ.get("BENCH_CPU_MS", "5"))
+    io_ms = float(os.environ.get("BENCH_IO_MS", "20"))
+    seen = {}
+
+    async def handle(key: str, payload: dict) -> dict:
+        warm = key in seen
+        if not warm:
+            await asyncio.sleep(cold_ms / 1000)
+        in_order = payload["n"] > seen.get(key, -1)
+        seen[key] = payload["n"]
+        deadline = time.perf_counter() + cpu_ms / 1000
+        while time.perf_counter() < deadline:
+            pass
+        await asyncio.sleep(io_ms / 1000)
+        return {"warm": warm, "in_order": in_order}
+
+    return handle
+
+
+async def live(args) -> dict:
+    os.environ.update(BENCH_COLD_MS=str(args.cold_ms), BENCH_CPU_MS=str(args.cpu_ms), BENCH_IO_MS=str(args.io_ms))
+    rng = random.Random(11)
+    results = Counter()
+    half = args.turns // 2
+    with ShardSupervisor(make_handler, workers=args.workers, heartbeat_interval=0.5, heartbeat_timeout=3) as supervisor:
+        before = {phone(i): supervisor.shard_for(phone(i)) for i in range(args.users)}
+
+        async def user(i: int, turns: range):
+            await asyncio.sleep(rng.uniform(0, 0.5))
+            for n in turns:
+                try:
+                    reply = await asyncio.wrap_future(supervisor.submit(phone(i), {"n": n}))
+                except WorkerLost:
+                    results["lost"] += 1
+                    continue
+                results["warm" if reply["warm"] else "cold"] += 1
+                results["out_of_order"] += not reply["in_order"]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(i, range(half)) for i in range(args.users)))
+        supervisor.resize(args.workers + 1)
+        if args.kill:
+            victim = next(iter(supervisor.stats()["shards"].values()))["pid"]
+            os.kill(victim, signal.SIGKILL)
+        await asyncio.gather(*(user(i, range(half, args.turns)) for i in range(args.users)))
+        elapsed = time.perf_counter() - start
+        moved = sum(supervisor.shard_for(p) != shard for p, shard in before.items())
+        stats = supervisor.stats()
+    for name, shard in sorted(stats["shards"].items()):
+        print(
+            f"  {name}: submitted={shard['submitted']} users={shard['users']} "
+            f"restarts={shard['restarts']} mean_latency_ms={shard['mean_latency_ms']}"
+        )
+    return {
+        "updates_per_s": round(sum(results[k] for k in ("warm", "cold")) / elapsed, 1),
+        "warm_share": round(results["warm"] / max(1, results["warm"] + results["cold"]), 3),
+        "users_moved": f"{moved / args.users:.1%}",
+        "out_of_order": results["out_of_order"],
+        "lost": results["lost"],
+        "skew": stats["skew"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--vnodes", type=int, default=128)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--cold-ms", type=float, default=20, help="first-update state load per user per worker")
+    parser.add_argument("--cpu-ms", type=float, default=5, help="CPU time per update")
+    parser.add_argument("--io-ms", type=float, default=20, help="model wait per update")
+    parser.add_argument("--kill", action="store_true", help="kill one worker after resharding")
+    args = parser.parse_args()
+
+    ring_table(args.keys, [2, 4, 8, 16], args.vnodes)
+    print(f"\nlive: {args.users} users x {args.turns} updates, {args.workers} -> {args.workers + 1} workers")
+    results = asyncio.run(live(args))
+    print("  " + "  ".join(f"{key}={value}" for key, value in results.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Per-call latency of the SQLite data layer on a large synthetic population.
+
+    python benchmarks/bench_sqlite_backend.py --users 100000 --meals 10000000
+
+Seeding 10M meals takes a few minutes the first time; pass --db to reuse the
+seeded file between runs (seeding is skipped when it already holds users).
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_agents.sqlite_backend import SQLiteDataLayer  # noqa: E402
+
+FOOD_ITEMS = json.dumps(
+    [{"name": "oatmeal", "quantity": "1 bowl", "calories": 300,
+      "protein_g": 10, "carbs_g": 54, "sugar_g": 6}]
+)
+SEED_BATCH = 50_000
+
+
+def seed(db: SQLiteDataLayer, users: int, meals: int, days: int):
+    rng = random.Random(7)
+    start = time.perf_counter()
+    with db.connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (phone_number, created_at) VALUES (?, ?)",
+            ((f"+1555{i:07d}", "2024-01-01 00:00:00") for i in range(users)),
+        )
+
+    now = datetime.now()
+    for offset in range(0, meals, SEED_BATCH):
+        batch = []
+        for _ in range(min(SEED_BATCH, meals - offset)):
+            batch.append({
+                "user_id": rng.randint(1, users),
+                "logged_at": now - timedelta(minutes=rng.randint(0, days * 24 * 60)),
+                "food_items": FOOD_ITEMS,
+                "total_calories": rng.randint(100, 1200),
+                "protein_g": rng.randint(0, 60),
+                "carbs_g": rng.randint(0, 150),
+                "sugar_g": rng.randint(0, 40),
+                "health_rating": rng.randint(1, 10),
+            })
+        db.log_meals(batch)
+        print(f"\rseeded {offset + len(batch):,}/{meals:,} meals", end="", flush=True)
+
+    db.log_weights(
+        (user_id, rng.uniform(55, 110), now - timedelta(days=rng.randint(0, days)))
+        for user_id in range(1, users + 1)
+    )
+    with db.connection() as conn:
+        conn.executemany(
+            "INSERT INTO weight_goals (user_id, target_weight, target_date, tdee) VALUES (?, ?, ?, ?)",
+            ((user_id, 70.0, (date.today() + timedelta(days=120)).isoformat(), 2300)
+             for user_id in range(1, users + 1, 3)),
+        )
+        conn.execute("ANALYZE")
+    print(f"\nseeding took {time.perf_counter() - start:.1f}s")
+
+
+def measure(name: str, fn, user_ids: list) -> tuple:
+    timings = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        fn(user_id)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return (
+        name,
+        statistics.fmean(timings),
+        timings[len(timings) // 2],
+        timings[int(len(timings) * 0.95)],
+        timings[int(len(timings) * 0.99)],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--meals", type=int, default=10_000_000)
+    parser.add_argument("--days", type=int, default=90, help="history window for seeded meals")
+    parser.add_argument("--calls", type=int, default=2_000, help="calls per measured callable")
+    parser.add_argument("--db", help="database file (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench.db")
+    db = SQLiteDataLayer(path)
+    with db.connection() as conn:
+        existing = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    if not existing:
+        seed(db, args.users, args.meals, args.days)
+        existing = args.users
+
+    rng = random.Random(11)
+    user_ids = [rng.randint(1, existing) for _ in range(args.calls)]
+    phones = {user_id: f"+1555{user_id - 1:07d}" for user_id in user_ids}
+
+    results = [
+        measure("get_or_create_user", lambda u: db.get_or_create_user(phones[u]), user_ids),
+        measure("get_user_meals_today", db.get_user_meals_today, user_ids),
+        measure("get_user_today_macros", db.get_user_today_macros, user_ids),
+        measure("get_last_meal", db.get_last_meal, user_ids),
+        measure("compute_daily_calorie_limit", db.compute_daily_calorie_limit, user_ids),
+        measure("get_weekly_consumption", db.get_weekly_consumption, user_ids),
+        measure("get_monthly_consumption", db.get_monthly_consumption, user_ids),
+        measure(
+            "log_meal",
+            lambda u: db.log_meal(user_id=u, food_items=FOOD_ITEMS, total_calories=300),
+            user_ids,
+        ),
+    ]
+
+    print(f"\n{'callable':<30}{'mean µs':>10}{'p50 µs':>10}{'p95 µs':>10}{'p99 µs':>10}")
+    for name, mean, p50, p95, p99 in results:
+        print(f"{name:<30}{mean:>10.1f}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
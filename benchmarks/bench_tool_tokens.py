@@ -0,0 +1,149 @@
+"""Tokens in tool output: raw food_items JSON rendering vs. the dense Meal rendering.
+
+Tool results stay in the conversation and are re-sent on every later turn,
+so these counts are paid again per turn, not once.
+
+    python benchmarks/bench_tool_tokens.py --meals 4
+
+Uses tiktoken (o200k_base) when installed, otherwise a chars/4 estimate.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_agents.chat_agent import get_meals_today  # noqa: E402
+from ai_agents.history import _count_text, render_today_block  # noqa: E402
+from ai_agents.summary_agent import format_daily_data  # noqa: E402
+
+SAMPLE_MEALS = [
+    [
+        {"name": "scrambled eggs", "quantity": "2 large", "calories": 180,
+         "protein_g": 12.6, "carbs_g": 1.2, "sugar_g": 0.8},
+        {"name": "whole wheat toast", "quantity": "1 slice", "calories": 80,
+         "protein_g": 4.0, "carbs_g": 14.0, "sugar_g": 1.4},
+        {"name": "orange juice", "quantity": "250 ml", "calories": 110,
+         "protein_g": 1.7, "carbs_g": 26.0, "sugar_g": 21.0},
+    ],
+    [
+        {"name": "grilled chicken breast", "quantity": "150 g", "calories": 248,
+         "protein_g": 46.5, "carbs_g": 0.0, "sugar_g": 0.0},
+        {"name": "white rice", "quantity": "1 cup", "calories": 205,
+         "protein_g": 4.3, "carbs_g": 44.5, "sugar_g": 0.1},
+        {"name": "mixed salad", "quantity": "1 bowl", "calories": 60,
+         "protein_g": 2.0, "carbs_g": 10.0, "sugar_g": 4.0},
+    ],
+    [
+        {"name": "greek yogurt", "quantity": "170 g", "calories": 100,
+         "protein_g": 17.0, "carbs_g": 6.0, "sugar_g": 6.0},
+        {"name": "blueberries", "quantity": "1/2 cup", "calories": 42,
+         "protein_g": 0.5, "carbs_g": 10.7, "sugar_g": 7.4},
+    ],
+    [
+        {"name": "pepperoni pizza", "quantity": "2 slices", "calories": 596,
+         "protein_g": 24.0, "carbs_g": 66.0, "sugar_g": 7.6},
+        {"name": "cola", "quantity": "1 can (330 ml)", "calories": 139,
+         "protein_g": 0.0, "carbs_g": 35.0, "sugar_g": 35.0},
+    ],
+]
+
+
+def sample_rows(count: int) -> list:
+    rows = []
+    for i in range(count):
+        items = SAMPLE_MEALS[i % len(SAMPLE_MEALS)]
+        rows.append({
+            "id": i + 1,
+            "user_id": 1,
+            "logged_at": f"2026-10-17 {8 + 3 * i:02d}:15:00",
+            "food_items": json.dumps(items),
+            "total_calories": sum(item["calories"] for item in items),
+            "protein_g": round(sum(item["protein_g"] for item in items), 1),
+            "carbs_g": round(sum(item["carbs_g"] for item in items), 1),
+            "sugar_g": round(sum(item["sugar_g"] for item in items), 1),
+            "health_rating": 7 - i % 4,
+            "image_id": None,
+            "notes": "",
+        })
+    return rows
+
+
+def legacy_meals_today(meals: list) -> str:
+    """Meal lines as get_meals_today rendered them before the Meal model."""
+    return "\n".join(
+        f"{i}. {m['food_items']} - {m['total_calories']} cal "
+        f"(P:{m.get('protein_g', 0)}g C:{m.get('carbs_g', 0)}g S:{m.get('sugar_g', 0)}g) "
+        f"[Health: {m.get('health_rating', 0)}/10]"
+        for i, m in enumerate(meals, 1)
+    )
+
+
+def legacy_daily_data_meals(meals: list) -> str:
+    return "\n".join(
+        f"- Meal at {m['logged_at']}: {m['total_calories']} cal "
+        f"(P:{m.get('protein_g', 0)}g C:{m.get('carbs_g', 0)}g S:{m.get('sugar_g', 0)}g) "
+        f"[Health: {m.get('health_rating', 0)}/10] "
+        f"({m['food_items']})"
+        for m in meals
+    )
+
+
+def legacy_today_block(meals: list) -> str:
+    return "\n".join(
+        f"- {m['total_calories']} cal (P:{m.get('protein_g', 0)}g C:{m.get('carbs_g', 0)}g "
+        f"S:{m.get('sugar_g', 0)}g): {m['food_items']}"
+        for m in meals
+    )
+
+
+def context_for(meals: list) -> dict:
+    daily = {
+        "total_calories": sum(m["total_calories"] for m in meals),
+        "total_protein": round(sum(m["protein_g"] for m in meals), 1),
+        "total_carbs": round(sum(m["carbs_g"] for m in meals), 1),
+        "total_sugar": round(sum(m["sugar_g"] for m in meals), 1),
+        "avg_health_rating": 5.5,
+    }
+    limit = {"daily_limit": 2000, "has_weight_goal": False}
+    return {
+        "phone_number": "+15550000000",
+        "get_or_create_user": lambda phone: {"id": 1},
+        "get_user_meals_today": lambda user_id: meals,
+        "get_user_today_macros": lambda user_id: daily,
+        "compute_daily_calorie_limit": lambda user_id: limit,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--meals", type=int, default=4)
+    args = parser.parse_args()
+
+    meals = sample_rows(args.meals)
+    ctx = context_for(meals)
+    daily = ctx["get_user_today_macros"](1)
+    period = {**daily, "days_elapsed": 5, "meal_count": len(meals)}
+    daily_data = format_daily_data(meals, daily, {"daily_limit": 2000, "has_weight_goal": False},
+                                   period, period)
+    new_meals_section = daily_data.split("Meals (", 1)[1].split("\n\n", 1)[0]
+
+    rows = [
+        # (tool, meal section before, meal section after)
+        ("get_meals_today", legacy_meals_today(meals),
+         get_meals_today(ctx).split("\n", 1)[1].split("\n\n", 1)[0]),
+        ("get_daily_data", legacy_daily_data_meals(meals), new_meals_section.split("\n", 1)[1]),
+        ("history today block", legacy_today_block(meals),
+         render_today_block(meals)["content"].split("\n", 1)[1]),
+    ]
+
+    print(f"{len(meals)} meals; tokens in the meal listing of each tool result")
+    print(f"{'tool':<22}{'before':>8}{'after':>8}{'saved':>8}")
+    for name, before, after in rows:
+        b, a = _count_text(before), _count_text(after)
+        print(f"{name:<22}{b:>8}{a:>8}{(b - a) / b:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Weight-trend analytics: accuracy of effective TDEE and cost of batched vs. per-user runs.
+
+Each synthetic user has a true TDEE; the simulation eats around a random
+intake every day, logs most days' calories (with logging noise), weighs
+in on some days (with scale and water noise) and moves weight by
+energy balance at 7700 kcal/kg. The table compares the TDEE the analytics
+recover against the truth and against the static 2000 default the
+daily limit uses when none is set, and the error of the weekly trend.
+
+    python benchmarks/bench_weight_trends.py --users 10000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_agents.sqlite_backend import DEFAULT_TDEE, KCAL_PER_KG, TREND_WINDOW_DAYS  # noqa: E402
+from ai_agents.weight_trends import analyze  # noqa: E402
+
+
+def simulate(users: int, today: date, weigh_in_rate: float, log_rate: float, seed: int = 3) -> tuple:
+    rng = random.Random(seed)
+    inputs, truth = {}, {}
+    for user_id in range(users):
+        tdee = rng.gauss(2400, 300)
+        intake_mean = tdee + rng.uniform(-700, 300)
+        weight = rng.uniform(60, 110)
+        weights, intake = [], []
+        for offset in range(TREND_WINDOW_DAYS - 1, -1, -1):
+            day = today - timedelta(days=offset)
+            eaten = rng.gauss(intake_mean, 250)
+            if rng.random() < weigh_in_rate:
+                weights.append((day, round(weight + rng.gauss(0, 0.4), 1)))
+            if offset and rng.random() < log_rate:
+                intake.append((day, round(eaten * rng.gauss(1.0, 0.05))))
+            weight += (eaten - tdee) / KCAL_PER_KG
+        inputs[user_id] = {"weights": weights, "intake": intake, "target_weight": None, "target_date": None}
+        truth[user_id] = {"tdee": tdee, "weekly_change": (intake_mean - tdee) * 7 / KCAL_PER_KG}
+    return inputs, truth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--weigh-in-rate", type=float, default=0.4, help="share of days with a weigh-in")
+    parser.add_argument("--log-rate", type=float, default=0.8, help="share of days with meals logged")
+    parser.add_argument("--per-user", type=int, default=1000, help="users for the one-at-a-time timing")
+    args = parser.parse_args()
+
+    today = date.today()
+    inputs, truth = simulate(args.users, today, args.weigh_in_rate, args.log_rate)
+
+    start = time.perf_counter()
+    results = analyze(inputs, today)
+    batched = time.perf_counter() - start
+    sample = list(inputs)[:args.per_user]
+    start = time.perf_counter()
+    for user_id in sample:
+        analyze({user_id: inputs[user_id]}, today)
+    per_user = (time.perf_counter() - start) / len(sample)
+
+    estimated = [(results[u], truth[u]) for u in results if results[u]["effective_tdee"] is not None]
+    tdee_errors = [r["effective_tdee"] - t["tdee"] for r, t in estimated]
+    static_errors = [DEFAULT_TDEE - t["tdee"] for _, t in estimated]
+    trend_errors = [abs(r["weekly_change_kg"] - t["weekly_change"]) for r, t in estimated]
+
+    print(f"{args.users} users, {TREND_WINDOW_DAYS} days, weigh-ins on {args.weigh_in_rate:.0%} of days, "
+          f"meals logged on {args.log_rate:.0%}")
+    print(f"estimated for {len(estimated) / args.users:.1%} of users")
+    print(f"effective TDEE  MAE {statistics.mean(map(abs, tdee_errors)):>6.0f} cal   "
+          f"bias {statistics.mean(tdee_errors):+.0f} cal")
+    print(f"static {DEFAULT_TDEE}     MAE {statistics.mean(map(abs, static_errors)):>6.0f} cal   "
+          f"bias {statistics.mean(static_errors):+.0f} cal")
+    print(f"weekly change   MAE {statistics.mean(trend_errors):>6.2f} kg")
+    print(f"batched: {batched * 1000:.0f} ms total, {batched / args.users * 1e6:.1f} us/user; "
+          f"one user at a time: {per_user * 1e6:.0f} us/user ({per_user * args.users / batched:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Stacked get_chat_completion installers: every order of RateLimiter, ModelRouter, PromptAssembler, Tracer.
+
+Each installer binds the call's arguments against get_chat_completion's
+signature, so they only compose if every wrapper keeps that signature.
+For every install order, on Swarm and AsyncSwarm, one chat turn runs
+against the fake completion server. The check fails (exit 1) unless
+every order completes and each installer saw the call: the limiter
+budgeted it, the router picked a model, the assembler appended the user
+context block and the tracer recorded the agent and model.
+
+    python benchmarks/check_installers.py
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from openai import AsyncOpenAI, OpenAI  # noqa: E402
+from swarm import Agent, Swarm  # noqa: E402
+
+from ai_agents.async_swarm import AsyncSwarm  # noqa: E402
+from ai_agents.model_tiering import ModelRouter  # noqa: E402
+from ai_agents.prompting import USER_CONTEXT_PREFIX, PromptAssembler  # noqa: E402
+from ai_agents.scheduler import RateLimiter  # noqa: E402
+from ai_agents.tracing import Tracer  # noqa: E402
+from fake_openai import FakeOpenAIServer  # noqa: E402
+
+AGENT = Agent(name="Check Agent", model="gpt-4o", instructions="Answer briefly.")
+CONTEXT_VARIABLES = {"user_profile": {"first_name": "Ana", "timezone": "UTC"}}
+MESSAGES = [{"role": "user", "content": "hi there"}]
+
+
+def install_all(client, order: tuple) -> dict:
+    installers = {
+        "limiter": RateLimiter(),
+        "router": ModelRouter(),
+        "assembler": PromptAssembler(),
+        "tracer": Tracer(),
+    }
+    for name in order:
+        if name == "tracer":
+            installers[name].instrument_client(client)
+        else:
+            installers[name].install(client)
+    return installers
+
+
+def problems(installers: dict, server, requests_before: int) -> list:
+    found = []
+    if not installers["limiter"].counts["requests"]:
+        found.append("limiter saw no request")
+    if not sum(installers["router"].decisions.values()):
+        found.append("router made no decision")
+    if not installers["assembler"].usage[AGENT.name]["completions"]:
+        found.append("assembler recorded no completion")
+    sent = server.requests[requests_before:]
+    last = sent[-1]["messages"][-1] if sent else {}
+    if not str(last.get("content", "")).startswith(USER_CONTEXT_PREFIX):
+        found.append("request did not end with the user context block")
+    spans = [span for span in installers["tracer"].last_trace.spans if span.kind == "llm"]
+    if not spans or any(span.attrs.get("agent") != AGENT.name or not span.attrs.get("model") for span in spans):
+        found.append("tracer span is missing agent or model")
+    return found
+
+
+def check_sync(server, order: tuple) -> list:
+    client = Swarm(client=OpenAI(base_url=server.url, api_key="fake", max_retries=0))
+    installers = install_all(client, order)
+    before = len(server.requests)
+    with installers["tracer"].turn():
+        client.run(AGENT, list(MESSAGES), dict(CONTEXT_VARIABLES))
+    return problems(installers, server, before)
+
+
+async def check_async(server, order: tuple) -> list:
+    client = AsyncSwarm(client=AsyncOpenAI(base_url=server.url, api_key="fake", max_retries=0))
+    installers = install_all(client, order)
+    before = len(server.requests)
+    with installers["tracer"].turn():
+        await client.run(AGENT, list(MESSAGES), dict(CONTEXT_VARIABLES))
+    return problems(installers, server, before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+
+    failures = 0
+    orders = list(itertools.permutations(("limiter", "router", "assembler", "tracer")))
+    with FakeOpenAIServer() as server:
+        for order in orders:
+            for kind, check in (("Swarm", check_sync), ("AsyncSwarm", check_async)):
+                try:
+                    found = check(server, order)
+                    if kind == "AsyncSwarm":
+                        found = asyncio.run(found)
+                except Exception as e:
+                    found = [f"{type(e).__name__}: {e}"]
+                if found:
+                    failures += 1
+                    print(f"FAIL {kind:<10} {' -> '.join(order)}: {'; '.join(found)}")
+    print(f"{len(orders) * 2 - failures}/{len(orders) * 2} install orders compose")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Local stand-in for the OpenAI chat completions endpoint.
+
+Point a client at it with `OpenAI(base_url=server.url, api_key="fake")`.
+Responses are valid ChatCompletion JSON after a configurable latency, so
+benchmarks measure our own overhead and concurrency rather than the API.
+A `script` callable can answer with tool calls to drive whole agent turns,
+and `rpm`/`tpm` limits make it answer 429 like the real rate limiter.
+With `prompt_cache=True` usage reports cached tokens for prompt prefixes it
+has seen before, in the provider's 128-token steps from 1024 tokens up.
+
+    python benchmarks/fake_openai.py --port 8089 --latency 0.2
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "Here is your summary: you stayed close to your goal today. Keep it up!"
+# ~4 chars per token: 128-token cache steps, nothing cached below 1024 tokens
+CACHE_CHUNK_CHARS = 512
+CACHE_MIN_CHARS = 4096
+
+
+def tool_call(name: str, arguments: dict, call_id: str = None) -> dict:
+    return {
+        "id": call_id or f"call_{time.monotonic_ns()}",
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)},
+    }
+
+
+def chat_completion(message, model: str, prompt_tokens: int = 0, cached_tokens: int = 0) -> dict:
+    """ChatCompletion JSON for `message`: reply text, or a dict with content/tool_calls."""
+    if isinstance(message, str):
+        message = {"content": message}
+    tool_calls = message.get("tool_calls") or None
+    content = message.get("content")
+    completion_tokens = len(content or json.dumps(tool_calls)) // 4 + 1
+    return {
+        "id": f"chatcmpl-fake-{time.monotonic_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content, "tool_calls": tool_calls},
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+                "logprobs": None,
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        },
+    }
+
+
+def _prompt_tokens(body: dict) -> int:
+    return sum(len(str(m.get("content") or "")) // 4 for m in body.get("messages", []))
+
+
+class FakeOpenAIServer:
+    """Threaded HTTP server answering POST /v1/chat/completions.
+
+    `reply(body) -> str` may be given to vary the assistant text per request,
+    or `script(body) -> dict` to answer with {"content"} or {"tool_calls"}
+    (see `tool_call()`). Every request body is kept in `self.requests`
+    unless `keep_requests=False`.
+
+    With `rpm` and/or `tpm` set, requests beyond that many (or beyond that
+    many estimated prompt tokens) in the trailing `rate_window` seconds get
+    a 429 with `retry-after-ms`, counted in `rate_limited`.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        reply=None,
+        script=None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        keep_requests: bool = True,
+        rpm: int = None,
+        tpm: int = None,
+        rate_window: float = 60.0,
+        prompt_cache: bool = False,
+    ):
+        self.latency = latency
+        self.rpm = rpm
+        self.tpm = tpm
+        self.rate_window = rate_window
+        self.prompt_cache = prompt_cache
+        self._cached_prefixes = set()
+        self.rate_limited = 0
+        self._admitted = deque()
+        self._admitted_tokens = 0
+        self.reply = reply or (lambda body: DEFAULT_REPLY)
+        self.script = script or (lambda body: {"content": self.reply(body)})
+        self.keep_requests = keep_requests
+        self.request_count = 0
+        self.requests = []
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, body: dict) -> tuple:
+        """Return (status, payload) for one chat completion request."""
+        model = body.get("model", "gpt-4o-mini")
+        if not self.prompt_cache:
+            return 200, chat_completion(self.script(body), model, _prompt_tokens(body))
+        # Tools render ahead of the messages, as they do for the real API.
+        prompt = json.dumps({"model": model, "tools": body.get("tools"), "messages": body.get("messages")})
+        return 200, chat_completion(
+            self.script(body), model, len(prompt) // 4, self._cached_chars(prompt) // 4
+        )
+
+    def _cached_chars(self, prompt: str) -> int:
+        """Length of the longest chunk-aligned prefix of `prompt` seen before; then remember it."""
+        digest = hashlib.sha256()
+        matched = 0
+        seen = True
+        for end in range(CACHE_CHUNK_CHARS, len(prompt) + 1, CACHE_CHUNK_CHARS):
+            digest.update(prompt[end - CACHE_CHUNK_CHARS:end].encode())
+            key = digest.copy().hexdigest()
+            with self._lock:
+                if seen and key in self._cached_prefixes:
+                    matched = end
+                else:
+                    seen = False
+                    self._cached_prefixes.add(key)
+        return matched if matched >= CACHE_MIN_CHARS else 0
+
+    def admit(self, body: dict) -> float:
+        """Record a request against the rate limits; return retry-after seconds if it's over."""
+        if self.rpm is None and self.tpm is None:
+            return None
+        tokens = _prompt_tokens(body)
+        now = time.monotonic()
+        with self._lock:
+            while self._admitted and self._admitted[0][0] <= now - self.rate_window:
+                self._admitted_tokens -= self._admitted.popleft()[1]
+            over_rpm = self.rpm is not None and len(self._admitted) >= self.rpm
+            over_tpm = self.tpm is not None and self._admitted_tokens + tokens > self.tpm
+            if not (over_rpm or over_tpm):
+                self._admitted.append((now, tokens))
+                self._admitted_tokens += tokens
+                return None
+            self.rate_limited += 1
+            oldest = self._admitted[0][0] if self._admitted else now
+            return max(0.001, oldest + self.rate_window - now)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                retry_after = server.admit(body)
+                if retry_after is not None:
+                    self._send(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "requests",
+                                   "code": "rate_limit_exceeded"}},
+                        {"retry-after-ms": str(int(retry_after * 1000))},
+                    )
+                    return
+                with server._lock:
+                    server.request_count += 1
+                    if server.keep_requests:
+                        server.requests.append(body)
+                    server._in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server._in_flight)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    status, payload = server.handle(body)
+                finally:
+                    with server._lock:
+                        server._in_flight -= 1
+                self._send(status, payload)
+
+            def _send(self, status: int, payload: dict, headers: dict = None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per completion")
+    parser.add_argument("--rpm", type=int, help="requests per minute before answering 429")
+    parser.add_argument("--tpm", type=int, help="prompt tokens per minute before answering 429")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        latency=args.latency, host=args.host, port=args.port, rpm=args.rpm, tpm=args.tpm
+    )
+    print(f"Fake OpenAI server on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Offline agent benchmark suite: scripted fake model, synthetic users, regression check.
+
+    python benchmarks/run_benchmarks.py --chats 50 --turns 5 --save-baseline benchmarks/baselines/local.json
+    python benchmarks/run_benchmarks.py --chats 50 --turns 5 --compare benchmarks/baselines/local.json
+
+For each scenario, `--chats` concurrent conversations each run `--turns`
+turns through AsyncSwarm against the local fake completion server. Reported
+per scenario:
+
+- throughput: turns/s across all chats
+- p50/p95/p99: turn latency (ms)
+- overhead_p50: turn time not spent waiting on completions (ms)
+- tool_ms / data_calls: mean tool time and data-layer calls per turn
+- kb_per_chat: Python heap held per concurrent chat (tracemalloc pass)
+
+`--compare` exits 1 if any metric is worse than the baseline by more than
+`--threshold` (relative) and `--min-delta` (absolute), or if the baseline
+has no entry for a scenario that ran. Baselines are machine-specific, so
+record one locally with `--save-baseline` before comparing.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from openai import AsyncOpenAI  # noqa: E402
+
+from ai_agents.async_swarm import AsyncSwarm  # noqa: E402
+from ai_agents.chat_agent import chat_agent  # noqa: E402
+from ai_agents.food_analysis_agent import food_analysis_agent  # noqa: E402
+from ai_agents.summary_agent import summary_agent  # noqa: E402
+from ai_agents.tracing import Tracer  # noqa: E402
+from fake_openai import FakeOpenAIServer  # noqa: E402
+from scenarios import SCENARIOS, script  # noqa: E402
+from synthetic import InMemoryDataLayer, populate  # noqa: E402
+
+AGENTS = {
+    "chat_agent": chat_agent,
+    "food_analysis_agent": food_analysis_agent,
+    "summary_agent": summary_agent,
+}
+# metric -> True if higher is better
+METRICS = {
+    "throughput": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "overhead_p50_ms": False,
+    "tool_ms": False,
+    "data_calls": False,
+    "kb_per_chat": False,
+}
+
+
+def make_client(base_url: str):
+    return AsyncOpenAI(base_url=base_url, api_key="fake", max_retries=0)
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class ScenarioRun:
+    def __init__(self, scenario, data_layer, swarm, tracer, phones: list):
+        self.scenario = scenario
+        self.data_layer = data_layer
+        self.swarm = swarm
+        self.tracer = tracer
+        self.phones = phones
+        self.latencies = []
+        self.overheads = []
+        self.tool_ms = []
+        self.data_calls = []
+        self.histories = []
+
+    def context(self, phone: str) -> dict:
+        user = self.data_layer.get_or_create_user(phone)
+        return self.tracer.wrap({
+            **self.data_layer.context_variables(),
+            "phone_number": phone,
+            "user_profile": user,
+            "chat_agent": chat_agent,
+            "food_analysis_agent": food_analysis_agent,
+        })
+
+    async def chat(self, phone: str, turns: int):
+        history = []
+        context_variables = self.context(phone)
+        for _ in range(turns):
+            history.append(self.scenario.message())
+            start = time.perf_counter()
+            with self.tracer.turn(scenario=self.scenario.name) as trace:
+                response = await self.swarm.run(
+                    AGENTS[self.scenario.agent], history, context_variables
+                )
+            elapsed = (time.perf_counter() - start) * 1000
+            history.extend(response.messages)
+            if trace is None:
+                continue
+
+            totals = trace.totals()["ms_by_kind"]
+            self.latencies.append(elapsed)
+            self.overheads.append(elapsed - totals.get("llm", 0.0))
+            self.tool_ms.append(totals.get("tool", 0.0))
+            self.data_calls.append(sum(1 for span in trace.spans if span.kind == "data"))
+        self.histories.append(history)
+
+    async def run(self, turns: int) -> float:
+        start = time.perf_counter()
+        await asyncio.gather(*(self.chat(phone, turns) for phone in self.phones))
+        return time.perf_counter() - start
+
+
+async def bench_scenario(scenario, data_layer, base_url: str, phones: list, turns: int) -> dict:
+    tracer = Tracer()
+    tracer.instrument_agents(AGENTS.values())
+    swarm = tracer.instrument_client(AsyncSwarm(client=make_client(base_url)))
+
+    run = ScenarioRun(scenario, data_layer, swarm, tracer, phones)
+    elapsed = await run.run(turns)
+
+    # Separate one-turn pass: tracemalloc slows allocation and would skew the latencies.
+    memory_run = ScenarioRun(scenario, data_layer, swarm, Tracer(enabled=False), phones)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    await memory_run.run(1)
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return {
+        "turns": len(run.latencies),
+        "throughput": round(len(run.latencies) / elapsed, 2),
+        "p50_ms": round(percentile(run.latencies, 0.50), 2),
+        "p95_ms": round(percentile(run.latencies, 0.95), 2),
+        "p99_ms": round(percentile(run.latencies, 0.99), 2),
+        "overhead_p50_ms": round(percentile(run.overheads, 0.50), 2),
+        "tool_ms": round(statistics.fmean(run.tool_ms), 2),
+        "data_calls": round(statistics.fmean(run.data_calls), 2),
+        "kb_per_chat": round((current - baseline) / 1024 / len(phones), 1),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta: float) -> list:
+    """Return (scenario, metric, baseline, current, change) for each regression."""
+    regressions = []
+    for name, metrics in results["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if reference is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in reference or not reference[metric]:
+                continue
+            before, after = reference[metric], metrics[metric]
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            if worse > threshold and abs(after - before) > min_delta:
+                regressions.append((name, metric, before, after, change))
+    return regressions
+
+
+def print_table(results: dict, baseline: dict = None):
+    header = f"{'scenario':<15}" + "".join(f"{metric:>17}" for metric in METRICS)
+    print(header)
+    for name, metrics in results["scenarios"].items():
+        reference = (baseline or {}).get("scenarios", {}).get(name, {})
+        cells = []
+        for metric in METRICS:
+            value = metrics[metric]
+            if reference.get(metric):
+                cells.append(f"{value:>9g} ({(value - reference[metric]) / reference[metric]:+.0%})")
+            else:
+                cells.append(f"{value:g}")
+        print(f"{name:<15}" + "".join(f"{cell:>17}" for cell in cells))
+
+
+async def run(args) -> dict:
+    data_layer = InMemoryDataLayer()
+    phones = populate(data_layer, args.users, days=args.days)
+    names = args.scenarios.split(",") if args.scenarios != "all" else list(SCENARIOS)
+
+    results = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "chats": args.chats,
+            "turns": args.turns,
+            "latency": args.latency,
+            "users": args.users,
+        },
+        "scenarios": {},
+    }
+    with FakeOpenAIServer(latency=args.latency, script=script, keep_requests=False) as server:
+        for name in names:
+            results["scenarios"][name] = await bench_scenario(
+                SCENARIOS[name], data_layer, server.url, phones[: args.chats], args.turns
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scenarios", default="all", help=f"comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument("--chats", type=int, default=50, help="concurrent conversations")
+    parser.add_argument("--turns", type=int, default=5, help="turns per conversation")
+    parser.add_argument("--users", type=int, default=500, help="synthetic users to populate")
+    parser.add_argument("--days", type=int, default=30, help="days of synthetic meal history")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake completion latency (s)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--save-baseline", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative slowdown")
+    parser.add_argument("--min-delta", type=float, default=1.0, help="ignore absolute changes below this")
+    args = parser.parse_args()
+    args.users = max(args.users, args.chats)
+
+    baseline = None
+    if args.compare:
+        if not os.path.exists(args.compare):
+            parser.error(f"baseline {args.compare} not found; record one with --save-baseline {args.compare}")
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = asyncio.run(run(args))
+    print_table(results, baseline)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"wrote {path}")
+
+    if baseline is not None:
+        for key in ("chats", "turns", "latency"):
+            if baseline.get("meta", {}).get(key) != results["meta"][key]:
+                print(f"warning: baseline {key}={baseline['meta'].get(key)} differs from {results['meta'][key]}")
+        missing = [name for name in results["scenarios"] if name not in baseline.get("scenarios", {})]
+        for name in missing:
+            print(f"MISSING {name}: not in baseline {args.compare}; re-record it with --save-baseline")
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for name, metric, before, after, change in regressions:
+            print(f"REGRESSION {name}.{metric}: {before:g} -> {after:g} ({change:+.1%})")
+        if missing or regressions:
+            sys.exit(1)
+        print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Agent scenarios for the benchmark suite and the fake-server script that drives them.
+
+Each scenario is a user message plus the tool calls the fake model makes in
+response, in order, before it writes its final reply. The script finds the
+scenario from the last user message and counts the tool-call rounds already
+in the history, so one server can serve all scenarios concurrently.
+"""
+import json
+
+from fake_openai import tool_call
+
+PHOTO_DATA_URL = "data:image/jpeg;base64," + "A" * 4096
+
+TEXT_MEAL_ITEMS = [
+    {"name": "scrambled eggs", "quantity": "2 large", "calories": 180,
+     "protein_g": 12.6, "carbs_g": 1.2, "sugar_g": 0.8},
+    {"name": "whole wheat toast", "quantity": "1 slice", "calories": 80,
+     "protein_g": 4.0, "carbs_g": 14.0, "sugar_g": 1.4},
+]
+PHOTO_MEAL_ITEMS = [
+    {"name": "grilled chicken breast", "quantity": "150 g", "calories": 248,
+     "protein_g": 46.5, "carbs_g": 0.0, "sugar_g": 0.0},
+    {"name": "white rice", "quantity": "1 cup", "calories": 205,
+     "protein_g": 4.3, "carbs_g": 44.5, "sugar_g": 0.1},
+]
+
+
+def _meal_args(items: list, health_rating: int) -> dict:
+    return {
+        "food_items_json": json.dumps(items),
+        "total_calories": sum(item["calories"] for item in items),
+        "total_protein": round(sum(item["protein_g"] for item in items), 1),
+        "total_carbs": round(sum(item["carbs_g"] for item in items), 1),
+        "total_sugar": round(sum(item["sugar_g"] for item in items), 1),
+        "health_rating": health_rating,
+    }
+
+
+class Scenario:
+    def __init__(self, name: str, agent: str, text: str, steps: list, reply: str, photo: bool = False):
+        self.name = name
+        self.agent = agent
+        self.text = text
+        self.steps = steps
+        self.reply = reply
+        self.photo = photo
+
+    def message(self) -> dict:
+        if not self.photo:
+            return {"role": "user", "content": self.text}
+        return {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": self.text},
+                {"type": "image_url", "image_url": {"url": PHOTO_DATA_URL}},
+            ],
+        }
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario(
+            "text_meal", "chat_agent", "I had 2 scrambled eggs and a slice of toast",
+            [("save_text_meal", _meal_args(TEXT_MEAL_ITEMS, 7))],
+            "Logged! Eggs and toast: 260 cal. Health: 7/10.",
+        ),
+        Scenario(
+            "photo_meal", "chat_agent", "lunch",
+            [("transfer_to_food_analysis", {}), ("save_meal", _meal_args(PHOTO_MEAL_ITEMS, 8))],
+            "Chicken and rice: 453 cal. Health: 8/10 — lean protein with a simple carb.",
+            photo=True,
+        ),
+        Scenario(
+            "status", "chat_agent", "how am I doing today?",
+            [("get_calorie_status", {})],
+            "You have eaten 1450 of 2000 calories so far today.",
+        ),
+        Scenario(
+            "portion_edit", "chat_agent", "actually I only ate half of that",
+            [("update_last_meal", {"fraction": 0.5})],
+            "Updated your last meal to half.",
+        ),
+        Scenario(
+            "multi_edit", "chat_agent",
+            "I had eggs and toast for breakfast and chicken with rice for lunch, but only ate half of my last meal",
+            [("edit_meals", {"operations_json": json.dumps([
+                {"op": "scale", "meal": -1, "fraction": 0.5},
+                {"op": "log", "food_items": TEXT_MEAL_ITEMS, "health_rating": 7},
+                {"op": "log", "food_items": PHOTO_MEAL_ITEMS, "health_rating": 8},
+            ])})],
+            "Done: halved your last meal and logged breakfast (260 cal) and lunch (453 cal).",
+        ),
+        Scenario(
+            "daily_summary", "summary_agent", "Generate my end-of-day summary.",
+            [("get_daily_data", {})],
+            "Today: 1850/2000 cal (-150). Protein was solid; add vegetables tomorrow.",
+        ),
+    ]
+}
+_BY_TEXT = {scenario.text: scenario for scenario in SCENARIOS.values()}
+
+
+def _last_user_turn(messages: list) -> tuple:
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index].get("role") == "user":
+            content = messages[index]["content"]
+            if isinstance(content, list):
+                content = " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+            return index, content
+    return -1, ""
+
+
+def script(body: dict) -> dict:
+    """Fake-model policy: the scenario's next tool call, then its reply."""
+    messages = body.get("messages", [])
+    index, text = _last_user_turn(messages)
+    scenario = _BY_TEXT.get(text)
+    if scenario is None:
+        return {"content": "OK."}
+    step = sum(1 for message in messages[index + 1:] if message.get("tool_calls"))
+    if step < len(scenario.steps):
+        name, arguments = scenario.steps[step]
+        return {"tool_calls": [tool_call(name, arguments)]}
+    return {"content": scenario.reply}
@@ -0,0 +1,285 @@
+"""In-memory data layer and synthetic user population for benchmarks.
+
+InMemoryDataLayer implements the same context_variables contract as
+SQLiteDataLayer, so agent benchmarks measure the agent layer rather than
+a database.
+"""
+import bisect
+import calendar
+import json
+import os
+import random
+import sys
+import threading
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ai_agents.sqlite_backend import TREND_WINDOW_DAYS, calorie_limit  # noqa: E402
+from ai_agents.weight_trends import analyze, available  # noqa: E402
+
+FOODS = [
+    ("scrambled eggs", "2 large", 180, 12.6, 1.2, 0.8),
+    ("whole wheat toast", "1 slice", 80, 4.0, 14.0, 1.4),
+    ("oatmeal", "1 bowl", 300, 10.0, 54.0, 6.0),
+    ("banana", "1 medium", 105, 1.3, 27.0, 14.0),
+    ("grilled chicken breast", "150 g", 248, 46.5, 0.0, 0.0),
+    ("white rice", "1 cup", 205, 4.3, 44.5, 0.1),
+    ("mixed salad", "1 bowl", 60, 2.0, 10.0, 4.0),
+    ("greek yogurt", "170 g", 100, 17.0, 6.0, 6.0),
+    ("pepperoni pizza", "2 slices", 596, 24.0, 66.0, 7.6),
+    ("cola", "330 ml", 139, 0.0, 35.0, 35.0),
+    ("salmon fillet", "150 g", 312, 33.0, 0.0, 0.0),
+    ("pasta bolognese", "1 plate", 650, 28.0, 80.0, 9.0),
+]
+
+
+def _stamp(moment: datetime) -> str:
+    return moment.isoformat(sep=" ", timespec="seconds")
+
+
+def random_meal(rng: random.Random) -> dict:
+    items = [
+        {"name": name, "quantity": quantity, "calories": calories,
+         "protein_g": protein, "carbs_g": carbs, "sugar_g": sugar}
+        for name, quantity, calories, protein, carbs, sugar in rng.sample(FOODS, rng.randint(1, 3))
+    ]
+    return {
+        "food_items": json.dumps(items),
+        "total_calories": sum(item["calories"] for item in items),
+        "protein_g": round(sum(item["protein_g"] for item in items), 1),
+        "carbs_g": round(sum(item["carbs_g"] for item in items), 1),
+        "sugar_g": round(sum(item["sugar_g"] for item in items), 1),
+        "health_rating": rng.randint(3, 9),
+    }
+
+
+class InMemoryDataLayer:
+    """Dict-backed implementation of the data-layer contract."""
+
+    def __init__(self, today=date.today):
+        self.today = today
+        self.users = {}
+        self.phones = {}
+        self.meals = {}
+        self.meals_by_user = {}
+        self.weights = {}
+        self.goals = {}
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def context_variables(self) -> dict:
+        callables = {
+            name: getattr(self, name)
+            for name in (
+                "get_or_create_user", "update_user_goal", "update_user_profile", "log_meal",
+                "get_user_meals_today", "get_user_today_macros", "get_last_meal", "update_meal",
+                "delete_meal", "apply_meal_batch", "log_weight", "set_weight_goal", "compute_daily_calorie_limit",
+                "get_weekly_consumption", "get_monthly_consumption",
+            )
+        }
+        if available():
+            callables["get_weight_trend"] = self.get_weight_trend
+        return callables
+
+    def _next_id(self) -> int:
+        self._ids += 1
+        return self._ids
+
+    def get_or_create_user(self, phone: str) -> dict:
+        with self._lock:
+            user_id = self.phones.get(phone)
+            if user_id is None:
+                user_id = self.phones[phone] = self._next_id()
+                self.users[user_id] = {
+                    "id": user_id, "phone_number": phone, "first_name": "", "daily_goal": 2000,
+                    "dietary_preferences": "", "timezone": "UTC", "created_at": _stamp(datetime.now()),
+                }
+                self.meals_by_user[user_id] = []
+            return dict(self.users[user_id])
+
+    def update_user_goal(self, phone: str, calories: int):
+        self.users[self.phones[phone]]["daily_goal"] = calories
+
+    def update_user_profile(self, user_id: int, **fields) -> dict:
+        self.users[user_id].update(fields)
+        return dict(self.users[user_id])
+
+    def log_meal(
+        self, user_id: int, food_items: str, total_calories: int, image_id: str = None,
+        notes: str = "", protein_g: float = 0, carbs_g: float = 0, sugar_g: float = 0,
+        health_rating: int = 0, logged_at: datetime = None,
+    ) -> int:
+        with self._lock:
+            meal_id = self._next_id()
+            meal = {
+                "id": meal_id, "user_id": user_id, "logged_at": _stamp(logged_at or datetime.now()),
+                "food_items": food_items, "total_calories": total_calories, "protein_g": protein_g,
+                "carbs_g": carbs_g, "sugar_g": sugar_g, "health_rating": health_rating,
+                "image_id": image_id, "notes": notes or "",
+            }
+            self.meals[meal_id] = meal
+            rows = self.meals_by_user.setdefault(user_id, [])
+            bisect.insort(rows, (meal["logged_at"], meal_id))
+        return meal_id
+
+    def update_meal(
+        self, meal_id: int, food_items: str, total_calories: int, protein_g: float = 0,
+        carbs_g: float = 0, sugar_g: float = 0, health_rating: int = 0,
+    ):
+        self.meals[meal_id].update(
+            food_items=food_items, total_calories=total_calories, protein_g=protein_g,
+            carbs_g=carbs_g, sugar_g=sugar_g, health_rating=health_rating,
+        )
+
+    def delete_meal(self, meal_id: int):
+        with self._lock:
+            meal = self.meals.pop(meal_id)
+            self.meals_by_user[meal["user_id"]].remove((meal["logged_at"], meal_id))
+
+    def apply_meal_batch(self, user_id: int, logs: list = (), updates: list = (), deletes: list = ()) -> list:
+        with self._lock:
+            for meal_id in [m["meal_id"] for m in updates] + list(deletes):
+                if self.meals.get(meal_id, {}).get("user_id") != user_id:
+                    raise LookupError(f"Meal {meal_id} not found")
+            for m in updates:
+                self.update_meal(**m)
+            for meal_id in deletes:
+                meal = self.meals.pop(meal_id)
+                self.meals_by_user[user_id].remove((meal["logged_at"], meal_id))
+        return [self.log_meal(user_id, **m) for m in logs]
+
+    def meals_between(self, user_id: int, start: date, end: date) -> list:
+        rows = self.meals_by_user.get(user_id, [])
+        lo = bisect.bisect_left(rows, (start.isoformat(),))
+        hi = bisect.bisect_left(rows, (end.isoformat(),))
+        return [dict(self.meals[meal_id]) for _, meal_id in rows[lo:hi]]
+
+    def get_user_meals_today(self, user_id: int) -> list:
+        today = self.today()
+        return self.meals_between(user_id, today, today + timedelta(days=1))
+
+    def get_last_meal(self, user_id: int):
+        meals = self.get_user_meals_today(user_id)
+        return meals[-1] if meals else None
+
+    def _totals(self, user_id: int, start: date, end: date) -> dict:
+        meals = self.meals_between(user_id, start, end)
+        ratings = [m["health_rating"] for m in meals if m["health_rating"]]
+        return {
+            "total_calories": sum(m["total_calories"] for m in meals),
+            "total_protein": round(sum(m["protein_g"] for m in meals), 1),
+            "total_carbs": round(sum(m["carbs_g"] for m in meals), 1),
+            "total_sugar": round(sum(m["sugar_g"] for m in meals), 1),
+            "avg_health_rating": round(sum(ratings) / len(ratings), 1) if ratings else 0,
+            "meal_count": len(meals),
+        }
+
+    def get_user_today_macros(self, user_id: int) -> dict:
+        today = self.today()
+        totals = self._totals(user_id, today, today + timedelta(days=1))
+        del totals["meal_count"]
+        return totals
+
+    def get_weekly_consumption(self, user_id: int) -> dict:
+        today = self.today()
+        totals = self._totals(user_id, today - timedelta(days=today.weekday()), today + timedelta(days=1))
+        totals["days_elapsed"] = today.weekday() + 1
+        return totals
+
+    def get_monthly_consumption(self, user_id: int, month: int = None, year: int = None) -> dict:
+        today = self.today()
+        month = month or today.month
+        year = year or today.year
+        days_in_month = calendar.monthrange(year, month)[1]
+        start = date(year, month, 1)
+        if (year, month) == (today.year, today.month):
+            days_elapsed = today.day
+        elif (year, month) < (today.year, today.month):
+            days_elapsed = days_in_month
+        else:
+            days_elapsed = 0
+        totals = self._totals(user_id, start, start + timedelta(days=days_in_month))
+        totals.update(month=month, year=year, days_in_month=days_in_month, days_elapsed=days_elapsed)
+        return totals
+
+    def log_weight(self, user_id: int, weight_kg: float, logged_at: datetime = None):
+        with self._lock:
+            self.weights.setdefault(user_id, []).append(
+                (_stamp(logged_at or datetime.now()), weight_kg)
+            )
+            self.weights[user_id].sort()
+
+    def set_weight_goal(self, user_id: int, target_weight: float, target_date: str, tdee: int = None):
+        previous = self.goals.get(user_id, {})
+        self.goals[user_id] = {
+            "target_weight": target_weight,
+            "target_date": target_date,
+            "tdee": tdee or previous.get("tdee"),
+        }
+
+    def bulk_trend_inputs(self, user_ids: list, day: date = None, days: int = TREND_WINDOW_DAYS) -> dict:
+        day = day or self.today()
+        start = day - timedelta(days=days - 1)
+        inputs = {}
+        for user_id in user_ids:
+            weights = {}
+            for stamp, weight_kg in self.weights.get(user_id, []):
+                weights.setdefault(date.fromisoformat(stamp[:10]), []).append(weight_kg)
+            intake = {}
+            for meal in self.meals_between(user_id, start, day + timedelta(days=1)):
+                logged = date.fromisoformat(meal["logged_at"][:10])
+                intake[logged] = intake.get(logged, 0) + meal["total_calories"]
+            goal = self.goals.get(user_id, {})
+            inputs[user_id] = {
+                "weights": [(d, sum(w) / len(w)) for d, w in sorted(weights.items()) if start <= d <= day],
+                "intake": sorted(intake.items()),
+                "target_weight": goal.get("target_weight"),
+                "target_date": goal.get("target_date"),
+            }
+        return inputs
+
+    def get_weight_trend(self, user_id: int) -> dict:
+        today = self.today()
+        return analyze(self.bulk_trend_inputs([user_id], today), today)[user_id]
+
+    def compute_daily_calorie_limit(self, user_id: int) -> dict:
+        goal = self.goals.get(user_id, {})
+        weights = self.weights.get(user_id)
+        return calorie_limit(
+            self.users[user_id]["daily_goal"], goal.get("target_weight"), goal.get("target_date"),
+            goal.get("tdee"), weights[-1][1] if weights else None, self.today(),
+        )
+
+
+def populate(
+    data_layer: InMemoryDataLayer,
+    users: int,
+    days: int = 30,
+    meals_per_day: int = 3,
+    seed: int = 7,
+) -> list:
+    """Fill the data layer with synthetic history; returns the users' phone numbers."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    phones = []
+    for i in range(users):
+        phone = f"+1555{i:07d}"
+        phones.append(phone)
+        user_id = data_layer.get_or_create_user(phone)["id"]
+        for day in range(days, -1, -1):
+            for slot in range(rng.randint(max(1, meals_per_day - 1), meals_per_day + 1)):
+                logged_at = (now - timedelta(days=day)).replace(hour=7 + slot * 4, minute=rng.randint(0, 59))
+                if logged_at <= now:
+                    data_layer.log_meal(user_id, logged_at=logged_at, **random_meal(rng))
+        weight = rng.uniform(60, 110)
+        for week in range(days // 7 + 1):
+            data_layer.log_weight(user_id, round(weight - week * 0.3, 1), now - timedelta(days=days - week * 7))
+        if i % 3 == 0:
+            data_layer.set_weight_goal(
+                user_id, round(weight - 8, 1), (now.date() + timedelta(days=120)).isoformat(), 2300
+            )
+    return phones
@@ -8,5 +8,9 @@ setup(
         "swarm @ git+https://github.com/openai/swarm.git",
         "openai>=1.50.0",
     ],
+    extras_require={
+        "images": ["Pillow>=10.0"],
+        "analytics": ["numpy>=1.26"],
+    },
     python_requires=">=3.12",
 )